@@ -1,8 +1,13 @@
-from pymodbus.client import ModbusTcpClient
 from pypylon import pylon
 import cv2
+import os
+import sys
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'SERVER'))
+
+from feeder_controller import FeederController
+
 def connect_camera():
     """카메라 연결 및 설정"""
     tl_factory = pylon.TlFactory.GetInstance()
@@ -40,9 +45,9 @@ def capture_roi_image(camera, converter, filename):
 
 def main():
     # 피더 연결
-    client = ModbusTcpClient('192.168.1.100', port=502)
+    feeder = FeederController('192.168.1.100', port=502)
     
-    if not client.connect():
+    if not feeder.connect():
         print("✗ 피더 연결 실패")
         return
     
@@ -55,8 +60,7 @@ def main():
     try:
         # 조명 켜기 (15%)
         print("\n조명 켜기 (15%)")
-        client.write_register(10, 1)
-        client.write_register(11, 150)
+        feeder.run_sync(feeder.set_light(True, 15))
         time.sleep(0.5)
         
         # 10번 반복
@@ -65,18 +69,12 @@ def main():
             
             # 바운스 0.5초
             print("바운스 동작 (0.5초)")
-            client.write_register(1, 10113)
-            client.write_register(0, 1)
-            time.sleep(0.5)
-            client.write_register(0, 0)
+            feeder.run_action_blocking(13, 0.5)
             time.sleep(0.2)
             
             # 집합 1초
             print("집합 동작 (1초)")
-            client.write_register(1, 10114)
-            client.write_register(0, 1)
-            time.sleep(1)
-            client.write_register(0, 0)
+            feeder.run_action_blocking(14, 1)
             time.sleep(2)
             
             # 캡처
@@ -86,12 +84,12 @@ def main():
         print("\n완료!")
         
     except KeyboardInterrupt:
-        client.write_register(0, 0)
-        client.write_register(10, 0)
+        feeder.run_sync(feeder.stop_action())
+        feeder.run_sync(feeder.set_light(False))
         print("\n\n종료합니다...")
     finally:
         camera.Close()
-        client.close()
+        feeder.disconnect()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
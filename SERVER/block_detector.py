@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+
+def _isolated_mask(centers, min_distance):
+    """다른 블럭과 min_distance 이상 떨어진 블럭 여부
+
+    min_distance 크기의 격자에 중심점을 나눠 담고, 인접 3x3 칸의 점들과만
+    거리를 계산한다 (격자 칸 단위로 NumPy 일괄 계산).
+    """
+    n = len(centers)
+    isolated = np.ones(n, dtype=bool)
+    if n < 2:
+        return isolated
+
+    cells = np.floor(centers / min_distance).astype(np.int64)
+    buckets = {}
+    for i, key in enumerate(map(tuple, cells)):
+        buckets.setdefault(key, []).append(i)
+
+    min_dist_sq = min_distance * min_distance
+    for (cx, cy), members in buckets.items():
+        neighbors = [
+            j
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+            for j in buckets.get((cx + dx, cy + dy), ())
+        ]
+        if len(neighbors) < 2:
+            continue
+
+        idx = np.array(members)
+        nb = np.array(neighbors)
+        diff = centers[idx, None, :] - centers[None, nb, :]
+        dist_sq = (diff ** 2).sum(axis=2)
+        dist_sq[idx[:, None] == nb[None, :]] = np.inf
+        isolated[idx] = dist_sq.min(axis=1) >= min_dist_sq
+
+    return isolated
+
+def detect_blocks(img, min_area=28000, max_area=30000, max_aspect=1.15,
+                  min_distance=100, threshold=127):
+    """정사각형 블럭 검출 (고전 비전, YOLO 미사용)
+
+    Args:
+        img: ROI 이미지 (BGR)
+        min_area, max_area: 윤곽선 면적 범위 (px²)
+        max_aspect: 정사각형 판별 최대 종횡비
+        min_distance: 픽업 가능 판정 최소 중심 거리 (px)
+        threshold: 이진화 임계값
+
+    Returns:
+        dict: centers (N,2) float32, sizes (N,2), angles (N,) [-45, 45), pickable (N,) bool
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    _, binary = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY_INV)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    empty = {
+        "centers": np.zeros((0, 2), np.float32),
+        "sizes": np.zeros((0, 2), np.float32),
+        "angles": np.zeros(0, np.float32),
+        "pickable": np.zeros(0, bool)
+    }
+    if not contours:
+        return empty
+
+    # 1. 면적 필터 (minAreaRect는 통과한 윤곽선에만 계산)
+    areas = np.fromiter((cv2.contourArea(c) for c in contours), np.float64, len(contours))
+    keep = np.flatnonzero((areas >= min_area) & (areas <= max_area))
+    if len(keep) == 0:
+        return empty
+
+    # 2. 최소 회전 사각형 → (cx, cy, w, h, angle) 배열
+    rects = np.array(
+        [(cx, cy, w, h, a) for (cx, cy), (w, h), a in (cv2.minAreaRect(contours[i]) for i in keep)],
+        dtype=np.float32
+    )
+    centers = rects[:, 0:2]
+    sizes = rects[:, 2:4]
+
+    # 3. 정사각형 판별 (종횡비)
+    short = sizes.min(axis=1)
+    long = sizes.max(axis=1)
+    square = (short > 0) & (long <= max_aspect * np.maximum(short, 1e-6))
+
+    centers = centers[square]
+    sizes = sizes[square]
+
+    # 정사각형은 90° 주기 → [-45, 45) 로 정규화
+    angles = (rects[square, 4] + 45.0) % 90.0 - 45.0
+
+    return {
+        "centers": centers,
+        "sizes": sizes,
+        "angles": angles,
+        "pickable": _isolated_mask(centers, min_distance)
+    }
+
+def draw_blocks(frame, blocks, padding=20):
+    """블럭 검출 결과 시각화 (픽업 가능=초록, 불가=빨강)"""
+    for pickable, color in ((True, (0, 255, 0)), (False, (0, 0, 255))):
+        select = blocks["pickable"] == pickable
+        if not select.any():
+            continue
+
+        boxes = [
+            np.int32(cv2.boxPoints(((cx, cy), (w + 2 * padding, h + 2 * padding), a)))
+            for (cx, cy), (w, h), a in zip(
+                blocks["centers"][select], blocks["sizes"][select], blocks["angles"][select]
+            )
+        ]
+        cv2.polylines(frame, boxes, True, color, 2)
+        for cx, cy in blocks["centers"][select]:
+            cv2.circle(frame, (int(cx), int(cy)), 8, color, -1)
+
+    return frame
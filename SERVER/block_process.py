@@ -0,0 +1,165 @@
+import time
+import asyncio
+
+from pick_process import PickProcess, camera_to_robot, camera_angle_to_robot
+
+class BlockProcess(PickProcess):
+    job = "block"
+
+    def __init__(self, system):
+        super().__init__(system, "block_feeder_policy")
+
+    async def get_block_targets(self, timeout=2.0):
+        """카메라에서 픽업 가능한 블럭 (x, y, angle) 리스트 가져오기
+
+        모드 전환 직후에는 블럭 검출 결과가 없으므로 첫 결과를 잠시 기다린다.
+        """
+        self.system.camera.set_mode("block")
+        deadline = time.perf_counter() + timeout
+        while self.system.camera.latest_blocks is None and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+
+        targets = self.system.camera.get_block_targets()
+        print(f"📷 픽업 가능한 블럭 개수: {len(targets)}")
+        return targets
+
+    def observe_tray(self):
+        camera = self.system.camera
+        return self.feeder_policy.observe_blocks(camera.latest_blocks, (camera.roi[3], camera.roi[2]))
+
+    async def find_targets(self):
+        return await self.get_block_targets()
+
+    async def execute_block_drawing(self, shape_name: str,
+                                    tool_attached: bool = False, keep_tool: bool = False):
+        """블럭 글자 만들기 전체 프로세스
+
+        Args:
+            shape_name: 글자 (coordination.json 키, "A"-"Z")
+            tool_attached: 그리퍼가 이미 장착되어 있음 (스케줄러가 툴 관리)
+            keep_tool: 완료 후 그리퍼 탈착/대기 위치 이동 생략
+        """
+        print("\n" + "=" * 60)
+        print(f"블럭 글자 만들기 시작: {shape_name}")
+        print("=" * 60)
+
+        job_started = time.perf_counter()
+
+        plate_list = self.coordination.get(shape_name.upper())
+        if not plate_list:
+            print(f"✗ '{shape_name}' 좌표 데이터 없음")
+            self.publish_progress(shape_name, 0, 0, "error", message=f"'{shape_name}' 데이터 없음")
+            return {"status": "error", "message": f"'{shape_name}' 데이터 없음"}
+
+        total_plates = len(plate_list)
+
+        # 1. 그리퍼 장착
+        if not tool_attached:
+            print("\n[Step 1] 그리퍼 장착")
+            self.publish_progress(shape_name, 0, total_plates, "attaching")
+            started = time.perf_counter()
+            response = self.system.robot.attach_gripper()
+            self.publish_step("attach_gripper", started)
+            if not response:
+                print("✗ 그리퍼 장착 실패")
+                self.publish_progress(shape_name, 0, total_plates, "error", message="그리퍼 장착 실패")
+                return {"status": "error", "message": "그리퍼 장착 실패"}
+
+        print(f"\n[Step 2] 플레이트 리스트 로드: {total_plates}개")
+
+        # 3. 초기 블럭 좌표 리스트 가져오기
+        targets = await self.get_block_targets()
+
+        plate_index = 0
+        interrupted = None
+        self.publish_progress(shape_name, 0, total_plates, "running")
+
+        while plate_index < total_plates:
+            # 픽업 가능한 블럭이 없으면
+            if not targets:
+                print("\n⚠️ 픽업 가능한 블럭 없음 - 피더 동작 및 재검출")
+                targets, interrupted = await self.refill()
+                if interrupted:
+                    break
+
+                if not targets:
+                    print("✗ 여전히 블럭 없음 - 프로세스 중단")
+                    interrupted = "블럭 부족"
+                    break
+
+            plate_seq = plate_list[plate_index]
+
+            # 블럭 좌표 하나 가져오기
+            roi_x, roi_y, angle = targets.pop(0)
+            camera_x = self.system.camera.roi[0] + roi_x
+            camera_y = self.system.camera.roi[1] + roi_y
+
+            # 로봇 좌표로 변환 (정사각 블럭은 90° 대칭 → 반사 변환 후 각도 부호만 바뀜)
+            robot_x, robot_y = camera_to_robot(camera_x, camera_y)
+            robot_angle = camera_angle_to_robot(angle, period=90.0)
+
+            print(f"\n[{plate_index + 1}/{total_plates}] Plate #{plate_seq}")
+            print(f"  카메라 좌표: ({camera_x:.3f}, {camera_y:.3f}), 각도: {angle:.3f}°")
+            print(f"  로봇 좌표: ({robot_x:.3f}, {robot_y:.3f}), 각도: {robot_angle:.3f}°")
+
+            # block_pick_place 실행
+            started = time.perf_counter()
+            response = self.system.robot.block_pick_place(
+                x=int(robot_x),
+                y=int(robot_y),
+                angle=int(round(robot_angle)),
+                plate_seq=plate_seq
+            )
+            self.publish_step("pick_place", started, plate_seq=plate_seq, ok=bool(response))
+
+            if not response:
+                print(f"⚠️ Plate #{plate_seq} 작업 실패 - 프로세스 중단")
+                self.system.camera.dump_recording(10.0, "pick_failed")
+                interrupted = f"Plate #{plate_seq} 작업 실패"
+                break
+
+            plate_index += 1
+            self.publish_progress(shape_name, plate_index, total_plates, "running")
+
+        if interrupted:
+            self.publish_progress(shape_name, plate_index, total_plates, "interrupted", message=interrupted)
+            return {
+                "status": "interrupted",
+                "shape": shape_name,
+                "completed_plates": plate_index,
+                "total_plates": total_plates,
+                "message": interrupted
+            }
+
+        # 완료 후 처리
+        print("\n[최종 단계] 마무리")
+        self.publish_progress(shape_name, plate_index, total_plates, "finishing")
+        started = time.perf_counter()
+
+        # 대기 위치로 이동
+        print("  - 대기 위치로 이동")
+        self.system.robot.robot_init()
+
+        if not keep_tool:
+            # 그리퍼 탈착
+            print("  - 그리퍼 탈착")
+            self.system.robot.detach_gripper()
+
+            # 대기 위치로 이동
+            print("  - 대기 위치로 이동")
+            self.system.robot.robot_init()
+
+        self.publish_step("finish", started)
+
+        print("\n✓ 블럭 글자 만들기 완료!")
+        self.publish_progress(
+            shape_name, plate_index, total_plates, "completed",
+            seconds=round(time.perf_counter() - job_started, 3)
+        )
+
+        return {
+            "status": "completed",
+            "shape": shape_name,
+            "total_plates": total_plates,
+            "message": "블럭 글자 만들기 완료"
+        }
@@ -1,31 +1,124 @@
 from pypylon import pylon
 import cv2
 import numpy as np
-from ultralytics import YOLO
+import os
 import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from block_detector import detect_blocks, draw_blocks
+from detections import (
+    front_centroids, front_targets, block_targets, result_arrays, make_snapshot, detection_message
+)
+from tiled_inference import TiledInference, INFERENCE_MODES
+from cpu_tuning import pin_thread
+from model_cache import load_model, reference_image, warm_up, record_first_frame
+from frame_recorder import FrameRecorder
+from detection_tracker import DetectionTracker, confirmed_front_centroids, confirmed_front_targets
+
+# 검출 박스 색상 (BGR): back 붉은색, front 연두색
+CLASS_COLORS = {0: (0, 0, 255), 1: (0, 255, 0)}
+
+def draw_detections(image, snapshot, conf_threshold, alpha=0.3):
+    """검출 박스 시각화 - 채운 박스를 한 장에 모두 그린 뒤 한 번만 블렌딩"""
+    select = snapshot["conf"] >= conf_threshold
+    if not select.any():
+        return image.copy()
+    
+    boxes = snapshot["xyxy"][select].astype(np.int32)
+    colors = [CLASS_COLORS[1 if int(cls) else 0] for cls in snapshot["cls"][select]]
+    
+    # 투명 박스 (프레임 전체 복사/블렌딩은 박스 수와 무관하게 1회)
+    overlay = image.copy()
+    for (x1, y1, x2, y2), color in zip(boxes, colors):
+        cv2.rectangle(overlay, (x1, y1), (x2, y2), color, -1)
+    annotated = cv2.addWeighted(image, 1 - alpha, overlay, alpha, 0)
+    
+    # 테두리
+    for (x1, y1, x2, y2), color in zip(boxes, colors):
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
+    return annotated
 
 class CameraController:
     """카메라 및 비전 처리 통합 컨트롤러"""
     
-    def __init__(self, model_path='../MODEL/final_lego_model.pt'):
+    def __init__(self, model_path='../MODEL/final_lego_model.pt', service=None, source="camera",
+                 serial=None, roi=(684, 421, 1256, 978), recording_dir=None):
+        """
+        Args:
+            service: 공유 InferenceService (주면 모델을 따로 로드하지 않고 배치 추론에 참여)
+            source: 공유 추론 서비스에서 이 카메라의 이름
+            serial: 카메라 시리얼 번호 (None이면 처음 찾은 카메라)
+            recording_dir: 프레임 녹화 폴더 (None이면 SERVER/recordings)
+        """
+        self.serial = serial
         self.camera = None
         self.converter = pylon.ImageFormatConverter()
         self.converter.OutputPixelFormat = pylon.PixelType_BGR8packed
         self.converter.OutputBitAlignment = pylon.OutputBitAlignment_MsbAligned
         
         # ROI 설정
-        self.roi = [684, 421, 1256, 978]  # [x, y, w, h]
+        self.roi = list(roi)  # [x, y, w, h]
+        
+        # YOLO 모델 로드 (공유 서비스가 있으면 같은 호출 형식의 클라이언트 사용)
+        self.service = service
+        self.model_ready = threading.Event()
+        if service is not None:
+            self.model = service.client(source)
+            self._model_report = None
+            self.model_ready.set()      # 예열은 서비스 스레드에서
+            print(f"✓ 공유 추론 서비스 사용: {source}")
+        else:
+            self.model, self._model_report = load_model(model_path)
+            threading.Thread(target=self._warm_up, daemon=True).start()
         
-        # YOLO 모델 로드
-        self.model = YOLO(model_path)
-        print(f"✓ 모델 로드: {model_path}")
+        # 추론 방식: "plain" (640 축소) / "upscaled" (imgsz 확대) / "tiled" (겹치는 타일 배치)
+        self.inference_mode = "plain"
+        self.upscaled_imgsz = int(os.environ.get("FLEXIBOT_IMGSZ", "1280"))
+        self.tiled = TiledInference(
+            self.model,
+            tile_size=int(os.environ.get("FLEXIBOT_TILE_SIZE", "640")),
+            overlap=float(os.environ.get("FLEXIBOT_TILE_OVERLAP", "0.2"))
+        )
+        self.set_inference(os.environ.get("FLEXIBOT_INFERENCE", "plain"))
         
         self.lock = threading.Lock()
         self.current_frame = None
         self.running = False
         
-        # 최신 검출 결과 저장
-        self.latest_results = None
+        # 최신 검출 결과 저장 (프레임당 1회 NumPy 변환한 스냅샷)
+        self.latest_detections = None
+        self.conf_threshold = 0.8
+        
+        # 프레임 간 추적 (평활 좌표, 클래스 투표)
+        self.tracker = DetectionTracker()
+        self.latest_tracks = None
+        
+        # 검출 모드: "lego" (YOLO) / "block" (고전 비전)
+        self.mode = "lego"
+        self.latest_blocks = None
+        self.block_params = {
+            "min_area": 28000,
+            "max_area": 30000,
+            "max_aspect": 1.15,
+            "min_distance": 100
+        }
+        
+        # 프레임 처리 후 호출 (비전 프로세스 공유 메모리 게시 등)
+        # on_frame(roi_img, annotated_frame, snapshot, blocks) - 캡처 스레드에서 호출
+        self.on_frame = None
+        
+        # 시각화 위치: "server" (JPEG에 박스를 그림) / "client" (원본 JPEG + 검출 메시지, 브라우저가 그림)
+        self.overlay = os.environ.get("FLEXIBOT_OVERLAY", "server")
+        self.current_raw = None
+        self.frame_seq = 0
+        # on_detections(message) - 프레임마다 클라이언트 오버레이용 검출 메시지 (캡처 스레드에서 호출)
+        self.on_detections = None
+        
+        # 최근 프레임 녹화 (FLEXIBOT_RECORD_SECONDS 설정 시, 카메라 연결 후 프레임 속도로 링 크기 결정)
+        self.recorder = None
+        self.record_seconds = float(os.environ.get("FLEXIBOT_RECORD_SECONDS", "0"))
+        self.recording_dir = recording_dir
         
     def connect_camera(self):
         """카메라 연결"""
@@ -37,49 +130,151 @@ class CameraController:
                 print("✗ 연결된 카메라가 없습니다")
                 return False
             
-            self.camera = pylon.InstantCamera(tl_factory.CreateFirstDevice())
+            if self.serial is None:
+                device = tl_factory.CreateFirstDevice()
+            else:
+                matches = [d for d in devices if d.GetSerialNumber() == str(self.serial)]
+                if not matches:
+                    print(f"✗ 카메라 없음 (시리얼 {self.serial})")
+                    return False
+                device = tl_factory.CreateDevice(matches[0])
+            
+            self.camera = pylon.InstantCamera(device)
             self.camera.Open()
             
             print(f"✓ 카메라 연결: {self.camera.GetDeviceInfo().GetModelName()}")
+            
+            if self.record_seconds > 0 and self.recorder is None:
+                self.recorder = FrameRecorder(
+                    seconds=self.record_seconds, fps=self._capture_fps(),
+                    max_height=self.roi[3], max_width=self.roi[2], directory=self.recording_dir
+                )
             return True
             
         except Exception as e:
             print(f"✗ 카메라 연결 실패: {e}")
             return False
     
+    def _capture_fps(self):
+        """녹화 링 크기용 최대 캡처 속도 (FLEXIBOT_RECORD_FPS > 카메라 설정 프레임 속도 > 30)
+
+        블럭 모드는 YOLO를 건너뛰어 카메라 속도에 가깝게 돌 수 있으므로 처리 속도가 아니라
+        카메라 프레임 속도를 기준으로 잡는다.
+        """
+        fps = os.environ.get("FLEXIBOT_RECORD_FPS")
+        if fps:
+            return float(fps)
+        for name in ("ResultingFrameRate", "ResultingFrameRateAbs"):     # USB / GigE
+            try:
+                return float(getattr(self.camera, name).GetValue())
+            except Exception:
+                continue
+        return 30.0
+    
     def set_roi(self, x: int, y: int):
         """ROI 위치 변경"""
         with self.lock:
             self.roi[0] = x
             self.roi[1] = y
+            self.tracker.reset()
+            self.latest_tracks = None
         print(f"✓ ROI 변경: ({x}, {y})")
     
-    def get_front_centroids(self):
-        """연두색(front) 객체의 중심점 추출"""
+    def set_mode(self, mode: str):
+        """검출 모드 변경 (이전 모드 결과는 폐기)"""
+        if mode not in ("lego", "block"):
+            raise ValueError(f"Invalid mode: {mode}")
         with self.lock:
-            if self.latest_results is None:
-                return []
-            results = self.latest_results
-        
-        centroids = []
-        
-        if results[0].boxes is not None:
-            boxes = results[0].boxes.xyxy.cpu().numpy()
-            classes = results[0].boxes.cls.cpu().numpy()
-            confs = results[0].boxes.conf.cpu().numpy()
-            
-            for box, cls, conf in zip(boxes, classes, confs):
-                if conf < 0.8:
-                    continue
-                
-                # front 클래스만 처리
-                if int(cls) == 1:
-                    x1, y1, x2, y2 = map(int, box)
-                    center_x = (x1 + x2) // 2
-                    center_y = (y1 + y2) // 2
-                    centroids.append((center_x, center_y))
-        
-        return centroids
+            if self.mode != mode:
+                self.mode = mode
+                self.latest_detections = None
+                self.latest_blocks = None
+                self.tracker.reset()
+                self.latest_tracks = None
+        print(f"✓ 검출 모드: {mode}")
+    
+    @property
+    def model_report(self):
+        """모델 로드/예열 보고 (공유 서비스면 서비스의 현재 모델)"""
+        if self.service is not None:
+            return self.service.model_report
+        return self._model_report
+    
+    def _warm_up(self):
+        """백그라운드 예열 (끝날 때까지 lego 프레임 처리는 대기)"""
+        try:
+            warm_up(self.model, reference_image((self.roi[3], self.roi[2], 3)), self.model_report)
+        except Exception as e:
+            print(f"⚠️ 모델 예열 실패: {e}")
+        finally:
+            self.model_ready.set()
+    
+    def set_inference(self, mode: str, tile_size=None, overlap=None):
+        """YOLO 추론 방식 변경 (다음 프레임부터 적용)"""
+        if mode not in INFERENCE_MODES:
+            raise ValueError(f"Invalid inference mode: {mode}")
+        if tile_size is not None:
+            self.tiled.tile_size = int(tile_size)
+        if overlap is not None:
+            self.tiled.overlap = float(overlap)
+        self.inference_mode = mode
+        if mode == "tiled":
+            print(f"✓ 추론 방식: tiled ({self.tiled.tile_size}px, 겹침 {self.tiled.overlap:g})")
+        else:
+            print(f"✓ 추론 방식: {mode}")
+    
+    def get_block_targets(self, pickable_only=True):
+        """블럭 픽업 대상 (x, y, angle) 리스트 - ROI 좌표"""
+        with self.lock:
+            blocks = self.latest_blocks
+        return block_targets(blocks, pickable_only)
+    
+    def infer(self, roi_img):
+        """YOLO 추론 → 검출 스냅샷 (NumPy 배열, ROI 좌표)"""
+        self.model_ready.wait()
+        if self.service is None and "first_frame_ms" not in self.model_report:
+            started = time.perf_counter()
+            snapshot = self._infer(roi_img)
+            record_first_frame(self.model_report, time.perf_counter() - started)
+            return snapshot
+        return self._infer(roi_img)
+    
+    def _infer(self, roi_img):
+        mode = self.inference_mode
+        if mode == "tiled":
+            return self.tiled(roi_img)
+        if mode == "upscaled":
+            results = self.model(roi_img, imgsz=self.upscaled_imgsz, verbose=False)
+        else:
+            results = self.model(roi_img, verbose=False)
+        return make_snapshot(*result_arrays(results[0], roi_img.shape), roi_img.shape)
+    
+    def get_detection_snapshot(self):
+        """최신 검출 스냅샷 (xyxy, cls, conf, shape, ts) - 읽기 전용으로 사용"""
+        with self.lock:
+            return self.latest_detections
+    
+    def get_tracks(self):
+        """최신 추적 결과 (ids, xyxy, centers, cls, conf, confirmed, ts)"""
+        with self.lock:
+            return self.latest_tracks
+    
+    def get_front_centroids(self, confirmed_only=False):
+        """연두색(front) 객체의 중심점 추출
+
+        Args:
+            confirmed_only: 여러 프레임에서 확인된 트랙의 평활 좌표만 반환 (float)
+        """
+        if confirmed_only:
+            return confirmed_front_centroids(self.get_tracks())
+        # front 클래스(1)만, 신뢰도 기준 이상
+        return front_centroids(self.get_detection_snapshot(), self.conf_threshold)
+    
+    def get_front_targets(self, confirmed_only=False):
+        """front 객체 픽업 대상 [(x, y, angle), ...] - 마스크 모멘트 기반 서브픽셀 좌표"""
+        if confirmed_only:
+            return confirmed_front_targets(self.get_tracks())
+        return front_targets(self.get_detection_snapshot(), self.conf_threshold)
     
     def start_capture(self):
         """캡처 시작"""
@@ -91,8 +286,32 @@ class CameraController:
         threading.Thread(target=self._capture_loop, daemon=True).start()
         return True
     
+    def process_frame(self, roi_img, mode=None):
+        """ROI 이미지 한 장 처리 → (annotated_frame, snapshot, blocks)
+
+        캡처 루프와 녹화 재생(FrameReplay)에서 같이 사용한다. 상태는 바꾸지 않는다.
+        lego 모드는 blocks가, block 모드는 snapshot이 None.
+        """
+        mode = mode or self.mode
+        
+        client_overlay = self.overlay == "client"
+        
+        # 블럭 모드: 고전 비전 검출 (YOLO 생략)
+        if mode == "block":
+            blocks = detect_blocks(roi_img, **self.block_params)
+            annotated_frame = roi_img if client_overlay else draw_blocks(roi_img.copy(), blocks)
+            return annotated_frame, None, blocks
+        
+        # YOLO 추론
+        snapshot = self.infer(roi_img)
+        
+        # 커스텀 시각화 (client 모드면 브라우저가 그림)
+        annotated_frame = roi_img if client_overlay else draw_detections(roi_img, snapshot, self.conf_threshold)
+        return annotated_frame, snapshot, None
+    
     def _capture_loop(self):
         """실시간 캡처 및 추론"""
+        pin_thread("grab")
         while self.running and self.camera.IsGrabbing():
             try:
                 grab_result = self.camera.RetrieveResult(5000, pylon.TimeoutHandling_ThrowException)
@@ -106,57 +325,57 @@ class CameraController:
                         x, y, w, h = self.roi
                     
                     roi_img = img[y:y+h, x:x+w].copy()
+                    mode = self.mode
+                    try:
+                        annotated_frame, snapshot, blocks = self.process_frame(roi_img, mode)
+                    except FuturesTimeout:
+                        # 공유 추론 서비스 응답 지연 → 이 프레임만 건너뜀
+                        print("⚠️ 추론 응답 시간 초과 - 프레임 건너뜀")
+                        grab_result.Release()
+                        continue
                     
-                    # YOLO 추론
-                    results = self.model(roi_img, verbose=False)
-                    
-                    # 최신 결과 저장
+                    # 최신 결과 저장 (처리 중 모드가 바뀌었으면 폐기)
                     with self.lock:
-                        self.latest_results = results
-                    
-                    # 커스텀 시각화
-                    annotated_frame = roi_img.copy()
+                        if self.mode == mode:
+                            if blocks is not None:
+                                self.latest_blocks = blocks
+                            else:
+                                self.latest_detections = snapshot
+                                self.latest_tracks = self.tracker.update(snapshot, self.conf_threshold)
+                        self.current_frame = annotated_frame
+                        self.current_raw = roi_img
+                        self.frame_seq += 1
+                        seq = self.frame_seq
                     
-                    if results[0].boxes is not None:
-                        boxes = results[0].boxes.xyxy.cpu().numpy()
-                        classes = results[0].boxes.cls.cpu().numpy()
-                        confs = results[0].boxes.conf.cpu().numpy()
-                        
-                        for box, cls, conf in zip(boxes, classes, confs):
-                            if conf < 0.8:
-                                continue
-                            
-                            x1, y1, x2, y2 = map(int, box)
-                            
-                            # 색상 설정
-                            if int(cls) == 0:  # back
-                                color = (0, 0, 255)  # 붉은색
-                            else:  # front
-                                color = (0, 255, 0)  # 연두색
-                            
-                            # 투명 박스
-                            overlay = annotated_frame.copy()
-                            cv2.rectangle(overlay, (x1, y1), (x2, y2), color, -1)
-                            annotated_frame = cv2.addWeighted(annotated_frame, 0.7, overlay, 0.3, 0)
-                            
-                            # 테두리
-                            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
+                    if self.on_detections:
+                        self.on_detections(detection_message(
+                            mode, snapshot, blocks, self.conf_threshold, seq, roi_img.shape
+                        ))
                     
-                    with self.lock:
-                        self.current_frame = annotated_frame
+                    if self.recorder:
+                        self.recorder.write(roi_img, mode, snapshot, blocks)
+                    if self.on_frame:
+                        self.on_frame(roi_img, annotated_frame, snapshot, blocks)
                 
                 grab_result.Release()
                 
             except Exception as e:
                 print(f"캡처 오류: {e}")
                 break
+    
+    def dump_recording(self, seconds=10.0, reason="manual"):
+        """최근 seconds초 녹화 프레임을 파일로 저장 (백그라운드) → 저장 경로 또는 None"""
+        if not self.recorder:
+            return None
+        return self.recorder.dump(seconds, reason)
         
-    def get_frame(self):
-        """현재 프레임 반환 (JPEG 인코딩)"""
+    def get_frame(self, raw=False):
+        """현재 프레임 반환 (JPEG 인코딩, raw=True면 박스 없는 원본 ROI)"""
         with self.lock:
-            if self.current_frame is not None:
-                ret, buffer = cv2.imencode('.jpg', self.current_frame)
-                return buffer.tobytes()
+            frame = self.current_raw if raw else self.current_frame
+        if frame is not None:
+            ret, buffer = cv2.imencode('.jpg', frame)
+            return buffer.tobytes()
         return None
     
     def stop(self):
@@ -164,4 +383,6 @@ class CameraController:
         self.running = False
         if self.camera:
             self.camera.StopGrabbing()
-            self.camera.Close()
\ No newline at end of file
+            self.camera.Close()
+        if self.service is not None:
+            self.model.close()
\ No newline at end of file
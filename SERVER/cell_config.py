@@ -0,0 +1,84 @@
+"""셀(로봇/피더/카메라/실린더 한 세트) 구성 로드
+
+cells.json (또는 FLEXIBOT_CELLS 경로) 예:
+    {
+        "cells": [
+            {"name": "main", "cylinder": {"sensors": {"0": 0, "2": 1}}},
+            {"name": "cell2",
+             "robot": {"host": "192.168.0.11"},
+             "feeder": {"ip": "192.168.1.101"},
+             "camera": {"serial": "40123456"},
+             "cylinder": {"card": null}}
+        ]
+    }
+
+파일이 없으면 기존 단일 셀 구성("main")으로 동작한다. 항목을 생략하면 기본값 사용.
+"""
+import copy
+import json
+import os
+
+DEFAULT_CELL_NAME = "main"
+
+DEFAULT_CELL = {
+    "name": DEFAULT_CELL_NAME,
+    "robot": {"host": "192.168.0.10", "port": 64512},
+    "feeder": {"ip": "192.168.1.100", "port": 502},
+    "camera": {"serial": None, "roi": [684, 421, 1256, 978]},
+    # card: null이면 실린더 보드 없음, sensors: 실린더 채널 → 리드 센서 입력 채널
+    "cylinder": {"card": 0, "sensors": {}, "input_rate_hz": 500}
+}
+
+def _merge(base, override):
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+def load_cells(path=None):
+    """셀 구성 리스트 (첫 번째 셀이 기존 /api/... 경로의 기본 셀)
+
+    Raises:
+        ValueError: 이름 중복, 실린더 카드 중복 사용, 잘못된 센서 매핑
+    """
+    if path is None:
+        path = os.environ.get("FLEXIBOT_CELLS") or os.path.join(os.path.dirname(__file__), "cells.json")
+    if not os.path.exists(path):
+        return [copy.deepcopy(DEFAULT_CELL)]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f).get("cells", [])
+    if not raw:
+        raise ValueError(f"셀 구성이 비어 있음: {path}")
+
+    cells = [_merge(DEFAULT_CELL, cell) for cell in raw]
+    names = [cell["name"] for cell in cells]
+    if len(set(names)) != len(names):
+        raise ValueError(f"셀 이름 중복: {names}")
+
+    # PCI-7230 래퍼 DLL은 프로세스당 카드 핸들 하나만 가진다
+    cards = [cell["name"] for cell in cells if cell["cylinder"].get("card") is not None]
+    if len(cards) > 1:
+        raise ValueError(f"실린더 카드는 한 셀만 사용할 수 있음 (설정된 셀: {cards})")
+
+    for cell in cells:
+        try:
+            {int(channel): int(sensor) for channel, sensor in cell["cylinder"].get("sensors", {}).items()}
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError(f"실린더 센서 매핑은 {{실린더 채널: 입력 채널}} 이어야 함 ({cell['name']})")
+
+    print(f"✓ 셀 구성 로드: {path} ({', '.join(names)})")
+    return cells
+
+def cell_dir(cell_name, folder):
+    """셀별 데이터 폴더 (기본 셀은 기존 경로 유지, 나머지는 하위 폴더)"""
+    base = os.path.join(os.path.dirname(__file__), folder)
+    if cell_name != DEFAULT_CELL_NAME:
+        base = os.path.join(base, cell_name)
+    return base
+
+def cell_path(cell_name, folder, filename):
+    return os.path.join(cell_dir(cell_name, folder), filename)
@@ -0,0 +1,53 @@
+import asyncio
+import inspect
+
+class CommandCoalescer:
+    """고빈도 UI 제어 명령 병합
+
+    같은 키(제어 항목)의 명령은 window초 동안 최신 값만 남기고 한 번만 적용한다.
+    슬라이더를 끌어도 키당 초당 최대 1/window회만 장치에 전달된다.
+    """
+
+    def __init__(self, window=0.05):
+        self.window = window
+        self.pending = {}    # key -> (apply, args)
+        self.tasks = {}      # key -> 적용 대기 Task
+        self.locks = {}      # key -> 적용 순서 보장
+        self.stats = {}
+
+    def submit(self, key: str, apply, *args):
+        """명령 제출 (이벤트 루프 안에서 호출)
+
+        Args:
+            key: 제어 항목 ("light", "roi")
+            apply: 적용 함수 (동기 함수 또는 코루틴 함수)
+        """
+        stats = self.stats.setdefault(key, {"submitted": 0, "applied": 0, "coalesced": 0, "errors": 0})
+        stats["submitted"] += 1
+        if key in self.pending:
+            stats["coalesced"] += 1
+
+        self.pending[key] = (apply, args)
+        if key not in self.tasks:
+            self.tasks[key] = asyncio.create_task(self._flush(key))
+
+    async def _flush(self, key: str):
+        await asyncio.sleep(self.window)
+
+        # 대기 중 들어온 마지막 명령만 적용 (적용 중 들어온 명령은 다음 주기로)
+        apply, args = self.pending.pop(key)
+        del self.tasks[key]
+
+        lock = self.locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            try:
+                result = apply(*args)
+                if inspect.isawaitable(result):
+                    await result
+                self.stats[key]["applied"] += 1
+            except Exception as e:
+                self.stats[key]["errors"] += 1
+                print(f"✗ 제어 명령 적용 실패 ({key}): {e}")
+
+    def get_stats(self):
+        return {key: dict(stats) for key, stats in self.stats.items()}
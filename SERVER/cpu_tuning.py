@@ -0,0 +1,237 @@
+"""CPU 스레드 수/코어 고정 설정
+
+torch, OpenCV, uvicorn, 캡처 스레드가 기본 스레드 풀로 같은 코어를 두고 경쟁하면
+API가 바쁠 때 추론 지연이 크게 흔들린다. 환경 변수로 스레드 수와 역할별 코어를 정한다.
+
+    FLEXIBOT_TORCH_THREADS=4        torch intra-op 스레드 수
+    FLEXIBOT_TORCH_INTEROP=1        torch inter-op 스레드 수 (torch 작업 전에만 설정 가능)
+    FLEXIBOT_CV2_THREADS=1          OpenCV 스레드 수 (0: OpenCV 기본, 1: 단일 스레드)
+    FLEXIBOT_CPU_GRAB=0             캡처(그랩) 스레드 코어
+    FLEXIBOT_CPU_INFERENCE=2-7      추론 스레드 코어 (torch 작업 스레드도 이 코어를 상속)
+    FLEXIBOT_CPU_API=1              API 이벤트 루프 코어
+
+벤치마크 (설정 조합을 돌려 가장 빠른 조합 추천):
+    python cpu_tuning.py --source frame.png [--model ../MODEL/final_lego_model.pt]
+"""
+import argparse
+import ctypes
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROLES = ("grab", "inference", "api")
+
+_settings = None
+_pinned = {}        # 역할 -> (스레드 이름, 적용된 코어 또는 오류)
+_lock = threading.Lock()
+
+def parse_cpus(text):
+    """"0,2-4" → [0, 2, 3, 4]"""
+    cpus = set()
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(v) for v in part.split("-"))
+            if end < start:
+                raise ValueError(f"잘못된 코어 범위: {part}")
+            cpus.update(range(start, end + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else None
+
+def load_settings():
+    """환경 변수 → 설정 dict (지정하지 않은 항목은 None = 라이브러리 기본값)"""
+    affinity = {}
+    for role in ROLES:
+        value = os.environ.get(f"FLEXIBOT_CPU_{role.upper()}")
+        if value:
+            affinity[role] = parse_cpus(value)
+    return {
+        "torch_threads": _env_int("FLEXIBOT_TORCH_THREADS"),
+        "torch_interop": _env_int("FLEXIBOT_TORCH_INTEROP"),
+        "cv2_threads": _env_int("FLEXIBOT_CV2_THREADS"),
+        "affinity": affinity
+    }
+
+def set_thread_counts(torch_threads=None, torch_interop=None, cv2_threads=None):
+    """torch/OpenCV 스레드 수 적용 (None은 그대로)"""
+    if torch_threads is not None or torch_interop is not None:
+        import torch
+        if torch_threads is not None:
+            torch.set_num_threads(torch_threads)
+        if torch_interop is not None:
+            try:
+                torch.set_num_interop_threads(torch_interop)
+            except RuntimeError as e:
+                # 이미 병렬 작업이 시작된 뒤에는 바꿀 수 없음
+                print(f"⚠️ torch inter-op 스레드 설정 실패: {e}")
+    if cv2_threads is not None:
+        import cv2
+        cv2.setNumThreads(cv2_threads)
+
+def configure():
+    """환경 변수 설정을 한 번 적용하고 결과 출력 (모델 로드 전에 호출)"""
+    global _settings
+    with _lock:
+        if _settings is not None:
+            return _settings
+        _settings = load_settings()
+    set_thread_counts(_settings["torch_threads"], _settings["torch_interop"], _settings["cv2_threads"])
+    print_report()
+    return _settings
+
+def _set_affinity(cpus):
+    """현재 스레드를 cpus 코어에 고정"""
+    if hasattr(os, "sched_setaffinity"):
+        # Linux: pid 0 = 호출한 스레드
+        os.sched_setaffinity(0, cpus)
+        return sorted(os.sched_getaffinity(0))
+    if sys.platform == "win32":
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentThread.restype = ctypes.c_void_p
+        kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+        kernel32.SetThreadAffinityMask.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+        mask = sum(1 << cpu for cpu in cpus)
+        if kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask) == 0:
+            raise ctypes.WinError()
+        return list(cpus)
+    raise OSError("이 플랫폼은 스레드 코어 고정을 지원하지 않음")
+
+def pin_thread(role):
+    """현재 스레드를 역할(grab/inference/api)에 지정된 코어에 고정 → 성공 여부
+
+    새로 만든 스레드는 만든 스레드의 코어 설정을 상속하므로 추론 스레드에서 첫 추론 전에
+    호출하면 torch 작업 스레드도 같은 코어에 묶인다.
+    """
+    settings = configure()
+    cpus = settings["affinity"].get(role)
+    if not cpus:
+        return False
+    name = threading.current_thread().name
+    try:
+        applied = _set_affinity(cpus)
+    except (OSError, ValueError) as e:
+        _pinned[role] = (name, f"실패: {e}")
+        print(f"⚠️ {role} 스레드 코어 고정 실패: {e}")
+        return False
+    _pinned[role] = (name, applied)
+    print(f"✓ {role} 스레드 코어 고정: {applied}")
+    return True
+
+def get_report():
+    """실제 적용된 스레드 수/코어 설정"""
+    report = {"cpu_count": os.cpu_count(), "configured": _settings}
+    try:
+        import torch
+        report["torch_threads"] = torch.get_num_threads()
+        report["torch_interop"] = torch.get_num_interop_threads()
+    except ImportError:
+        pass
+    try:
+        import cv2
+        report["cv2_threads"] = cv2.getNumThreads()
+    except ImportError:
+        pass
+    if hasattr(os, "sched_getaffinity"):
+        report["process_cpus"] = sorted(os.sched_getaffinity(0))
+    report["pinned"] = {role: {"thread": name, "cpus": cpus} for role, (name, cpus) in _pinned.items()}
+    return report
+
+def print_report():
+    report = get_report()
+    print(f"✓ CPU 설정: 코어 {report['cpu_count']}개, "
+          f"torch {report.get('torch_threads', '-')}/{report.get('torch_interop', '-')} 스레드, "
+          f"OpenCV {report.get('cv2_threads', '-')} 스레드")
+    affinity = _settings["affinity"] if _settings else {}
+    for role in ROLES:
+        if role in affinity:
+            print(f"  {role}: 코어 {affinity[role]}")
+
+# ===== 벤치마크 =====
+def _busy(stop, cpus):
+    """API 부하 흉내 (파이썬 연산 + JSON 직렬화로 GIL/코어 점유)"""
+    import json
+    if cpus:
+        _set_affinity(cpus)
+    payload = {"values": list(range(2000))}
+    while not stop.is_set():
+        json.loads(json.dumps(payload))
+
+def _measure(run, frame, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(frame)
+        times.append(time.perf_counter() - started)
+    times = np.array(times) * 1000
+    return float(np.median(times)), float(np.percentile(times, 95))
+
+def main():
+    parser = argparse.ArgumentParser(description="torch/OpenCV 스레드 수 벤치마크")
+    parser.add_argument("--source", required=True, help="ROI 이미지 파일")
+    parser.add_argument("--model", default="../MODEL/final_lego_model.pt")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--load", type=int, default=1, help="동시에 돌릴 API 부하 스레드 수")
+    parser.add_argument("--inference-cpus", default=None, help="추론 코어 (예: 2-7, 지정 시 부하는 나머지 코어)")
+    args = parser.parse_args()
+
+    import cv2
+    from ultralytics import YOLO
+    from detections import result_arrays
+
+    frame = cv2.imread(args.source)
+    if frame is None:
+        raise SystemExit(f"이미지를 읽을 수 없음: {args.source}")
+
+    cpu_count = os.cpu_count() or 1
+    inference_cpus = parse_cpus(args.inference_cpus) if args.inference_cpus else None
+    load_cpus = None
+    if inference_cpus:
+        _set_affinity(inference_cpus)
+        load_cpus = [cpu for cpu in range(cpu_count) if cpu not in inference_cpus] or None
+    usable = len(inference_cpus) if inference_cpus else cpu_count
+
+    model = YOLO(args.model)
+    run = lambda img: result_arrays(model(img, verbose=False)[0], img.shape)
+    run(frame)      # 워밍업
+
+    torch_options = sorted({1, 2, max(1, usable // 2), usable} - {0})
+    cv2_options = [0, 1]
+
+    stop = threading.Event()
+    load = [threading.Thread(target=_busy, args=(stop, load_cpus), daemon=True) for _ in range(args.load)]
+    for thread in load:
+        thread.start()
+
+    print(f"코어 {cpu_count}개 (추론 {usable}개), API 부하 스레드 {args.load}개, 반복 {args.repeat}회")
+    results = []
+    try:
+        for torch_threads in torch_options:
+            for cv2_threads in cv2_options:
+                set_thread_counts(torch_threads=torch_threads, cv2_threads=cv2_threads)
+                run(frame)
+                median, p95 = _measure(run, frame, args.repeat)
+                results.append((p95, median, torch_threads, cv2_threads))
+                print(f"  torch {torch_threads:2d} / cv2 {cv2_threads}: "
+                      f"median {median:7.1f} ms  p95 {p95:7.1f} ms")
+    finally:
+        stop.set()
+
+    # 지연 흔들림이 문제이므로 p95 기준으로 추천
+    p95, median, torch_threads, cv2_threads = min(results)
+    print(f"\n추천 (p95 {p95:.1f} ms, median {median:.1f} ms):")
+    print(f"  FLEXIBOT_TORCH_THREADS={torch_threads}")
+    print(f"  FLEXIBOT_CV2_THREADS={cv2_threads}")
+    if args.inference_cpus:
+        print(f"  FLEXIBOT_CPU_INFERENCE={args.inference_cpus}")
+
+if __name__ == "__main__":
+    main()
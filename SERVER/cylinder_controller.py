@@ -1,147 +1,212 @@
+import asyncio
 import os
 import sys
+import threading
 import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib'))
 
 from pci7230_controller import PCI7230Controller
+from cylinder_timeline import CylinderTimeline
+from input_monitor import InputMonitor
+
+NUM_CHANNELS = 16
+PORT_MASK = (1 << NUM_CHANNELS) - 1
+
+def channel_mask(*channels):
+    """채널 번호 → 출력 워드 비트 마스크 (예: channel_mask(0, 2) == 0b101)"""
+    mask = 0
+    for channel in channels:
+        if not 0 <= channel < NUM_CHANNELS:
+            raise ValueError(f"잘못된 채널 번호: {channel} (0-{NUM_CHANNELS - 1})")
+        mask |= 1 << channel
+    return mask
 
 class CylinderController:
-    """실린더 제어 클래스 - 4개의 실린더를 개별 제어"""
+    """실린더 제어 클래스 - 16개 출력 채널을 마스크 단위로 제어
+
+    출력 워드의 현재 값을 파이썬 쪽에 보관(shadow)하고, 여러 채널을
+    write_port 한 번으로 동시에 바꾼다. 값이 그대로면 DLL 호출을 생략한다.
+    """
     
-    def __init__(self):
-        """초기화 - 상대 경로 자동 계산"""
+    def __init__(self, verbose=False, sensors=None, input_rate_hz=500):
+        """초기화 - 상대 경로 자동 계산
+
+        Args:
+            sensors: 실린더 채널 → 행정 완료 리드 센서 입력 채널 (예: {0: 0, 2: 1},
+                     cells.json에서 오면 키가 문자열이라 정수로 변환)
+            input_rate_hz: 입력 포트 폴링 주기 (센서가 없으면 대기자/구독자가 있을 때만 폴링)
+        """
         # lib 폴더의 DLL 경로
         lib_path = os.path.join(os.path.dirname(__file__), 'lib')
         dll_path = os.path.join(lib_path, 'pci7230_wrapper.dll')
         
-        self.controller = PCI7230Controller(dll_path)
+        self.controller = PCI7230Controller(dll_path, verbose=verbose)
         self.connected = False
+        
+        self.lock = threading.Lock()
+        self.output = 0             # 출력 워드 shadow (PCI7230_Init 시 0으로 초기화됨)
+        self.stats = {"writes": 0, "skipped": 0, "verify_failed": 0, "unverified": 0}
+        self.timeline = CylinderTimeline(self)
+        self.inputs = InputMonitor(self.controller, rate_hz=input_rate_hz)
+        self.sensors = {int(channel): int(sensor) for channel, sensor in (sensors or {}).items()}
     
     def connect(self, card_number=0):
         """PCI-7230 카드 연결"""
         self.connected = self.controller.connect(card_number)
+        if self.connected:
+            with self.lock:
+                self.output = 0
+            if not self.can_verify:
+                print("⚠️ 출력 검증 미지원 DLL - verify 요청은 실패로 처리됨")
+            self.timeline.start()
+            # 센서가 매핑된 경우만 상시 폴링 (stroke가 바로 현재 상태를 보도록)
+            self.inputs.start(keep_running=bool(self.sensors))
         return self.connected
     
     def disconnect(self):
         """연결 해제"""
+        self.timeline.stop()
+        self.inputs.stop()
         if self.connected:
             self.controller.disconnect()
             self.connected = False
     
-    # 개별 ON/OFF 함수
-    def cylinder_0_on(self):
-        """실린더 0번 ON"""
-        if not self.connected:
-            print("✗ 카드 미연결")
-            return False
-        return self.controller.set_channel(0, True)
-    
-    def cylinder_0_off(self):
-        """실린더 0번 OFF"""
-        if not self.connected:
-            print("✗ 카드 미연결")
-            return False
-        return self.controller.set_channel(0, False)
-    
-    def cylinder_1_on(self):
-        """실린더 1번 ON"""
-        if not self.connected:
-            print("✗ 카드 미연결")
-            return False
-        return self.controller.set_channel(1, True)
-    
-    def cylinder_1_off(self):
-        """실린더 1번 OFF"""
-        if not self.connected:
-            print("✗ 카드 미연결")
-            return False
-        return self.controller.set_channel(1, False)
-    
-    def cylinder_2_on(self):
-        """실린더 2번 ON"""
-        if not self.connected:
-            print("✗ 카드 미연결")
-            return False
-        return self.controller.set_channel(2, True)
-    
-    def cylinder_2_off(self):
-        """실린더 2번 OFF"""
-        if not self.connected:
-            print("✗ 카드 미연결")
-            return False
-        return self.controller.set_channel(2, False)
-    
-    def cylinder_3_on(self):
-        """실린더 3번 ON"""
-        if not self.connected:
-            print("✗ 카드 미연결")
-            return False
-        return self.controller.set_channel(3, True)
-    
-    def cylinder_3_off(self):
-        """실린더 3번 OFF"""
+    # ===== 마스크 단위 제어 =====
+    def write_outputs(self, mask, values, verify=False):
+        """mask 비트에 해당하는 채널만 values 비트 값으로 한 번에 변경
+
+        Args:
+            mask: 변경할 채널 비트 마스크
+            values: 변경 값 (mask 밖의 비트는 무시)
+            verify: 쓰기 후 출력 포트를 다시 읽어 확인. 다시 읽을 수 없으면
+                    (DLL에 PCI7230_ReadOutputPort 없음) 확인 못 한 것으로 보고 False
+        """
         if not self.connected:
             print("✗ 카드 미연결")
             return False
-        return self.controller.set_channel(3, False)
-    
-    # 통합 펄스 함수
-    def cylinder_0_pulse(self, on_time=1.0, off_time=1.0):
-        """
-        실린더 0번 ON → 대기 → OFF
         
-        Args:
-            on_time: ON 상태 유지 시간 (초)
-            off_time: OFF 후 대기 시간 (초)
-        """
-        print(f"실린더 0번 펄스 (ON: {on_time}초, OFF 대기: {off_time}초)")
-        self.cylinder_0_on()
-        time.sleep(on_time)
-        self.cylinder_0_off()
-        time.sleep(off_time)
-    
-    def cylinder_1_pulse(self, on_time=1.0, off_time=1.0):
+        mask &= PORT_MASK
+        with self.lock:
+            word = (self.output & ~mask) | (values & mask)
+            if word == self.output and not verify:
+                self.stats["skipped"] += 1
+                return True
+            
+            if word != self.output:
+                if not self.controller.write_port(word):
+                    print(f"✗ 출력 쓰기 실패: 0x{word:04X}")
+                    return False
+                self.output = word
+                self.stats["writes"] += 1
+            
+            if verify:
+                actual = self.controller.read_output_port()
+                if actual is None:
+                    self.stats["unverified"] += 1
+                    print("⚠️ 출력 검증 불가: 출력 포트를 읽을 수 없음 (PCI7230_ReadOutputPort 지원 DLL 필요)")
+                    return False
+                if (actual & PORT_MASK) != word:
+                    self.stats["verify_failed"] += 1
+                    print(f"⚠️ 출력 검증 실패: 기대 0x{word:04X}, 실제 0x{actual & PORT_MASK:04X}")
+                    self.output = actual & PORT_MASK
+                    return False
+        return True
+    
+    def set_channels(self, mask, on, verify=False):
+        """mask 채널 전체 ON 또는 OFF"""
+        return self.write_outputs(mask, PORT_MASK if on else 0, verify)
+    
+    def all_off(self, verify=False):
+        """모든 채널 OFF"""
+        return self.set_channels(PORT_MASK, False, verify)
+    
+    @property
+    def can_verify(self):
+        """출력 포트 다시 읽기 지원 여부 (SERVER/lib DLL에 PCI7230_ReadOutputPort가 있을 때)"""
+        return self.controller.can_read_output
+    
+    def get_outputs(self):
+        """현재 출력 워드 (shadow)"""
+        return self.output
+    
+    def is_on(self, channel):
+        return bool(self.output & channel_mask(channel))
+    
+    # ===== 개별 채널 제어 =====
+    def on(self, channel, verify=False):
+        """실린더 ON"""
+        return self.set_channels(channel_mask(channel), True, verify)
+    
+    def off(self, channel, verify=False):
+        """실린더 OFF"""
+        return self.set_channels(channel_mask(channel), False, verify)
+    
+    async def stroke(self, channel, on, timeout=2.0, fallback=1.0):
+        """실린더 ON/OFF 후 행정 완료까지 대기
+
+        센서가 매핑된 채널은 리드 센서가 on 상태가 되는 즉시 반환하고,
+        센서가 없으면 기존처럼 fallback초 대기한다.
+
+        Returns:
+            dict: confirmed (센서 확인 여부, 센서 없으면 None), seconds
         """
-        실린더 1번 ON → 대기 → OFF
+        started = time.perf_counter()
+        if not self.set_channels(channel_mask(channel), on):
+            return {"confirmed": False, "seconds": 0.0}
         
-        Args:
-            on_time: ON 상태 유지 시간 (초)
-            off_time: OFF 후 대기 시간 (초)
-        """
-        print(f"실린더 1번 펄스 (ON: {on_time}초, OFF 대기: {off_time}초)")
-        self.cylinder_1_on()
-        time.sleep(on_time)
-        self.cylinder_1_off()
-        time.sleep(off_time)
-    
-    def cylinder_2_pulse(self, on_time=1.0, off_time=1.0):
+        sensor = self.sensors.get(channel)
+        if sensor is None:
+            await asyncio.sleep(fallback)
+            confirmed = None
+        else:
+            confirmed = await self.inputs.wait_for_async(sensor, on, timeout)
+            if not confirmed:
+                print(f"⚠️ 실린더 {channel}번 센서 미확인 ({timeout}초 초과)")
+        return {"confirmed": confirmed, "seconds": round(time.perf_counter() - started, 3)}
+    
+    def pulse(self, channel, on_time=1.0, off_time=1.0):
         """
-        실린더 2번 ON → 대기 → OFF
+        실린더 ON → 대기 → OFF (완료까지 대기)
         
         Args:
+            channel: 채널 번호 (또는 여러 채널 튜플 - 동시 동작)
             on_time: ON 상태 유지 시간 (초)
             off_time: OFF 후 대기 시간 (초)
         """
-        print(f"실린더 2번 펄스 (ON: {on_time}초, OFF 대기: {off_time}초)")
-        self.cylinder_2_on()
-        time.sleep(on_time)
-        self.cylinder_2_off()
-        time.sleep(off_time)
+        return self.pulse_async(channel, on_time, off_time).result()
     
-    def cylinder_3_pulse(self, on_time=1.0, off_time=1.0):
+    def pulse_async(self, channel, on_time=1.0, off_time=1.0, delay=0.0):
+        """펄스 예약 후 즉시 반환 → concurrent.futures.Future
+
+        타임라인 스레드가 엣지를 실행하므로 다른 실린더 펄스와 겹쳐 동작할 수 있다.
+        asyncio에서는 asyncio.wrap_future()로 기다린다.
         """
-        실린더 3번 ON → 대기 → OFF
-        
+        channels = channel if isinstance(channel, (tuple, list)) else (channel,)
+        mask = channel_mask(*channels)
+        print(f"실린더 {', '.join(map(str, channels))}번 펄스 (ON: {on_time}초, OFF 대기: {off_time}초)")
+        return self.timeline.pulse(mask, on_time, off_time, delay)
+    
+    def run_timeline(self, steps, delay=0.0):
+        """캠 테이블 형식 타임라인 예약 → Future
+
         Args:
-            on_time: ON 상태 유지 시간 (초)
-            off_time: OFF 후 대기 시간 (초)
+            steps: [(t, channels, on), ...] - 시작 기준 시각(초), 채널 번호 또는 리스트, ON/OFF
+                   예) [(0.0, 0, True), (0.0, 2, True), (0.5, 0, False), (1.0, 2, False)]
         """
-        print(f"실린더 3번 펄스 (ON: {on_time}초, OFF 대기: {off_time}초)")
-        self.cylinder_3_on()
-        time.sleep(on_time)
-        self.cylinder_3_off()
-        time.sleep(off_time)
+        edges = []
+        for t, channels, on in steps:
+            channels = channels if isinstance(channels, (tuple, list)) else (channels,)
+            edges.append((float(t), channel_mask(*channels), bool(on)))
+        return self.timeline.schedule(edges, delay)
+    
+    def get_stats(self):
+        return {
+            "output": f"0x{self.output:04X}",
+            **self.stats,
+            "timeline": self.timeline.get_stats(),
+            "inputs": self.inputs.get_stats()
+        }
     
     def __enter__(self):
         """with 구문 지원"""
@@ -149,4 +214,4 @@ class CylinderController:
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """with 구문 종료 시 자동 해제"""
-        self.disconnect()
\ No newline at end of file
+        self.disconnect()
@@ -0,0 +1,185 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+class CylinderTimeline:
+    """실린더 ON/OFF 엣지 타임라인 스케줄러
+
+    전용 스레드가 예약된 엣지를 시각 순으로 실행한다. 마감 직전까지는
+    Condition 대기로 쉬고, 마지막 spin_time초는 perf_counter로 바쁜 대기해
+    시작 지터를 줄인다. 같은 시각(merge_window 이내)의 엣지는 write_outputs
+    한 번으로 합쳐 동시에 출력한다.
+
+    schedule()/pulse()는 즉시 Future를 반환한다 (호출 스레드를 막지 않음).
+    스레드가 돌고 있지 않으면(카드 미연결) Future는 ok=False로 바로 완료된다.
+    """
+
+    def __init__(self, cylinder, spin_time=0.002, merge_window=0.0005, history=1000):
+        self.cylinder = cylinder
+        self.spin_time = spin_time
+        self.merge_window = merge_window
+        self.history = history
+
+        self.cond = threading.Condition()
+        self.queue = []                 # (deadline, seq, mask, values, job)
+        self.seq = itertools.count()
+        self.running = False
+        self.thread = None
+
+        self.jitter = []                # 최근 엣지의 실제-계획 시각 차 (초)
+        self.edges = 0
+        self.failed = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="cylinder-timeline", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """스레드 종료 (대기 중인 작업은 취소)"""
+        with self.cond:
+            self.running = False
+            pending = self.queue
+            self.queue = []
+            self.cond.notify()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        for *_, job in pending:
+            if not job["future"].done():
+                job["future"].cancel()
+
+    # ===== 예약 =====
+    def schedule(self, edges, delay=0.0, duration=None) -> Future:
+        """엣지 타임라인 예약
+
+        Args:
+            edges: [(t, mask, on), ...] - 시작 기준 시각(초), 채널 마스크, ON/OFF
+            delay: 시작 지연 (초)
+            duration: 작업 완료 시각 (기본: 마지막 엣지 시각)
+
+        Returns:
+            Future: 완료 시 {"edges", "max_jitter_ms", "ok"}
+        """
+        future = Future()
+        edges = sorted(edges, key=lambda edge: edge[0])
+        if not edges:
+            future.set_result({"edges": 0, "max_jitter_ms": 0.0, "ok": True})
+            return future
+
+        start = time.perf_counter() + delay
+        end = start + (duration if duration is not None else edges[-1][0])
+        job = {"future": future, "edges": len(edges), "remaining": len(edges), "end": end,
+               "max_jitter": 0.0, "ok": True}
+
+        with self.cond:
+            if not self.running:
+                # 카드 미연결 (스레드 미시작) - 실행할 스레드가 없으므로 바로 실패로 완료
+                print("✗ 카드 미연결")
+                future.set_result({"edges": 0, "max_jitter_ms": 0.0, "ok": False})
+                return future
+            for t, mask, on in edges:
+                heapq.heappush(self.queue, (start + t, next(self.seq), mask, mask if on else 0, job))
+            self.cond.notify()
+        return future
+
+    def pulse(self, mask, on_time=1.0, off_time=1.0, delay=0.0) -> Future:
+        """마스크 채널 ON → on_time 후 OFF → off_time 후 완료"""
+        return self.schedule(
+            [(0.0, mask, True), (on_time, mask, False)],
+            delay=delay, duration=on_time + off_time
+        )
+
+    # ===== 실행 스레드 =====
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.running and not self.queue:
+                    self.cond.wait()
+                if not self.running:
+                    return
+
+                deadline = self.queue[0][0]
+                remaining = deadline - time.perf_counter()
+                if remaining > self.spin_time:
+                    # 더 이른 엣지가 예약되면 notify로 깨어나 다시 계산
+                    self.cond.wait(remaining - self.spin_time)
+                    continue
+
+            # 마감까지 바쁜 대기
+            while time.perf_counter() < deadline:
+                pass
+
+            with self.cond:
+                now = time.perf_counter()
+                batch = []
+                while self.queue and self.queue[0][0] <= now + self.merge_window:
+                    batch.append(heapq.heappop(self.queue))
+
+            if batch:
+                self._fire(batch)
+
+    def _fire(self, batch):
+        # 같은 시각 엣지는 예약 순서대로 합쳐 한 번에 출력
+        mask, values = 0, 0
+        for _, _, edge_mask, edge_values, _ in batch:
+            values = (values & ~edge_mask) | edge_values
+            mask |= edge_mask
+
+        ok = self.cylinder.write_outputs(mask, values)
+        actual = time.perf_counter()
+
+        for deadline, _, _, _, job in batch:
+            jitter = actual - deadline
+            self.edges += 1
+            self.jitter.append(jitter)
+            job["max_jitter"] = max(job["max_jitter"], jitter)
+            if not ok:
+                self.failed += 1
+                job["ok"] = False
+            job["remaining"] -= 1
+            if job["remaining"] == 0:
+                self._finish(job)
+
+        if len(self.jitter) > self.history:
+            del self.jitter[:-self.history]
+
+    def _finish(self, job):
+        result = {
+            "edges": job["edges"],
+            "max_jitter_ms": round(job["max_jitter"] * 1000, 3),
+            "ok": job["ok"]
+        }
+        wait = job["end"] - time.perf_counter()
+        if wait > 0:
+            # off_time 대기는 스레드를 막지 않도록 타이머로 완료 처리
+            timer = threading.Timer(wait, self._resolve, (job["future"], result))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._resolve(job["future"], result)
+
+    @staticmethod
+    def _resolve(future, result):
+        if not future.done():
+            future.set_result(result)
+
+    def get_stats(self):
+        jitter = sorted(self.jitter)
+        if not jitter:
+            return {"edges": self.edges, "failed": self.failed}
+        return {
+            "edges": self.edges,
+            "failed": self.failed,
+            "pending": len(self.queue),
+            "jitter_ms": {
+                "mean": round(sum(jitter) / len(jitter) * 1000, 3),
+                "p50": round(jitter[len(jitter) // 2] * 1000, 3),
+                "p99": round(jitter[min(len(jitter) - 1, int(len(jitter) * 0.99))] * 1000, 3),
+                "max": round(jitter[-1] * 1000, 3)
+            }
+        }
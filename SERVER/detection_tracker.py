@@ -0,0 +1,176 @@
+import itertools
+import threading
+import time
+
+import numpy as np
+
+def iou_matrix(a, b):
+    """(N,4) x (M,4) xyxy 박스 IoU 행렬 (N,M)"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0).astype(np.float32)
+
+def greedy_match(iou, threshold):
+    """IoU 큰 쌍부터 1:1 매칭 → (track_idx, det_idx) 배열"""
+    if iou.size == 0:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    used_rows, used_cols = set(), set()
+    matched_rows, matched_cols = [], []
+    for r, c in zip(rows[order], cols[order]):
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        matched_rows.append(r)
+        matched_cols.append(c)
+    return np.array(matched_rows, np.int64), np.array(matched_cols, np.int64)
+
+class DetectionTracker:
+    """프레임 간 검출 결과 추적 (IoU 매칭)
+
+    트랙마다 EMA로 평활한 박스/픽업 점/각도와 신뢰도 가중 클래스 투표를 유지한다.
+    각도는 180도 주기라 (cos 2θ, sin 2θ) 공간에서 평활한다.
+    hits 이상 연속 관측된 트랙만 confirmed로 보고해 한 프레임짜리 오검출과
+    0.8 기준 근처의 클래스 깜빡임을 걸러낸다.
+
+    픽업 대상(front)은 히스테리시스로 고른다: 평활 신뢰도가 conf_threshold 이상이면
+    들어오고, conf_threshold - release_margin 미만으로 떨어져야 빠진다.
+    """
+
+    def __init__(self, iou_threshold=0.3, confirm_hits=3, max_missed=5, alpha=0.4,
+                 vote_decay=0.8, release_margin=0.1):
+        self.iou_threshold = iou_threshold
+        self.confirm_hits = confirm_hits
+        self.max_missed = max_missed
+        self.alpha = alpha              # 새 관측 반영 비율 (작을수록 부드러움)
+        self.vote_decay = vote_decay
+        self.release_margin = release_margin
+
+        self.lock = threading.Lock()
+        self.ids_counter = itertools.count(1)
+        self.reset()
+
+    def reset(self):
+        """트랙 전체 삭제 (모드/ROI 변경 시)"""
+        self.ids = np.zeros(0, np.int64)
+        self.boxes = np.zeros((0, 4), np.float32)
+        self.points = np.zeros((0, 2), np.float32)  # 마스크 모멘트 픽업 점
+        self.axes = np.zeros((0, 2), np.float32)    # (cos 2θ, sin 2θ)
+        self.votes = np.zeros((0, 2), np.float32)   # 클래스 0(back), 1(front)
+        self.conf = np.zeros(0, np.float32)
+        self.hits = np.zeros(0, np.int32)
+        self.missed = np.zeros(0, np.int32)
+        self.front = np.zeros(0, bool)               # 픽업 대상 (히스테리시스 상태)
+        self.ts = 0.0
+
+    def update(self, snapshot, conf_threshold=0.8):
+        """검출 스냅샷 한 장 반영 → 트랙 스냅샷
+
+        Args:
+            conf_threshold: 픽업 대상 진입 기준 (이탈은 release_margin만큼 낮은 기준)
+        """
+        with self.lock:
+            det_boxes = snapshot["xyxy"]
+            det_cls = np.clip(snapshot["cls"], 0, 1)
+            det_conf = snapshot["conf"]
+            det_points = snapshot["centers"]
+            theta = np.radians(snapshot["angles"]) * 2
+            det_axes = np.stack([np.cos(theta), np.sin(theta)], axis=1).astype(np.float32)
+
+            t_idx, d_idx = greedy_match(iou_matrix(self.boxes, det_boxes), self.iou_threshold)
+
+            # 1. 매칭된 트랙: 박스 EMA, 투표 누적
+            self.votes *= self.vote_decay
+            if len(t_idx):
+                self.boxes[t_idx] += self.alpha * (det_boxes[d_idx] - self.boxes[t_idx])
+                self.points[t_idx] += self.alpha * (det_points[d_idx] - self.points[t_idx])
+                self.axes[t_idx] += self.alpha * (det_axes[d_idx] - self.axes[t_idx])
+                np.add.at(self.votes, (t_idx, det_cls[d_idx]), det_conf[d_idx])
+                self.conf[t_idx] += self.alpha * (det_conf[d_idx] - self.conf[t_idx])
+                self.hits[t_idx] += 1
+
+            # 2. 매칭 안 된 트랙: missed 증가, 오래되면 삭제
+            unmatched = np.ones(len(self.ids), bool)
+            unmatched[t_idx] = False
+            self.missed[unmatched] += 1
+            self.missed[t_idx] = 0
+            keep = self.missed <= self.max_missed
+            self.ids, self.boxes, self.votes = self.ids[keep], self.boxes[keep], self.votes[keep]
+            self.points, self.axes = self.points[keep], self.axes[keep]
+            self.conf, self.hits, self.missed = self.conf[keep], self.hits[keep], self.missed[keep]
+            self.front = self.front[keep]
+
+            # 3. 매칭 안 된 검출: 새 트랙
+            new = np.ones(len(det_boxes), bool)
+            new[d_idx] = False
+            n_new = int(new.sum())
+            if n_new:
+                votes = np.zeros((n_new, 2), np.float32)
+                votes[np.arange(n_new), det_cls[new]] = det_conf[new]
+                self.ids = np.concatenate([self.ids, [next(self.ids_counter) for _ in range(n_new)]])
+                self.boxes = np.concatenate([self.boxes, det_boxes[new].astype(np.float32)])
+                self.points = np.concatenate([self.points, det_points[new].astype(np.float32)])
+                self.axes = np.concatenate([self.axes, det_axes[new]])
+                self.votes = np.concatenate([self.votes, votes])
+                self.conf = np.concatenate([self.conf, det_conf[new]])
+                self.hits = np.concatenate([self.hits, np.ones(n_new, np.int32)])
+                self.missed = np.concatenate([self.missed, np.zeros(n_new, np.int32)])
+                self.front = np.concatenate([self.front, np.zeros(n_new, bool)])
+
+            # 4. 픽업 대상 히스테리시스 (기준 근처에서 목록에 들락날락하지 않도록)
+            is_front = self.votes.argmax(axis=1) == 1
+            enter = self.conf >= conf_threshold
+            stay = self.front & (self.conf >= conf_threshold - self.release_margin)
+            self.front = is_front & (enter | stay)
+
+            self.ts = snapshot.get("ts", time.time())
+            return self._snapshot()
+
+    def _snapshot(self):
+        return {
+            "ids": self.ids.copy(),
+            "xyxy": self.boxes.copy(),
+            "centers": self.points.copy(),
+            "angles": np.degrees(np.arctan2(self.axes[:, 1], self.axes[:, 0]) / 2).astype(np.float32),
+            "cls": self.votes.argmax(axis=1).astype(np.int32),
+            "conf": self.conf.copy(),
+            # 이번 프레임에 보였고 confirm_hits 이상 관측된 트랙
+            "confirmed": (self.hits >= self.confirm_hits) & (self.missed == 0),
+            "front": self.front.copy(),
+            "ts": self.ts
+        }
+
+    def get_tracks(self):
+        with self.lock:
+            return self._snapshot()
+
+def _confirmed_front(tracks):
+    # 신뢰도 기준은 update()의 히스테리시스로 이미 반영됨 (front)
+    return tracks["confirmed"] & tracks["front"]
+
+def confirmed_front_centroids(tracks):
+    """확정된 front 트랙 픽업 점 [(x, y), ...] (float, ROI 좌표)"""
+    if tracks is None:
+        return []
+    select = _confirmed_front(tracks)
+    return [(float(x), float(y)) for x, y in tracks["centers"][select]]
+
+def confirmed_front_targets(tracks):
+    """확정된 front 트랙 픽업 대상 [(x, y, angle), ...]"""
+    if tracks is None:
+        return []
+    select = _confirmed_front(tracks)
+    return [
+        (float(x), float(y), float(angle))
+        for (x, y), angle in zip(tracks["centers"][select], tracks["angles"][select])
+    ]
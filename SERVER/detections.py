@@ -0,0 +1,115 @@
+import time
+
+import numpy as np
+
+from mask_geometry import pick_points
+
+# 공유 메모리/녹화 파일에 저장하는 검출 행 형식 (float32 x ROW_WIDTH)
+#   lego : x1, y1, x2, y2, conf, cls, cx, cy, angle  (cx, cy, angle: 마스크 모멘트 픽업 점)
+#   block: cx, cy, w, h, angle, pickable, 0, 0, 0
+ROW_WIDTH = 9
+
+def result_arrays(result, image_shape):
+    """YOLO 결과 한 장 → (xyxy, cls, conf, centers, angles) NumPy 배열 (이미지 좌표)"""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        xyxy = np.zeros((0, 4), np.float32)
+        cls = np.zeros(0, np.int32)
+        conf = np.zeros(0, np.float32)
+        masks = None
+    else:
+        xyxy = boxes.xyxy.cpu().numpy().astype(np.float32)
+        cls = boxes.cls.cpu().numpy().astype(np.int32)
+        conf = boxes.conf.cpu().numpy().astype(np.float32)
+        masks = result.masks.data if result.masks is not None else None
+
+    # 세그멘테이션 마스크 모멘트로 픽업 점/각도 (전체 검출 일괄 계산)
+    centers, angles = pick_points(masks, image_shape[:2], xyxy)
+    return xyxy, cls, conf, centers, angles
+
+def make_snapshot(xyxy, cls, conf, centers, angles, shape, ts=None):
+    return {
+        "xyxy": xyxy,
+        "cls": cls,
+        "conf": conf,
+        "centers": centers,
+        "angles": angles,
+        "shape": tuple(shape[:2]),
+        "ts": time.time() if ts is None else ts
+    }
+
+def _front(snapshot, conf_threshold):
+    return (snapshot["cls"] == 1) & (snapshot["conf"] >= conf_threshold)
+
+def front_centroids(snapshot, conf_threshold):
+    """검출 스냅샷 → front 클래스(1) 픽업 점 [(x, y), ...] (ROI 좌표, float)"""
+    if snapshot is None:
+        return []
+    select = _front(snapshot, conf_threshold)
+    return [(float(cx), float(cy)) for cx, cy in snapshot["centers"][select]]
+
+def front_targets(snapshot, conf_threshold):
+    """검출 스냅샷 → front 클래스(1) 픽업 대상 [(x, y, angle), ...]"""
+    if snapshot is None:
+        return []
+    select = _front(snapshot, conf_threshold)
+    return [
+        (float(cx), float(cy), float(angle))
+        for (cx, cy), angle in zip(snapshot["centers"][select], snapshot["angles"][select])
+    ]
+
+def block_targets(blocks, pickable_only=True):
+    """블럭 검출 결과 → [(x, y, angle), ...] (ROI 좌표)"""
+    if blocks is None:
+        return []
+
+    select = blocks["pickable"] if pickable_only else slice(None)
+    return [
+        (float(cx), float(cy), float(angle))
+        for (cx, cy), angle in zip(blocks["centers"][select], blocks["angles"][select])
+    ]
+
+def snapshot_to_rows(snapshot):
+    return np.column_stack([
+        snapshot["xyxy"], snapshot["conf"], snapshot["cls"].astype(np.float32),
+        snapshot["centers"], snapshot["angles"]
+    ]).astype(np.float32, copy=False)
+
+def rows_to_snapshot(rows, shape, ts):
+    return make_snapshot(
+        rows[:, 0:4].copy(), rows[:, 5].astype(np.int32), rows[:, 4].copy(),
+        rows[:, 6:8].copy(), rows[:, 8].copy(), shape, ts
+    )
+
+def blocks_to_rows(blocks):
+    n = len(blocks["angles"])
+    return np.column_stack([
+        blocks["centers"], blocks["sizes"], blocks["angles"],
+        blocks["pickable"].astype(np.float32), np.zeros((n, ROW_WIDTH - 6), np.float32)
+    ]).astype(np.float32, copy=False)
+
+def rows_to_blocks(rows):
+    return {
+        "centers": rows[:, 0:2].copy(),
+        "sizes": rows[:, 2:4].copy(),
+        "angles": rows[:, 4].copy(),
+        "pickable": rows[:, 5] > 0.5
+    }
+
+def detection_message(mode, snapshot, blocks, conf_threshold, seq, shape):
+    """클라이언트 오버레이용 검출 메시지 (박스를 평탄한 숫자 리스트로)
+
+    lego : boxes = [x1, y1, x2, y2, cls, ...]  (신뢰도 기준 이상만)
+    block: blocks = [cx, cy, w, h, angle, pickable, ...]
+    """
+    message = {"seq": seq, "mode": mode, "w": int(shape[1]), "h": int(shape[0])}
+    if mode == "lego":
+        select = snapshot["conf"] >= conf_threshold
+        rows = np.column_stack([np.round(snapshot["xyxy"][select]), snapshot["cls"][select]])
+        message["boxes"] = rows.astype(np.int32).ravel().tolist()
+    else:
+        rows = np.column_stack([
+            blocks["centers"], blocks["sizes"], blocks["angles"], blocks["pickable"].astype(np.float32)
+        ])
+        message["blocks"] = np.round(rows.astype(np.float64), 1).ravel().tolist()
+    return message
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import threading
+import time
+
+class EventBroadcaster:
+    """실시간 이벤트 푸시 (Server-Sent Events)
+
+    이벤트는 발행 시 한 번만 직렬화되고, 같은 바이트 메시지를 모든 구독자 큐에
+    넣는다. 구독자가 늘어나도 직렬화/상태 수집 비용은 늘지 않는다.
+    """
+
+    def __init__(self, queue_size=100, keepalive=15.0):
+        self.loop = None
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.subscribers = set()
+
+        # 이벤트 종류별 최신 메시지 (신규 구독자 초기 상태 전달용)
+        self.latest = {}
+        self.lock = threading.Lock()
+        self.seq = 0
+
+    def bind(self, loop):
+        """팬아웃을 수행할 이벤트 루프 지정"""
+        self.loop = loop
+
+    def publish(self, event: str, data: dict):
+        """이벤트 발행 (모든 스레드에서 호출 가능)"""
+        with self.lock:
+            self.seq += 1
+            body = json.dumps({"ts": round(time.time(), 3), **data}, ensure_ascii=False)
+            message = f"id: {self.seq}\nevent: {event}\ndata: {body}\n\n".encode('utf-8')
+            self.latest[event] = message
+
+        if self.loop is None or self.loop.is_closed():
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self.loop:
+            self._fanout(message)
+        else:
+            # 다른 스레드(레고 프로세스, 캡처 루프)에서 호출된 경우
+            self.loop.call_soon_threadsafe(self._fanout, message)
+
+    def _fanout(self, message: bytes):
+        """모든 구독자 큐에 동일 메시지 전달 (느린 구독자는 오래된 메시지부터 버림)"""
+        for queue in list(self.subscribers):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def stream(self):
+        """구독자 1명에 대한 SSE 스트림"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self.lock:
+            for message in self.latest.values():
+                queue.put_nowait(message)
+        self.subscribers.add(queue)
+
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=self.keepalive)
+                    yield message
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            self.subscribers.discard(queue)
+
+    @property
+    def subscriber_count(self):
+        return len(self.subscribers)
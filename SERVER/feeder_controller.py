@@ -1,43 +1,458 @@
 # SERVER/feeder_controller.py
-from pymodbus.client import ModbusTcpClient
+from pymodbus.client import AsyncModbusTcpClient
+import asyncio
+import os
+import threading
+import time
+
+# ===== 레지스터 주소 (README/feeder.md) =====
+SWITCH = 0              # P0.00: 0=정지, 1=시작
+ACTION_NUMBER = 1       # P0.01: 동작 번호
+CONTROL_MODE = 3        # P0.03: 0=단계모드, 1=포뮬라모드
+STATUS = 4              # P0.04: 현재 작동 상태 (읽기 전용)
+X_INPUT = 5             # P0.05: X0-X3 입력 상태
+Y_OUTPUT = 7            # P0.07: Y0-Y3 출력 상태
+LIGHT1_SWITCH = 10      # P0.10: 0=끄기, 1=켜기
+LIGHT1_BRIGHTNESS = 11  # P0.11: 0-1000 (0-100%)
+SIGNAL_TYPE = 21        # P0.21: 0=스위치, 1=트리거
+STEP_DURATION = 22      # P0.22: 단계 동작 지속시간 (0.1초 단위)
+
+# 장치가 스스로 바꿀 수 있는 레지스터 - 섀도 값과 같아도 항상 쓴다
+VOLATILE = {SWITCH, STATUS, X_INPUT, Y_OUTPUT}
+
+# 표준 동작 번호 → ACTION_NUMBER 값 (표준동작(1), 그룹1)
+def action_code(action: int) -> int:
+    return 10100 + action
 
 class FeederController:
-    """피더 제어 클래스"""
-    
-    def __init__(self, ip='192.168.1.100', port=502):
+    """피더 제어 클래스 (asyncio Modbus TCP)
+
+    Modbus 통신은 컨트롤러 전용 이벤트 루프 스레드에서 실행된다. 어느 스레드,
+    어느 이벤트 루프에서 호출해도 호출한 쪽 루프는 막히지 않으며, 카메라/로봇
+    작업과 동시에 피더 명령을 보낼 수 있다.
+
+    - 주기적으로 STATUS를 읽어 연결 상태를 확인하고, 끊기면 지수 백오프로 재연결
+    - 모든 요청에 타임아웃 적용 (타임아웃 시 연결을 끊고 재연결)
+    - 레지스터 섀도 값으로 중복 쓰기를 생략하고, 연속 주소는 write_registers 1회로 전송
+      (동작 시작만은 예외: 동작 번호와 시작 비트를 순서대로 따로 쓴다)
+    """
+
+    def __init__(self, ip='192.168.1.100', port=502, step_mode=None, poll_hz=50,
+                 request_timeout=1.0, keepalive=2.0, reconnect_max=10.0, reconnect_wait=None):
         self.ip = ip
         self.port = port
         self.client = None
-        
-    def connect(self):
-        """피더 연결"""
+
+        self.request_timeout = request_timeout
+        self.keepalive = keepalive
+        self.reconnect_max = reconnect_max
+        # 끊긴 동안 요청이 재연결을 기다리는 한도
+        # (감시 루프가 끊김을 알아채는 시간 + 첫 백오프 + 연결 시도 + 여유 1초)
+        if reconnect_wait is None:
+            reconnect_wait = keepalive + 0.5 + request_timeout * 2 + 1.0
+        self.reconnect_wait = reconnect_wait
+
+        # 단계 모드: 지속시간을 피더에 프로그램하고 STATUS 폴링으로 종료 감지
+        # (선택 사항 - 셀 설정 feeder.step_mode 또는 FLEXIBOT_FEEDER_STEP_MODE=1)
+        if step_mode is None:
+            step_mode = os.environ.get("FLEXIBOT_FEEDER_STEP_MODE") == "1"
+        self.step_mode = step_mode
+        self.saved_modes = None     # 단계 모드 진입 전 CONTROL_MODE/SIGNAL_TYPE 값
+        self.poll_hz = poll_hz
+        self.step_history = []
+
+        # 마지막으로 쓴 레지스터 값 (재연결 시 초기화)
+        self.shadow = {}
+        self.stats = {"requested": 0, "skipped": 0, "transactions": 0,
+                      "timeouts": 0, "reconnects": 0}
+
+        # 전용 이벤트 루프 (connect 시 시작)
+        self.loop = None
+        self.thread = None
+        self.io_lock = None
+        self.online = None
+        self.health_task = None
+        self.closing = False
+
+    # ===== 이벤트 루프 연결 =====
+    def _start_loop(self):
+        if self.loop is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    async def _submit(self, coro):
+        """전용 루프에서 코루틴 실행 (호출한 루프는 비차단 대기)"""
+        if self.loop is None:
+            coro.close()
+            raise IOError("피더 미연결")
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self.loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def run_sync(self, coro, timeout=None):
+        """동기 코드(스크립트, 종료 처리)에서 코루틴 실행"""
+        if self.loop is None:
+            coro.close()
+            return False
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return future.result(timeout)
+
+    @property
+    def connected(self):
+        return self.online is not None and self.online.is_set()
+
+    # ===== 연결 관리 =====
+    def connect(self, timeout=3.0):
+        """피더 연결 (연결 상태 감시 시작)"""
+        self._start_loop()
+        self.closing = False
         try:
-            self.client = ModbusTcpClient(self.ip, port=self.port)
-            return self.client.connect()
+            return asyncio.run_coroutine_threadsafe(self._connect(), self.loop).result(timeout)
         except Exception as e:
             print(f"피더 연결 실패: {e}")
             return False
-    
-    def set_light(self, on: bool, brightness: int = 0):
+
+    async def _connect(self):
+        if self.io_lock is None:
+            self.io_lock = asyncio.Lock()
+            self.online = asyncio.Event()
+
+        ok = await self._open()
+        if self.health_task is None:
+            self.health_task = asyncio.create_task(self._health_loop())
+        return ok
+
+    async def _open(self):
+        """소켓 연결 (실패 시 False)"""
+        if self.client:
+            self.client.close()
+        self.client = AsyncModbusTcpClient(self.ip, port=self.port, timeout=self.request_timeout)
+        try:
+            ok = await asyncio.wait_for(self.client.connect(), self.request_timeout * 2)
+        except (asyncio.TimeoutError, OSError):
+            ok = False
+
+        if ok:
+            # 재연결 후 장치 상태를 알 수 없으므로 섀도 초기화
+            self.shadow.clear()
+            self.online.set()
+        else:
+            self.online.clear()
+        return bool(ok)
+
+    async def _health_loop(self):
+        """연결 상태 감시 및 재연결 (지수 백오프)"""
+        backoff = 0.5
+        while not self.closing:
+            if self.online.is_set():
+                await asyncio.sleep(self.keepalive)
+                if self.io_lock.locked():
+                    # 요청 진행 중이면 그 요청이 끊김을 감지함 (재연결 대기 중인 요청이
+                    # 잠금을 잡고 있을 수 있으므로 기다리지 않음)
+                    continue
+                try:
+                    # 감시 루프가 재연결 담당이므로 여기서는 재연결을 기다리지 않음
+                    await self._read(STATUS, retry=False)
+                except Exception as e:
+                    print(f"⚠️ 피더 연결 확인 실패: {e}")
+                continue
+
+            print(f"피더 재연결 시도 ({backoff:.1f}초 후)")
+            await asyncio.sleep(backoff)
+            if await self._open():
+                self.stats["reconnects"] += 1
+                print("✓ 피더 재연결")
+                backoff = 0.5
+            else:
+                backoff = min(backoff * 2, self.reconnect_max)
+
+    async def _request(self, method, *args, retry=True, **kwargs):
+        """Modbus 요청 (연결 대기 + 타임아웃)
+
+        retry=True이면 끊긴 동안 reconnect_wait초까지 재연결을 기다리고, 요청이
+        타임아웃되면 재연결 후 한 번 더 보낸다 (레지스터 읽기/쓰기는 다시 보내도 결과가 같음).
+        """
+        attempts = 2 if retry else 1
+        for attempt in range(attempts):
+            if not self.online.is_set():
+                try:
+                    await asyncio.wait_for(
+                        self.online.wait(), self.reconnect_wait if retry else self.request_timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise IOError("피더 미연결")
+
+            try:
+                result = await asyncio.wait_for(
+                    getattr(self.client, method)(*args, **kwargs), self.request_timeout
+                )
+            except (asyncio.TimeoutError, OSError) as e:
+                # 응답 없음 → 연결 끊긴 것으로 보고 감시 루프에서 재연결
+                self.stats["timeouts"] += 1
+                self.online.clear()
+                if attempt + 1 < attempts:
+                    print(f"⚠️ 피더 요청 실패 ({method}) - 재연결 후 재시도")
+                    continue
+                raise IOError(f"피더 요청 실패 ({method}): {str(e) or '타임아웃'}")
+
+            if result.isError():
+                raise IOError(f"피더 요청 오류 ({method}): {result}")
+            return result
+
+    # ===== 레지스터 읽기/쓰기 =====
+    async def write(self, values: dict) -> bool:
+        """레지스터 일괄 쓰기
+
+        Args:
+            values: {주소: 값} - 섀도 값과 같은 값은 생략, 연속 주소는 1회 전송
+        """
+        return await self._submit(self._write(values))
+
+    async def _write(self, values: dict) -> bool:
+        async with self.io_lock:
+            self.stats["requested"] += len(values)
+            changed = [
+                (address, value) for address, value in sorted(values.items())
+                if address in VOLATILE or self.shadow.get(address) != value
+            ]
+            self.stats["skipped"] += len(values) - len(changed)
+
+            for start, block in self._contiguous(changed):
+                self.stats["transactions"] += 1
+                try:
+                    if len(block) == 1:
+                        await self._request("write_register", start, block[0])
+                    else:
+                        await self._request("write_registers", start, block)
+                except IOError:
+                    # 실패한 블럭은 섀도에서 지워서 다음에 다시 쓴다
+                    for offset in range(len(block)):
+                        self.shadow.pop(start + offset, None)
+                    raise
+
+                for offset, value in enumerate(block):
+                    self.shadow[start + offset] = value
+        return True
+
+    @staticmethod
+    def _contiguous(items):
+        """[(주소, 값)] (정렬됨) → [(시작 주소, [값, ...])]"""
+        blocks = []
+        for address, value in items:
+            if blocks and blocks[-1][0] + len(blocks[-1][1]) == address:
+                blocks[-1][1].append(value)
+            else:
+                blocks.append((address, [value]))
+        return blocks
+
+    async def read(self, address: int, count: int = 1):
+        """레지스터 읽기"""
+        return await self._submit(self._read(address, count))
+
+    async def _read(self, address: int, count: int = 1, retry=True):
+        async with self.io_lock:
+            result = await self._request("read_holding_registers", address, count=count, retry=retry)
+        return result.registers
+
+    # ===== 조명 =====
+    async def set_light(self, on: bool, brightness: int = 0):
         """조명 제어"""
-        if not self.client:
-            return False
-        
         try:
             # P0.10: 조명 스위치
-            self.client.write_register(10, 1 if on else 0)
-            
+            values = {LIGHT1_SWITCH: 1 if on else 0}
+
             if on:
                 # P0.11: 밝기 (0-100% -> 0-1000)
-                brightness_value = int(brightness * 10)
-                self.client.write_register(11, brightness_value)
-            
-            return True
+                values[LIGHT1_BRIGHTNESS] = int(brightness * 10)
+
+            return await self.write(values)
         except Exception as e:
             print(f"조명 제어 실패: {e}")
             return False
-    
+
+    # ===== 피더 동작 =====
+    async def start_action(self, action: int):
+        """표준 동작 시작 (동작 번호를 먼저 쓰고 시작 비트를 따로 씀)"""
+        return await self._submit(self._start(action))
+
+    async def _start(self, action):
+        # SWITCH(P0.00)가 ACTION_NUMBER(P0.01)보다 앞 주소라 한 번에 쓰면 시작 비트가
+        # 먼저 반영될 수 있다 → 동작 번호 쓰기가 끝난 뒤에 시작
+        await self._write({ACTION_NUMBER: action_code(action)})
+        return await self._write({SWITCH: 1})
+
+    async def stop_action(self):
+        """피더 정지"""
+        return await self.write({SWITCH: 0})
+
+    async def run_action(self, action: int, duration: float):
+        """표준 동작을 duration초 동안 실행
+
+        step_mode이면 단계 모드로 실행하고 실제 종료 시점에 바로 반환한다.
+        """
+        if self.step_mode:
+            return await self._submit(self._run_step(action, duration))
+        return await self._submit(self._run_timed(action, duration))
+
+    async def _run_timed(self, action, duration):
+        await self._restore_modes()
+        await self._start(action)
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            await self._write({SWITCH: 0})
+
+    def run_action_blocking(self, action: int, duration: float):
+        """표준 동작을 duration초 동안 실행 (동기 스크립트용)"""
+        return self.run_sync(self._run_timed(action, duration))
+
+    # ===== 단계 모드 =====
+    def set_step_mode(self, enabled: bool):
+        """단계 모드 켜기/끄기 (끄면 모드 레지스터를 단계 모드 이전 값으로 되돌림)"""
+        self.step_mode = enabled
+        if not enabled and self.saved_modes is not None and self.loop is not None:
+            self.run_sync(self._restore_modes(), timeout=self.reconnect_wait + 2.0)
+
+    async def _save_modes(self):
+        if self.saved_modes is None:
+            self.saved_modes = {
+                CONTROL_MODE: (await self._read(CONTROL_MODE))[0],
+                SIGNAL_TYPE: (await self._read(SIGNAL_TYPE))[0]
+            }
+
+    async def _restore_modes(self):
+        """시간 제어용 모드로 복원 (저장값이 없으면 스위치 신호만 보장)"""
+        if self.saved_modes is None:
+            return await self._write({SIGNAL_TYPE: 0})
+        await self._write(self.saved_modes)
+        self.saved_modes = None
+        return True
+
+    async def run_step(self, action: int, duration: float, io_mask: int = None,
+                       io_value: int = None, poll_hz: float = None, grace: float = 0.3):
+        """단계 모드 실행 후 종료 감지 시 반환
+
+        P0.22에 지속시간을 쓰고 트리거로 시작한 뒤, STATUS(P0.04)가 동작 → 정지로
+        바뀌는 순간을 폴링한다. io_mask를 주면 X 입력(P0.05)의 (X & io_mask) == io_value
+        를 종료 조건으로 쓴다. grace 안에 동작 상태가 보이지 않으면 프로그램한
+        시간만큼 기다린다 (상태 레지스터를 지원하지 않는 설정 대비).
+
+        Returns:
+            dict: planned, actual, overshoot (초), source
+        """
+        return await self._submit(
+            self._run_step(action, duration, io_mask, io_value, poll_hz, grace)
+        )
+
+    async def _run_step(self, action, duration, io_mask=None, io_value=None,
+                        poll_hz=None, grace=0.3):
+        poll_interval = 1.0 / (poll_hz or self.poll_hz)
+        steps = max(1, int(round(duration * 10)))
+        planned = steps / 10.0
+
+        # 단계 모드 + 트리거 + 지속시간 (섀도로 같은 값은 다시 쓰지 않음)
+        await self._save_modes()
+        await self._write({CONTROL_MODE: 0, SIGNAL_TYPE: 1, STEP_DURATION: steps})
+
+        started = time.perf_counter()
+        await self._start(action)
+
+        async def finished():
+            if io_mask is not None:
+                return ((await self._read(X_INPUT))[0] & io_mask) == io_value
+            return (await self._read(STATUS))[0] == 0
+
+        source = "io" if io_mask is not None else "status"
+        seen_busy = io_mask is not None
+        deadline = started + planned + 1.0
+
+        try:
+            while True:
+                await asyncio.sleep(poll_interval)
+                now = time.perf_counter()
+                done = await finished()
+
+                if not seen_busy:
+                    if not done:
+                        seen_busy = True
+                    elif now - started >= grace:
+                        # 동작 상태를 관측하지 못함 → 프로그램한 시간까지 대기
+                        source = "fallback"
+                        await asyncio.sleep(max(0.0, started + planned - now))
+                        break
+                    continue
+
+                if done:
+                    break
+                if now >= deadline:
+                    source = "timeout"
+                    break
+        finally:
+            await self._write({SWITCH: 0})
+
+        actual = time.perf_counter() - started
+        measurement = {
+            "action": action,
+            "planned": planned,
+            "actual": round(actual, 3),
+            "overshoot": round(actual - planned, 3),
+            "source": source
+        }
+        self.step_history.append(measurement)
+        del self.step_history[:-100]
+        return measurement
+
+    def get_step_stats(self):
+        """단계 동작 종료 감지 지연 통계 (최근 100회)"""
+        history = list(self.step_history)
+        measured = [m for m in history if m["source"] in ("status", "io")]
+        if not measured:
+            return {"count": 0, "fallback": len(history)}
+
+        overshoot = [m["overshoot"] for m in measured]
+        return {
+            "count": len(measured),
+            "fallback": len(history) - len(measured),
+            "mean_overshoot": round(sum(overshoot) / len(overshoot), 3),
+            "max_overshoot": round(max(overshoot), 3),
+            "poll_hz": self.poll_hz
+        }
+
+    def get_stats(self):
+        """Modbus 통계 (요청/생략/트랜잭션/타임아웃/재연결) 및 단계 동작 지연"""
+        stats = dict(self.stats)
+        stats["connected"] = self.connected
+        stats["step"] = self.get_step_stats()
+        return stats
+
     def disconnect(self):
         """연결 종료"""
-        if self.client:
-            self.client.close()
\ No newline at end of file
+        if self.loop is None:
+            return
+
+        async def close():
+            self.closing = True
+            if self.health_task:
+                self.health_task.cancel()
+                self.health_task = None
+            if self.client:
+                self.client.close()
+            if self.online:
+                self.online.clear()
+
+        try:
+            self.run_sync(close(), timeout=2.0)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=2.0)
+            self.loop = None
+            self.io_lock = None
+            self.online = None
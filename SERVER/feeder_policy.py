@@ -0,0 +1,227 @@
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+# 표준 동작 번호 (README/feeder.md)
+ACTION_NAMES = {
+    1: "전진",
+    2: "후진",
+    3: "좌측이동",
+    4: "우측이동",
+    9: "중심으로 9방향 이동",
+    10: "중심 전후 이동",
+    13: "바운스 뒤집기",
+    14: "집합"
+}
+
+# 한쪽 가장자리에 몰린 경우 반대 방향 이동 동작
+# (화면 방향 ↔ 피더 방향 매핑은 설치 방향에 따라 다를 수 있음 - 실적 기반 선택이 보정)
+EDGE_ACTIONS = {
+    "left": 4,      # 우측이동
+    "right": 3,     # 좌측이동
+    "top": 2,       # 후진
+    "bottom": 1     # 전진
+}
+
+# 기존 고정 레시피: 바운스 0.5초 → 집합 3초
+DEFAULT_RECIPE = ((13, 0.5), (14, 3.0))
+
+def _candidates(condition):
+    """트레이 상태별 후보 레시피 (앞쪽일수록 우선 시도)"""
+    if condition == "upside_down":
+        return [((13, 0.5),), ((13, 1.0),), ((13, 0.5), (14, 1.5)), DEFAULT_RECIPE]
+    if condition.startswith("edge_"):
+        action = EDGE_ACTIONS[condition[5:]]
+        return [((action, 1.0),), ((action, 2.0),), ((14, 3.0),), DEFAULT_RECIPE]
+    if condition == "crowded":
+        return [((9, 1.0),), ((10, 1.0),), ((13, 0.5), (9, 1.0)), DEFAULT_RECIPE]
+    if condition == "empty":
+        return [((14, 3.0),), ((14, 2.0),), DEFAULT_RECIPE]
+    return [DEFAULT_RECIPE, ((13, 0.5), (14, 1.5)), ((14, 2.0),)]
+
+class FeederPolicy:
+    """트레이 상태 기반 피더 동작 선택
+
+    검출 스냅샷에서 앞/뒷면 비율, 3x3 공간 분포, 밀집도를 계산해 상태를 분류하고,
+    상태별 후보 레시피 중 "동작 1초당 확보한 픽업 가능 앞면 개수"가 가장 높은
+    레시피를 고른다 (UCB1 - 아직 시도하지 않은 후보를 먼저 시도).
+
+    블럭 작업은 observe_blocks()로 같은 상태를 만들고, name을 달리해 실적을 따로 쌓는다.
+    """
+
+    def __init__(self, conf_threshold=0.8, crowd_distance=40.0, settle_time=1.0,
+                 exploration=0.5, log_dir=None, name="feeder_policy"):
+        self.conf_threshold = conf_threshold
+        self.crowd_distance = crowd_distance
+        self.settle_time = settle_time      # 동작 후 재검출 대기 시간 (보상 분모에 포함)
+        self.exploration = exploration
+
+        if log_dir is None:
+            log_dir = os.path.join(os.path.dirname(__file__), "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_path = os.path.join(log_dir, f"{name}.jsonl")
+        self.stats_path = os.path.join(log_dir, f"{name}_stats.json")
+
+        self.lock = threading.Lock()
+        self.stats = self._load_stats()
+
+    # ===== 상태 관측 =====
+    def observe(self, snapshot) -> dict:
+        """검출 스냅샷 → 트레이 상태"""
+        if snapshot is None or len(snapshot["cls"]) == 0:
+            return {"condition": "empty", "front": 0, "back": 0, "pickable_front": 0}
+
+        confident = snapshot["conf"] >= self.conf_threshold
+        xyxy = snapshot["xyxy"][confident]
+        cls = snapshot["cls"][confident]
+        h, w = snapshot["shape"]
+
+        total = len(cls)
+        if total == 0:
+            return {"condition": "empty", "front": 0, "back": 0, "pickable_front": 0}
+
+        front = cls == 1
+        centers = np.stack([(xyxy[:, 0] + xyxy[:, 2]) / 2, (xyxy[:, 1] + xyxy[:, 3]) / 2], axis=1)
+
+        # 밀집도: 가장 가까운 이웃이 crowd_distance 미만인 부품 비율
+        if total > 1:
+            diff = centers[:, None, :] - centers[None, :, :]
+            dist_sq = (diff ** 2).sum(axis=2)
+            np.fill_diagonal(dist_sq, np.inf)
+            crowded = dist_sq.min(axis=1) < self.crowd_distance ** 2
+        else:
+            crowded = np.zeros(1, bool)
+        return self._summarize(centers, front, crowded, (h, w))
+
+    def observe_blocks(self, blocks, shape) -> dict:
+        """블럭 검출 결과 → 트레이 상태
+
+        블럭은 앞/뒷면이 없으므로 모두 앞면으로 보고, 밀집 여부는 검출기의 픽업 가능 판정
+        (min_distance 이내 이웃 없음)을 그대로 쓴다.
+
+        Args:
+            shape: ROI (높이, 너비)
+        """
+        if blocks is None or len(blocks["centers"]) == 0:
+            return {"condition": "empty", "front": 0, "back": 0, "pickable_front": 0}
+        centers = np.asarray(blocks["centers"], np.float32)
+        return self._summarize(centers, np.ones(len(centers), bool), ~blocks["pickable"], shape)
+
+    def _summarize(self, centers, front, crowded, shape):
+        h, w = shape
+        total = len(centers)
+
+        # 3x3 공간 히스토그램 (행: 위→아래, 열: 왼쪽→오른쪽)
+        col = np.clip((centers[:, 0] * 3 / w).astype(int), 0, 2)
+        row = np.clip((centers[:, 1] * 3 / h).astype(int), 0, 2)
+        histogram = np.zeros((3, 3), np.int32)
+        np.add.at(histogram, (row, col), 1)
+
+        state = {
+            "front": int(front.sum()),
+            "back": int(total - front.sum()),
+            "pickable_front": int((front & ~crowded).sum()),
+            "front_ratio": round(float(front.mean()), 3),
+            "crowded_ratio": round(float(crowded.mean()), 3),
+            "histogram": histogram.tolist()
+        }
+        state["condition"] = self._classify(state, histogram, total)
+        return state
+
+    def _classify(self, state, histogram, total):
+        """상태 분류 (우선순위: 뒷면 > 가장자리 쏠림 > 밀집 > 혼합)"""
+        if state["front_ratio"] <= 0.4:
+            return "upside_down"
+
+        edges = {
+            "left": histogram[:, 0].sum(),
+            "right": histogram[:, 2].sum(),
+            "top": histogram[0, :].sum(),
+            "bottom": histogram[2, :].sum()
+        }
+        side, count = max(edges.items(), key=lambda item: item[1])
+        if count / total >= 0.6:
+            return f"edge_{side}"
+
+        if state["crowded_ratio"] >= 0.5:
+            return "crowded"
+        return "mixed"
+
+    # ===== 선택 =====
+    @staticmethod
+    def recipe_key(recipe):
+        return "+".join(f"{action}:{duration:g}" for action, duration in recipe)
+
+    def choose(self, state) -> tuple:
+        """상태에 맞는 레시피 선택 → ((action, duration), ...)"""
+        condition = state["condition"]
+        candidates = _candidates(condition)
+
+        with self.lock:
+            table = self.stats.get(condition, {})
+            total_trials = sum(entry["n"] for entry in table.values())
+
+            best, best_score = None, -math.inf
+            for recipe in candidates:
+                entry = table.get(self.recipe_key(recipe))
+                if entry is None or entry["n"] == 0:
+                    return recipe
+                bonus = self.exploration * math.sqrt(math.log(total_trials + 1) / entry["n"])
+                score = entry["mean"] + bonus
+                if score > best_score:
+                    best, best_score = recipe, score
+        return best
+
+    # ===== 결과 기록 =====
+    def record(self, state, recipe, after_state, elapsed: float) -> float:
+        """레시피 실행 결과 기록 → 보상 (픽업 가능 앞면 개수 / 초)"""
+        seconds = elapsed + self.settle_time
+        reward = after_state.get("pickable_front", 0) / seconds if seconds > 0 else 0.0
+
+        condition = state["condition"]
+        key = self.recipe_key(recipe)
+        with self.lock:
+            entry = self.stats.setdefault(condition, {}).setdefault(key, {"n": 0, "mean": 0.0})
+            entry["n"] += 1
+            entry["mean"] += (reward - entry["mean"]) / entry["n"]
+            self._save_stats()
+
+        record = {
+            "ts": round(time.time(), 3),
+            "condition": condition,
+            "recipe": key,
+            "actions": [ACTION_NAMES.get(action, str(action)) for action, _ in recipe],
+            "elapsed": round(elapsed, 3),
+            "before": {k: state.get(k) for k in ("front", "back", "pickable_front")},
+            "after": {k: after_state.get(k) for k in ("front", "back", "pickable_front", "condition")},
+            "reward": round(reward, 3)
+        }
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        print(f"  - 피더 정책 결과 [{condition}] {key}: "
+              f"앞면 {after_state.get('pickable_front', 0)}개, {reward:.2f}개/초")
+        return reward
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+    def _load_stats(self):
+        if not os.path.exists(self.stats_path):
+            return {}
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_stats(self):
+        tmp_path = self.stats_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.stats, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.stats_path)
@@ -0,0 +1,290 @@
+"""최근 ROI 프레임 링 녹화 (메모리 맵 파일) 및 재생
+
+픽업 실패 원인 분석/오프라인 프로파일링용. 미리 할당한 링 파일에 프레임, 시각,
+검출 결과를 계속 덮어쓰고, dump()로 최근 N초를 별도 파일로 잘라 저장한다.
+
+재생:
+    python frame_recorder.py recordings/dump_xxx.frames [--model ../MODEL/final_lego_model.pt]
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+from detections import ROW_WIDTH, snapshot_to_rows, blocks_to_rows, rows_to_snapshot, rows_to_blocks
+
+MAGIC = b"FLXREC01"
+HEADER_SIZE = 64
+MODES = ("lego", "block")
+
+SLOT_DTYPE = np.dtype([
+    ("seq", np.uint64),         # 0: 비어 있음/쓰는 중
+    ("ts", np.float64),
+    ("mode", np.int32),
+    ("height", np.int32),
+    ("width", np.int32),
+    ("n_rows", np.int32)
+])
+
+def _align(size, alignment=4096):
+    return (size + alignment - 1) // alignment * alignment
+
+class RecordingFile:
+    """녹화 파일 레이아웃 (헤더 + 슬롯 메타 + 프레임 + 검출 행) 을 np.memmap으로 연다"""
+
+    def __init__(self, path, slots=None, max_height=None, max_width=None, max_rows=512, writable=False):
+        self.path = path
+        if slots is not None:
+            # 새 파일 생성 (크기만 잡아 두고 0으로 채우지 않음 - sparse)
+            self.slots, self.max_height, self.max_width, self.max_rows = slots, max_height, max_width, max_rows
+            with open(path, "wb") as f:
+                header = np.zeros(HEADER_SIZE, np.uint8)
+                header[:8] = np.frombuffer(MAGIC, np.uint8)
+                header[8:24] = np.frombuffer(
+                    np.array([slots, max_height, max_width, max_rows], np.uint32).tobytes(), np.uint8
+                )
+                f.write(header.tobytes())
+                f.truncate(self.size())
+            mode = "r+"
+        else:
+            with open(path, "rb") as f:
+                header = f.read(HEADER_SIZE)
+            if header[:8] != MAGIC:
+                raise ValueError(f"녹화 파일 형식이 아님: {path}")
+            self.slots, self.max_height, self.max_width, self.max_rows = (
+                int(v) for v in np.frombuffer(header[8:24], np.uint32)
+            )
+            mode = "r+" if writable else "r"
+
+        offset = HEADER_SIZE
+        self.meta = np.memmap(path, SLOT_DTYPE, mode, offset, (self.slots,))
+        offset += _align(SLOT_DTYPE.itemsize * self.slots)
+        frame_shape = (self.slots, self.max_height, self.max_width, 3)
+        self.frames = np.memmap(path, np.uint8, mode, offset, frame_shape)
+        offset += _align(int(np.prod(frame_shape)))
+        self.rows = np.memmap(path, np.float32, mode, offset, (self.slots, self.max_rows, ROW_WIDTH))
+
+    def size(self):
+        return (HEADER_SIZE + _align(SLOT_DTYPE.itemsize * self.slots)
+                + _align(self.slots * self.max_height * self.max_width * 3)
+                + self.slots * self.max_rows * ROW_WIDTH * 4)
+
+    def write_slot(self, slot, seq, ts, mode, frame, rows):
+        h = min(frame.shape[0], self.max_height)
+        w = min(frame.shape[1], self.max_width)
+        n_rows = min(len(rows), self.max_rows)
+        meta = self.meta[slot]
+
+        meta["seq"] = 0
+        self.frames[slot, :h, :w] = frame[:h, :w]
+        self.rows[slot, :n_rows] = rows[:n_rows]
+        meta["ts"] = ts
+        meta["mode"] = MODES.index(mode)
+        meta["height"] = h
+        meta["width"] = w
+        meta["n_rows"] = n_rows
+        meta["seq"] = seq
+
+    def flush(self):
+        for array in (self.meta, self.frames, self.rows):
+            array.flush()
+
+    def close(self):
+        self.meta = self.frames = self.rows = None
+
+class FrameRecorder:
+    """최근 seconds초 ROI 프레임 링 녹화
+
+    프레임당 비용은 메모리 맵 영역으로의 memcpy 한 번 (디스크 쓰기는 OS가 나중에).
+    재시작 시 같은 크기의 링 파일은 이어서 쓰므로 직전(비정상 종료 전) 프레임이 남는다.
+    """
+
+    def __init__(self, seconds=10.0, fps=30.0, max_height=978, max_width=1256,
+                 directory=None, margin=1.25):
+        if directory is None:
+            directory = os.path.join(os.path.dirname(__file__), "recordings")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.seconds = seconds
+        self.fps = fps
+
+        # dump 중 덮어쓰지 않도록 여유 슬롯 확보 (fps는 최대 캡처 속도)
+        slots = max(2, int(np.ceil(seconds * fps * margin)))
+        self.file, self.seq = self._open_ring(os.path.join(directory, "ring.frames"),
+                                              slots, max_height, max_width)
+        self.lock = threading.Lock()
+        self.write_seconds = 0.0
+        self.dumps = []
+        self.dump_names = set()
+        self.lap_started = None     # 링 한 바퀴 시작 시각 (실제로 담기는 시간 확인용)
+        self.covered = None
+        self.warned = False
+
+        size_mb = self.file.size() / (1 << 20)
+        print(f"✓ 프레임 녹화: {slots}슬롯 ({seconds:g}초 @ {fps:g}fps), {size_mb:.0f} MB")
+
+    @staticmethod
+    def _open_ring(path, slots, max_height, max_width):
+        """기존 링 파일이 같은 레이아웃이면 이어서 쓰고, 다르면 보관 후 새로 생성 → (파일, 마지막 seq)"""
+        if os.path.exists(path):
+            try:
+                ring = RecordingFile(path, writable=True)
+                if (ring.slots, ring.max_height, ring.max_width) == (slots, max_height, max_width):
+                    seq = int(np.max(ring.meta["seq"])) if ring.slots else 0
+                    print(f"✓ 기존 녹화 링 이어서 사용 (마지막 프레임 {seq})")
+                    return ring, seq
+                ring.close()
+            except (ValueError, OSError) as e:
+                print(f"⚠️ 기존 녹화 링 읽기 실패: {e}")
+            kept = os.path.join(os.path.dirname(path), f"ring_{time.strftime('%Y%m%d_%H%M%S')}.frames")
+            os.replace(path, kept)
+            print(f"✓ 이전 녹화 링 보관: {kept}")
+        return RecordingFile(path, slots, max_height, max_width), 0
+
+    def write(self, frame, mode, snapshot=None, blocks=None, ts=None):
+        """프레임 한 장 기록 (캡처 스레드)"""
+        started = time.perf_counter()
+        if snapshot is not None:
+            rows = snapshot_to_rows(snapshot)
+        elif blocks is not None:
+            rows = blocks_to_rows(blocks)
+        else:
+            rows = np.zeros((0, ROW_WIDTH), np.float32)
+
+        ts = time.time() if ts is None else ts
+        with self.lock:
+            self.seq += 1
+            slot = self.seq % self.file.slots
+            self.file.write_slot(slot, self.seq, ts, mode, frame, rows)
+        self.write_seconds += time.perf_counter() - started
+
+        # 한 바퀴마다 실제로 담긴 시간 확인 (설정보다 빠르게 캡처되면 경고)
+        if slot == 0:
+            if self.lap_started is not None:
+                self.covered = ts - self.lap_started
+                if self.covered < self.seconds and not self.warned:
+                    self.warned = True
+                    print(f"⚠️ 녹화 링이 {self.covered:.1f}초만 담음 (설정 {self.seconds:g}초) "
+                          f"- FLEXIBOT_RECORD_FPS를 높이세요")
+            self.lap_started = ts
+
+    def dump(self, seconds=10.0, reason="manual"):
+        """최근 seconds초 프레임을 새 파일로 저장 (백그라운드 스레드) → 파일 경로"""
+        now = time.time()
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(now)) + f"_{int(now * 1000) % 1000:03d}"
+        with self.lock:
+            # 같은 밀리초에 여러 번 요청해도 덮어쓰지 않도록 번호 추가
+            name, count = f"dump_{stamp}_{reason}", 1
+            while name in self.dump_names or os.path.exists(os.path.join(self.directory, name + ".frames")):
+                name, count = f"dump_{stamp}_{reason}_{count}", count + 1
+            self.dump_names.add(name)
+        path = os.path.join(self.directory, name + ".frames")
+        cutoff = time.time() - seconds
+        threading.Thread(target=self._dump, args=(path, cutoff, reason), daemon=True).start()
+        return path
+
+    def _dump(self, path, cutoff, reason):
+        meta = np.array(self.file.meta)     # 메타만 복사해 순서 결정
+        select = np.flatnonzero((meta["seq"] > 0) & (meta["ts"] >= cutoff))
+        order = select[np.argsort(meta["seq"][select])]
+        if len(order) == 0:
+            print(f"⚠️ 녹화 덤프 ({reason}): 저장할 프레임 없음")
+            return
+
+        out = RecordingFile(path, len(order), self.file.max_height, self.file.max_width, self.file.max_rows)
+        saved = 0
+        for slot in order:
+            seq = int(meta["seq"][slot])
+            h, w, n = (int(meta[key][slot]) for key in ("height", "width", "n_rows"))
+            frame = np.array(self.file.frames[slot, :h, :w])
+            rows = np.array(self.file.rows[slot, :n])
+            # 복사하는 동안 덮어쓰였으면 버림
+            if int(self.file.meta[slot]["seq"]) != seq:
+                continue
+            out.write_slot(saved, seq, float(meta["ts"][slot]), MODES[int(meta["mode"][slot])], frame, rows)
+            saved += 1
+        out.flush()
+        out.close()
+        self.dumps.append(path)
+        print(f"✓ 녹화 덤프 ({reason}): {saved}프레임 → {path}")
+
+    def get_stats(self):
+        return {
+            "frames": self.seq,
+            "slots": self.file.slots,
+            "fps": self.fps,
+            "covered_seconds": round(self.covered, 1) if self.covered is not None else None,
+            "avg_write_ms": round(self.write_seconds / self.seq * 1000, 3) if self.seq else 0.0,
+            "dumps": list(self.dumps[-10:])
+        }
+
+class FrameReplay:
+    """녹화 파일 재생 (시각 순)"""
+
+    def __init__(self, path):
+        self.file = RecordingFile(path)
+        meta = np.array(self.file.meta)
+        valid = np.flatnonzero(meta["seq"] > 0)
+        self.order = valid[np.argsort(meta["seq"][valid])]
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        """(ts, mode, frame, recorded) - recorded는 녹화 당시 검출 결과"""
+        for slot in self.order:
+            meta = self.file.meta[slot]
+            h, w, n = int(meta["height"]), int(meta["width"]), int(meta["n_rows"])
+            mode = MODES[int(meta["mode"])]
+            rows = self.file.rows[slot, :n]
+            recorded = rows_to_snapshot(rows, (h, w), float(meta["ts"])) if mode == "lego" else rows_to_blocks(rows)
+            yield float(meta["ts"]), mode, self.file.frames[slot, :h, :w], recorded
+
+    def run(self, camera, realtime=False):
+        """녹화 프레임을 camera.process_frame에 다시 통과시켜 처리 시간/검출 수 비교"""
+        times = []
+        changed = 0
+        previous_ts = None
+        for ts, mode, frame, recorded in self:
+            if realtime and previous_ts is not None:
+                time.sleep(max(0.0, ts - previous_ts))
+            previous_ts = ts
+
+            started = time.perf_counter()
+            _, snapshot, blocks = camera.process_frame(np.ascontiguousarray(frame), mode)
+            times.append(time.perf_counter() - started)
+
+            now = len(snapshot["cls"]) if snapshot is not None else len(blocks["centers"])
+            before = len(recorded["cls"]) if mode == "lego" else len(recorded["centers"])
+            changed += now != before
+
+        if not times:
+            return {"frames": 0}
+        times = np.array(times) * 1000
+        return {
+            "frames": len(times),
+            "mean_ms": round(float(times.mean()), 2),
+            "p95_ms": round(float(np.percentile(times, 95)), 2),
+            "max_ms": round(float(times.max()), 2),
+            "detection_count_changed": int(changed)
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="녹화 프레임 재생/프로파일링")
+    parser.add_argument("path")
+    parser.add_argument("--model", default="../MODEL/final_lego_model.pt")
+    parser.add_argument("--realtime", action="store_true")
+    args = parser.parse_args()
+
+    from camera_controller import CameraController
+
+    replay = FrameReplay(args.path)
+    print(f"재생: {args.path} ({len(replay)}프레임)")
+    result = replay.run(CameraController(args.model), realtime=args.realtime)
+    for key, value in result.items():
+        print(f"  {key}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from detections import ROW_WIDTH
+
+MODES = ("lego", "block")
+HEADER_SIZE = 64
+
+# 제어 블록: API 프로세스 ↔ 비전 프로세스 (값 하나씩 쓰므로 잠금 없이 사용)
+CONTROL_DTYPE = np.dtype([
+    ("version", np.uint64),         # 제어 값 변경 시 증가 (비전 프로세스가 감지)
+    ("roi", np.int32, 4),
+    ("mode", np.int32),             # MODES 인덱스
+    ("conf_threshold", np.float32),
+    ("min_area", np.float64),
+    ("max_area", np.float64),
+    ("max_aspect", np.float64),
+    ("min_distance", np.float64),
+    ("capture", np.int32),          # 1이면 캡처 시작
+    ("stop", np.int32),             # 1이면 비전 프로세스 종료
+    ("dump_request", np.uint64),    # 녹화 덤프 요청 시 증가
+    ("dump_seconds", np.float64),
+    ("dump_reason", "S32"),
+    ("parent_heartbeat", np.float64),
+    ("camera_state", np.int32),     # 0: 준비 중, 1: 연결됨, -1: 실패
+    ("pid", np.int32),
+    ("heartbeat", np.float64),      # 비전 프로세스 생존 신호
+    ("latest_seq", np.uint64),
+    ("latest_slot", np.int32),
+    ("fps", np.float32)
+])
+
+# 슬롯 메타데이터 (seq: 0 = 쓰는 중/비어 있음, 그 외 프레임 번호)
+SLOT_DTYPE = np.dtype([
+    ("seq", np.uint64),
+    ("ts", np.float64),
+    ("mode", np.int32),
+    ("height", np.int32),
+    ("width", np.int32),
+    ("jpeg_len", np.int32),
+    ("n_rows", np.int32)
+])
+
+class FrameView:
+    """공유 메모리 슬롯을 가리키는 읽기 전용 뷰 (복사 없음)
+
+    쓰기 프로세스가 한 바퀴 돌아 같은 슬롯을 덮어쓸 수 있으므로
+    사용 후 valid()로 그동안 슬롯이 바뀌지 않았는지 확인한다.
+    """
+
+    def __init__(self, ring, slot, seq):
+        meta = ring.slots[slot]
+        self.ring = ring
+        self.slot = slot
+        self.seq = seq
+        self.ts = float(meta["ts"])
+        self.mode = MODES[int(meta["mode"])]
+        h, w = int(meta["height"]), int(meta["width"])
+        self.frame = ring.frames[slot, :h, :w]
+        self.jpeg = ring.jpegs[slot, :int(meta["jpeg_len"])]
+        self.rows = ring.rows[slot, :int(meta["n_rows"])]
+
+    def valid(self):
+        return int(self.ring.slots[self.slot]["seq"]) == self.seq
+
+class FrameRing:
+    """multiprocessing.shared_memory 기반 최신 프레임 링 버퍼
+
+    한 프로세스가 쓰고(비전) 여러 스레드/프로세스가 읽는다(API).
+    슬롯마다 원본 ROI 프레임, 시각화 JPEG, 검출 행 배열을 두고 순번(seq)으로
+    일관성을 확인한다 (seqlock 방식: 쓰기 전 seq=0, 다 쓴 뒤 seq 기록).
+    """
+
+    def __init__(self, shm, slots, max_height, max_width, max_jpeg, max_rows, owner):
+        self.shm = shm
+        self.owner = owner
+        self.n_slots = slots
+        self.max_height = max_height
+        self.max_width = max_width
+        self.max_rows = max_rows
+
+        buf = shm.buf
+        # 앞쪽 HEADER_SIZE 바이트: 레이아웃 (attach 시 읽음)
+        offset = HEADER_SIZE
+        self.control = np.ndarray((1,), CONTROL_DTYPE, buf, offset)
+        offset += _align(CONTROL_DTYPE.itemsize)
+        self.slots = np.ndarray((slots,), SLOT_DTYPE, buf, offset)
+        offset += _align(SLOT_DTYPE.itemsize * slots)
+        self.frames = np.ndarray((slots, max_height, max_width, 3), np.uint8, buf, offset)
+        offset += _align(self.frames.nbytes)
+        self.jpegs = np.ndarray((slots, max_jpeg), np.uint8, buf, offset)
+        offset += _align(self.jpegs.nbytes)
+        self.rows = np.ndarray((slots, max_rows, ROW_WIDTH), np.float32, buf, offset)
+
+    @staticmethod
+    def _size(slots, max_height, max_width, max_jpeg, max_rows):
+        return (HEADER_SIZE + _align(CONTROL_DTYPE.itemsize) + _align(SLOT_DTYPE.itemsize * slots)
+                + _align(slots * max_height * max_width * 3) + _align(slots * max_jpeg)
+                + slots * max_rows * ROW_WIDTH * 4)
+
+    @classmethod
+    def create(cls, max_height, max_width, slots=4, max_jpeg=1 << 20, max_rows=512, name=None):
+        size = cls._size(slots, max_height, max_width, max_jpeg, max_rows)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        layout = np.ndarray((5,), np.uint32, shm.buf, 0)
+        layout[:] = (slots, max_height, max_width, max_jpeg, max_rows)
+        del layout
+        # 새 공유 메모리는 0으로 초기화되어 있음 (seq=0: 빈 슬롯)
+        return cls(shm, slots, max_height, max_width, max_jpeg, max_rows, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            # 붙기만 한 프로세스가 종료하며 공유 메모리를 지우지 않도록 추적 해제
+            resource_tracker.unregister(shm._name, "shared_memory")
+        layout = np.ndarray((5,), np.uint32, shm.buf, 0)
+        slots, max_height, max_width, max_jpeg, max_rows = (int(v) for v in layout)
+        del layout
+        return cls(shm, slots, max_height, max_width, max_jpeg, max_rows, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def ctrl(self):
+        """제어 블록 레코드 (필드 단위로 읽고 쓰기)"""
+        return self.control[0]
+
+    # ===== 쓰기 (비전 프로세스) =====
+    def write(self, frame, jpeg, rows, mode, ts=None):
+        """다음 슬롯에 프레임 기록 → seq"""
+        ctrl = self.ctrl
+        seq = int(ctrl["latest_seq"]) + 1
+        slot = seq % self.n_slots
+        meta = self.slots[slot]
+
+        h = min(frame.shape[0], self.max_height)
+        w = min(frame.shape[1], self.max_width)
+        n_jpeg = len(jpeg) if jpeg is not None and len(jpeg) <= self.jpegs.shape[1] else 0
+        n_rows = min(len(rows), self.max_rows) if rows is not None else 0
+
+        meta["seq"] = 0
+        self.frames[slot, :h, :w] = frame[:h, :w]
+        if n_jpeg:
+            self.jpegs[slot, :n_jpeg] = np.frombuffer(jpeg, np.uint8)
+        if n_rows:
+            self.rows[slot, :n_rows] = rows[:n_rows]
+        meta["ts"] = time.time() if ts is None else ts
+        meta["mode"] = MODES.index(mode)
+        meta["height"] = h
+        meta["width"] = w
+        meta["jpeg_len"] = n_jpeg
+        meta["n_rows"] = n_rows
+        meta["seq"] = seq
+
+        ctrl["latest_slot"] = slot
+        ctrl["latest_seq"] = seq
+        return seq
+
+    # ===== 읽기 (API 프로세스) =====
+    def latest(self):
+        """가장 최근 프레임 뷰 (없으면 None)"""
+        for _ in range(3):
+            ctrl = self.ctrl
+            slot = int(ctrl["latest_slot"])
+            seq = int(self.slots[slot]["seq"])
+            if seq == 0:
+                if int(ctrl["latest_seq"]) == 0:
+                    return None
+                continue
+            return FrameView(self, slot, seq)
+        return None
+
+    def close(self):
+        # numpy 뷰가 버퍼를 잡고 있으면 close가 실패하므로 먼저 해제
+        self.control = self.slots = self.frames = self.jpegs = self.rows = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # 아직 살아 있는 FrameView가 있음 - 프로세스 종료 시 해제됨
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+def _align(size, alignment=64):
+    return (size + alignment - 1) // alignment * alignment
@@ -0,0 +1,300 @@
+"""공유 YOLO 추론 서비스 (여러 카메라/셀의 프레임을 마이크로 배치로 추론)
+
+카메라마다 YOLO 인스턴스를 두면 모델이 메모리에 여러 벌 올라가고 한 장씩 추론한다.
+서비스 하나가 모델을 소유하고, 소스별 요청을 모아 최대 대기 시간(max_wait) 안에서
+한 배치로 추론한다. YOLO 예측기는 스레드 안전하지 않으므로 모델 호출은 모두
+서비스 스레드에서만 일어난다.
+
+사용:
+    service = shared_service(model_path)
+    model = service.client("lego")            # YOLO처럼 호출 가능: model(img, imgsz=..., verbose=False)
+    snapshot = service.infer("lego", roi_img)  # 검출 스냅샷
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FuturesTimeout
+
+import numpy as np
+from detections import result_arrays, make_snapshot
+from model_cache import load_model, reference_image, warm_up, record_first_frame
+from cpu_tuning import pin_thread
+
+class InferenceClient:
+    """소스 하나의 YOLO 호환 호출 창구 (CameraController.model 자리에 사용)"""
+
+    def __init__(self, service, source):
+        self.service = service
+        self.source = source
+
+    def __call__(self, images, imgsz=None, verbose=False):
+        single = isinstance(images, np.ndarray)
+        future = self.service.submit(self.source, [images] if single else list(images), imgsz)
+        return self.service.wait(future)
+
+    def close(self):
+        self.service.unregister(self.source)
+
+class InferenceService:
+    """동적 마이크로 배치 추론
+
+    배치를 내보내는 조건 (먼저 만족하는 것):
+      1. 이미지 수가 max_batch에 도달
+      2. 등록된 모든 소스가 요청을 올림 (더 기다려도 올 프레임이 없음)
+      3. 가장 오래된 요청이 max_wait초 대기
+
+    Args:
+        model_path: YOLO 모델 경로
+        max_batch: 배치당 최대 이미지 수 (타일 요청은 타일 수만큼 차지)
+        max_wait: 최대 대기 시간(초) - 지연 예산
+        timeout: 요청 결과 대기 한도(초) - 서비스 스레드가 멈춰도 카메라 스레드는 막히지 않음
+                 (초과 시 concurrent.futures.TimeoutError, 예열 시간보다 길게)
+    """
+
+    def __init__(self, model_path, max_batch=8, max_wait=0.01, timeout=30.0):
+        self.model, self.model_report = load_model(model_path)
+        self.model_path = model_path
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        print(f"✓ 공유 추론 서비스: 배치 {max_batch}, 대기 {max_wait * 1000:.0f}ms")
+
+        # 모델 교체 (교체 직후 probation 배치 동안 오류가 반복되면 자동 롤백)
+        self.previous = None            # (model, report, path)
+        self.swaps = 0
+        self.probation = 0
+        self.probation_errors = 0
+        self.max_probation_errors = 3
+
+        self.cond = threading.Condition()
+        self.queue = deque()            # (submitted, source, images, imgsz, future)
+        self.sources = {}               # source -> 통계
+        self.running = True
+
+        self.stats = {
+            "batches": 0,
+            "images": 0,
+            "requests": 0,
+            "errors": 0,
+            "wait_seconds": 0.0,
+            "infer_seconds": 0.0,
+            "batch_sizes": {}
+        }
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    # ===== 소스 =====
+    def client(self, source):
+        """소스 등록 → YOLO 호환 클라이언트"""
+        with self.cond:
+            self.sources.setdefault(source, {"requests": 0, "images": 0, "latency_seconds": 0.0})
+        return InferenceClient(self, source)
+
+    def unregister(self, source):
+        with self.cond:
+            self.sources.pop(source, None)
+            self.cond.notify()
+
+    # ===== 모델 교체 =====
+    def swap_model(self, model, report, path, probation=100):
+        """다음 배치부터 새 모델 사용 (진행 중인 배치는 이전 모델로 끝남)"""
+        with self.cond:
+            self.previous = (self.model, self.model_report, self.model_path)
+            self.model, self.model_report, self.model_path = model, report, path
+            self.probation, self.probation_errors = probation, 0
+            self.swaps += 1
+        print(f"✓ 모델 교체: {path}")
+
+    def rollback_model(self, reason="manual"):
+        """이전 모델로 되돌림 → 성공 여부"""
+        with self.cond:
+            if self.previous is None:
+                return False
+            rejected = self.model_path
+            self.model, self.model_report, self.model_path = self.previous
+            self.previous = None
+            self.probation = 0
+            self.model_report["rollback"] = {"from": rejected, "reason": reason, "ts": time.time()}
+        print(f"⚠️ 모델 롤백 ({reason}): {rejected} → {self.model_path}")
+        return True
+
+    # ===== 요청 =====
+    def submit(self, source, images, imgsz=None):
+        """이미지 리스트 추론 요청 → Future (결과: ultralytics Results 리스트)"""
+        future = Future()
+        with self.cond:
+            if not self.running:
+                raise RuntimeError("추론 서비스가 종료됨")
+            # client()로 등록하지 않은 소스(검증 등)는 배치 조건 2에서 제외
+            self.queue.append((time.perf_counter(), source, images, imgsz, future))
+            self.cond.notify()
+        return future
+
+    def wait(self, future):
+        """요청 결과 대기 (timeout 초과 시 요청을 취소하고 TimeoutError)"""
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeout:
+            future.cancel()
+            raise
+
+    def infer(self, source, image, imgsz=None):
+        """이미지 한 장 → 검출 스냅샷 (소스 스레드에서 변환)"""
+        results = self.wait(self.submit(source, [image], imgsz))
+        return make_snapshot(*result_arrays(results[0], image.shape), image.shape)
+
+    # ===== 배치 =====
+    def _ready(self):
+        """대기 중인 요청 중 가장 오래된 것과 같은 imgsz인 묶음 → (요청 리스트, 배치를 내보낼지)"""
+        imgsz = self.queue[0][3]
+        batch, count, waiting = [], 0, set()
+        for request in self.queue:
+            if request[3] != imgsz:
+                continue
+            n = len(request[2])
+            if batch and count + n > self.max_batch:
+                return batch, True
+            batch.append(request)
+            count += n
+            waiting.add(request[1])
+        full = count >= self.max_batch
+        everyone = waiting >= set(self.sources)
+        expired = time.perf_counter() - self.queue[0][0] >= self.max_wait
+        return batch, full or everyone or expired
+
+    def _run(self):
+        pin_thread("inference")
+        # 예열은 서비스 스레드에서 (그동안 들어온 요청은 대기열에서 기다림)
+        try:
+            warm_up(self.model, reference_image(), self.model_report)
+        except Exception as e:
+            print(f"⚠️ 모델 예열 실패: {e}")
+        while True:
+            batch = []
+            try:
+                with self.cond:
+                    while self.running and not self.queue:
+                        self.cond.wait()
+                    if not self.running:
+                        break
+                    ready_batch, ready = self._ready()
+                    while self.running and not ready:
+                        remaining = self.max_wait - (time.perf_counter() - self.queue[0][0])
+                        self.cond.wait(max(remaining, 0.0005))
+                        ready_batch, ready = self._ready()
+                    if not self.running:
+                        break
+                    for request in ready_batch:
+                        self.queue.remove(request)
+                    batch = ready_batch
+                # 대기 한도를 넘겨 취소된 요청은 제외 (이후에는 취소되지 않음)
+                batch = [request for request in batch if request[4].set_running_or_notify_cancel()]
+                if batch:
+                    self._execute(batch)
+            except Exception as e:
+                # 예상 못 한 오류로 서비스 스레드가 죽으면 모든 카메라가 멈추므로 배치만 실패 처리
+                self.stats["errors"] += 1
+                print(f"✗ 추론 서비스 오류: {e}")
+                for request in batch:
+                    if not request[4].done():
+                        request[4].set_exception(e)
+
+        # 종료 시 남은 요청 취소
+        with self.cond:
+            pending, self.queue = list(self.queue), deque()
+        for request in pending:
+            request[4].cancel()
+
+    def _execute(self, batch):
+        dispatched = time.perf_counter()
+        images = [image for request in batch for image in request[2]]
+        imgsz = batch[0][3]
+        model, report = self.model, self.model_report
+        try:
+            if imgsz is None:
+                results = model(images, verbose=False)
+            else:
+                results = model(images, imgsz=imgsz, verbose=False)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"✗ 배치 추론 오류: {e}")
+            for request in batch:
+                request[4].set_exception(e)
+            if self.probation > 0 and model is self.model:
+                self.probation_errors += 1
+                if self.probation_errors >= self.max_probation_errors:
+                    self.rollback_model(f"교체 후 추론 오류 {self.probation_errors}회: {e}")
+            return
+        finished = time.perf_counter()
+        record_first_frame(report, finished - dispatched)
+        if self.probation > 0:
+            self.probation -= 1
+
+        stats = self.stats
+        stats["batches"] += 1
+        stats["images"] += len(images)
+        stats["requests"] += len(batch)
+        stats["infer_seconds"] += finished - dispatched
+        stats["batch_sizes"][len(images)] = stats["batch_sizes"].get(len(images), 0) + 1
+
+        start = 0
+        for submitted, source, request_images, _, future in batch:
+            n = len(request_images)
+            stats["wait_seconds"] += dispatched - submitted
+            source_stats = self.sources.get(source)
+            if source_stats is not None:
+                source_stats["requests"] += 1
+                source_stats["images"] += n
+                source_stats["latency_seconds"] += finished - submitted
+            future.set_result(results[start:start + n])
+            start += n
+
+    def get_stats(self):
+        """배치 점유율/대기 시간/소스별 처리량"""
+        stats = self.stats
+        batches = stats["batches"]
+        with self.cond:
+            sources = {
+                name: {
+                    "requests": s["requests"],
+                    "images": s["images"],
+                    "avg_latency_ms": round(s["latency_seconds"] / s["requests"] * 1000, 2) if s["requests"] else 0.0
+                }
+                for name, s in self.sources.items()
+            }
+            queued = len(self.queue)
+        return {
+            "model": self.model_path,
+            "model_report": self.model_report,
+            "swaps": self.swaps,
+            "previous_model": self.previous[2] if self.previous else None,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": batches,
+            "images": stats["images"],
+            "avg_batch": round(stats["images"] / batches, 2) if batches else 0.0,
+            "occupancy": round(stats["images"] / (batches * self.max_batch), 3) if batches else 0.0,
+            "avg_wait_ms": round(stats["wait_seconds"] / stats["requests"] * 1000, 2) if stats["requests"] else 0.0,
+            "avg_infer_ms": round(stats["infer_seconds"] / batches * 1000, 2) if batches else 0.0,
+            "batch_sizes": dict(sorted(stats["batch_sizes"].items())),
+            "errors": stats["errors"],
+            "queued": queued,
+            "sources": sources
+        }
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.thread.join(timeout=2.0)
+
+_services = {}
+_services_lock = threading.Lock()
+
+def shared_service(model_path, **kwargs):
+    """모델 경로별 공유 서비스 (프로세스 안에서 모델 한 벌)"""
+    with _services_lock:
+        service = _services.get(model_path)
+        if service is None:
+            service = _services[model_path] = InferenceService(model_path, **kwargs)
+        return service
@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import time
+
+class InputMonitor:
+    """PCI-7230 디지털 입력 폴링 및 엣지 이벤트
+
+    전용 스레드가 입력 포트를 rate_hz로 읽어 이전 값과 XOR로 엣지를 찾고,
+    wait_for() 대기자와 subscribe() 콜백에 알린다. 고정 sleep 대신
+    리드 센서가 행정 완료를 알리는 즉시 다음 동작으로 넘어갈 수 있다.
+
+    폴링은 필요할 때만 돈다: start(keep_running=True)이거나 대기자/구독자가 있을 때.
+    마지막 구독이 해제되면 스레드가 스스로 멈추고, 다음 구독 때 다시 시작한다.
+    """
+
+    def __init__(self, controller, rate_hz=500):
+        self.controller = controller
+        self.period = 1.0 / rate_hz
+
+        self.cond = threading.Condition()
+        self.state = None               # 마지막 입력 워드 (첫 샘플 전 None)
+        self.last_sample = 0.0
+        self.callbacks = []             # (mask, edge, callback)
+        self.enabled = False            # 카드 연결됨 (폴링 가능)
+        self.keep_running = False       # 구독자가 없어도 계속 폴링 (센서 매핑 시)
+        self.running = False
+        self.thread = None
+
+        self.samples = 0
+        self.edges = 0
+        self.read_errors = 0
+        self.started_at = 0.0
+
+    def start(self, keep_running=True):
+        """폴링 허용 (카드 연결 후)
+
+        Args:
+            keep_running: False면 대기자/구독자가 있을 때만 폴링
+        """
+        with self.cond:
+            self.enabled = True
+            self.keep_running = keep_running
+            if keep_running or self.callbacks:
+                self._start_thread()
+
+    def _start_thread(self):
+        """폴링 스레드 시작 (cond 잡은 상태에서 호출)"""
+        if self.running:
+            return
+        # 첫 샘플을 바로 읽어 두어 시작 직후 read()/wait_for가 현재 상태를 본다
+        value = self.controller.read_port()
+        self.state = value
+        self.last_sample = time.perf_counter()
+        self.running = True
+        self.started_at = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, name="di-monitor", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.enabled = False
+            self.running = False
+            self.cond.notify_all()
+            thread = self.thread
+            self.thread = None
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+
+    # ===== 조회 =====
+    def read(self, channel):
+        """채널 현재 상태 (첫 샘플 전이면 None)"""
+        state = self.state
+        if state is None:
+            return None
+        return bool(state >> channel & 1)
+
+    def wait_for(self, channel, state=True, timeout=2.0):
+        """채널이 state가 될 때까지 대기 (블로킹)
+
+        Returns:
+            bool: 시간 내에 도달하면 True
+        """
+        deadline = time.perf_counter() + timeout
+        # 대기하는 동안 폴링이 돌도록 구독으로 등록
+        handle = self.subscribe(lambda *args: None, channel)
+        try:
+            with self.cond:
+                while self.running:
+                    if self.state is not None and bool(self.state >> channel & 1) == state:
+                        return True
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        return False
+                    self.cond.wait(remaining)
+            return False
+        finally:
+            self.unsubscribe(handle)
+
+    async def wait_for_async(self, channel, state=True, timeout=2.0):
+        """wait_for의 asyncio 버전 (엣지 콜백으로 깨어남, 스레드 점유 없음)"""
+        if self.read(channel) == state:
+            return True
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def on_edge(ch, value, ts):
+            if value == state and not future.done():
+                loop.call_soon_threadsafe(lambda: future.done() or future.set_result(True))
+
+        handle = self.subscribe(on_edge, channel, "rising" if state else "falling")
+        try:
+            # 구독 직전에 바뀐 경우
+            if self.read(channel) == state:
+                return True
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.unsubscribe(handle)
+
+    # ===== 콜백 =====
+    def subscribe(self, callback, channel=None, edge="both"):
+        """엣지 콜백 등록 → 해제 핸들
+
+        Args:
+            callback: callback(channel, state, ts) - 폴링 스레드에서 호출되므로 짧게
+            channel: 채널 번호 (None이면 전체)
+            edge: "rising", "falling", "both"
+        """
+        if edge not in ("rising", "falling", "both"):
+            raise ValueError(f"잘못된 엣지 종류: {edge}")
+        mask = 0xFFFFFFFF if channel is None else 1 << channel
+        handle = (mask, edge, callback)
+        with self.cond:
+            self.callbacks = self.callbacks + [handle]
+            if self.enabled:
+                self._start_thread()
+        return handle
+
+    def unsubscribe(self, handle):
+        with self.cond:
+            self.callbacks = [entry for entry in self.callbacks if entry is not handle]
+
+    # ===== 폴링 스레드 =====
+    def _run(self):
+        next_time = time.perf_counter()
+        # stop() 후 바로 다시 시작된 경우 이전 스레드는 빠진다
+        while self.running and self.thread is threading.current_thread():
+            if not (self.keep_running or self.callbacks):
+                with self.cond:
+                    # 대기자/구독자 없음 → 멈춤 (다음 subscribe에서 다시 시작)
+                    if not (self.keep_running or self.callbacks):
+                        self.running = False
+                        self.thread = None
+                        self.state = None
+                        return
+
+            value = self.controller.read_port()
+            now = time.perf_counter()
+
+            if value is None:
+                self.read_errors += 1
+            else:
+                self._update(value, now)
+
+            next_time += self.period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # 밀린 주기는 건너뜀
+                next_time = time.perf_counter()
+
+    def _update(self, value, ts):
+        with self.cond:
+            previous = self.state
+            self.state = value
+            self.last_sample = ts
+            self.samples += 1
+            changed = 0 if previous is None else previous ^ value
+            if changed:
+                self.edges += bin(changed).count("1")
+                self.cond.notify_all()
+            elif previous is None:
+                self.cond.notify_all()
+            callbacks = self.callbacks
+
+        if not changed:
+            return
+
+        for mask, edge, callback in callbacks:
+            hits = changed & mask
+            while hits:
+                bit = hits & -hits
+                hits ^= bit
+                channel = bit.bit_length() - 1
+                state = bool(value & bit)
+                if edge == "both" or (edge == "rising") == state:
+                    try:
+                        callback(channel, state, ts)
+                    except Exception as e:
+                        print(f"✗ 입력 콜백 오류 (채널 {channel}): {e}")
+
+    def get_stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.running else 0.0
+        return {
+            "running": self.running,
+            "state": None if self.state is None else f"0x{self.state:04X}",
+            "samples": self.samples,
+            "rate_hz": round(self.samples / elapsed, 1) if elapsed > 0 else 0.0,
+            "edges": self.edges,
+            "read_errors": self.read_errors
+        }
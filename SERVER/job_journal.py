@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+class JobJournal:
+    """레고 작업 저널 (append-only JSON Lines)
+
+    플레이트 1개를 놓을 때마다 한 줄씩 추가 기록한다. 서버 재시작 후에는
+    기록을 처음부터 재생해서 작업별 상태(완료 플레이트, 툴 장착 여부)를 복원한다.
+    """
+
+    FINISHED = ("completed", "abandoned")
+
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(os.path.dirname(__file__), "journal", "lego_jobs.jsonl")
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def _append(self, record: dict):
+        """레코드 1줄 추가 (즉시 디스크 반영)"""
+        record["ts"] = round(time.time(), 3)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    # ===== 기록 =====
+    def start_job(self, shape: str, plates: list) -> str:
+        """새 작업 시작 기록"""
+        job_id = uuid.uuid4().hex[:8]
+        self._append({"event": "start", "job_id": job_id, "shape": shape, "plates": plates})
+        return job_id
+
+    def record_tool(self, job_id: str, attached: bool):
+        """툴 장착/탈착 기록"""
+        self._append({"event": "tool", "job_id": job_id, "attached": attached})
+
+    def record_placement(self, job_id: str, index: int, plate_seq: int, ok: bool):
+        """플레이트 배치 결과 기록"""
+        self._append({
+            "event": "placed", "job_id": job_id,
+            "index": index, "plate_seq": plate_seq, "ok": ok
+        })
+
+    def set_status(self, job_id: str, status: str, message: str = None):
+        """작업 상태 기록 (interrupted / completed / abandoned)"""
+        record = {"event": "status", "job_id": job_id, "status": status}
+        if message:
+            record["message"] = message
+        self._append(record)
+
+    # ===== 복원 =====
+    def load_jobs(self) -> dict:
+        """저널 재생 → 작업별 상태"""
+        jobs = {}
+        if not os.path.exists(self.path):
+            return jobs
+
+        with self.lock:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 기록 중 전원이 나간 마지막 줄은 무시
+                continue
+
+            job_id = record.get("job_id")
+            event = record.get("event")
+
+            if event in ("start", "snapshot"):
+                job = {
+                    "job_id": job_id,
+                    "shape": record["shape"],
+                    "plates": record["plates"],
+                    "completed": record.get("completed", []),
+                    "tool_attached": record.get("tool_attached", False),
+                    "status": record.get("status", "running"),
+                    "started_at": record.get("started_at", record["ts"]),
+                    "updated_at": record["ts"]
+                }
+                jobs[job_id] = job
+                continue
+
+            job = jobs.get(job_id)
+            if job is None:
+                continue
+
+            if event == "tool":
+                job["tool_attached"] = record["attached"]
+            elif event == "placed" and record["ok"]:
+                if record["index"] not in job["completed"]:
+                    job["completed"].append(record["index"])
+            elif event == "status":
+                job["status"] = record["status"]
+            job["updated_at"] = record["ts"]
+
+        return jobs
+
+    def get_job(self, job_id: str):
+        return self.load_jobs().get(job_id)
+
+    def get_resumable(self) -> list:
+        """재개 가능한 (끝나지 않은) 작업 목록"""
+        resumable = []
+        for job in self.load_jobs().values():
+            if job["status"] in self.FINISHED:
+                continue
+            job["remaining"] = len(job["plates"]) - len(job["completed"])
+            resumable.append(job)
+        return resumable
+
+    def compact(self):
+        """끝난 작업을 지우고 진행 중 작업은 스냅샷 1줄로 압축"""
+        jobs = self.load_jobs()
+        lines = []
+        for job in jobs.values():
+            if job["status"] in self.FINISHED:
+                continue
+            snapshot = {"event": "snapshot", **job, "ts": job["updated_at"]}
+            lines.append(json.dumps(snapshot, ensure_ascii=False) + "\n")
+
+        tmp_path = self.path + ".tmp"
+        with self.lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,225 @@
+import threading
+import time
+import uuid
+
+# 툴별 장착/탈착 로봇 Task (RobotController 메서드 이름)
+TOOL_TASKS = {
+    "suction": ("attach_suction", "detach_suction"),   # Task 4 / 5
+    "gripper": ("attach_gripper", "detach_gripper"),   # Task 2 / 3
+}
+
+class JobScheduler:
+    """툴 교체를 최소화하는 작업 스케줄러
+
+    대기열의 작업을 필요한 툴별로 묶어서 실행한다. 같은 툴을 쓰는 작업이
+    연속되면 탈착 → 대기 위치 → 장착을 생략하고, 툴 교체 사이에는 대기 위치
+    이동(Task 0)을 넣지 않는다. 대기열이 끝나면 툴을 탈착하고 대기 위치로 이동한다.
+    """
+
+    def __init__(self, system, home_between_changes=False):
+        self.system = system
+        self.home_between_changes = home_between_changes
+
+        self.processes = {}     # kind -> (tool, runner)
+        self.queue = []
+        self.running = False
+        self.lock = threading.Lock()
+        self.last_report = None
+
+        # 로봇 Task별 실측 소요 시간 (지수 이동 평균, 초)
+        self.task_seconds = {}
+
+    @property
+    def current_tool(self):
+        """로봇에 장착된 툴 (단독 실행/재개 등 스케줄러 밖의 장착·탈착도 반영)"""
+        return self.system.robot.tool
+
+    def register(self, kind: str, tool: str, runner):
+        """작업 종류 등록
+
+        Args:
+            kind: 작업 종류 ("lego", "block")
+            tool: 필요한 툴 (TOOL_TASKS 키)
+            runner: runner(shape, tool_attached=True, keep_tool=True) -> coroutine
+        """
+        if tool not in TOOL_TASKS:
+            raise ValueError(f"알 수 없는 툴: {tool}")
+        self.processes[kind] = (tool, runner)
+
+    def enqueue(self, kind: str, shape: str) -> dict:
+        """작업 대기열 추가"""
+        if kind not in self.processes:
+            raise ValueError(f"알 수 없는 작업 종류: {kind}")
+
+        job = {
+            "id": uuid.uuid4().hex[:8],
+            "kind": kind,
+            "shape": shape,
+            "tool": self.processes[kind][0]
+        }
+        with self.lock:
+            self.queue.append(job)
+        return job
+
+    def plan(self, jobs=None) -> list:
+        """툴별로 묶은 실행 순서 (같은 툴 안에서는 요청 순서 유지)
+
+        현재 장착된 툴의 작업을 먼저 실행해서 첫 교체를 피한다.
+        """
+        if jobs is None:
+            with self.lock:
+                jobs = list(self.queue)
+
+        tool_order = []
+        if self.current_tool:
+            tool_order.append(self.current_tool)
+        for job in jobs:
+            if job["tool"] not in tool_order:
+                tool_order.append(job["tool"])
+
+        return [job for tool in tool_order for job in jobs if job["tool"] == tool]
+
+    # ===== 로봇 툴 동작 =====
+    def _robot_task(self, name: str, counts: dict):
+        """로봇 Task 실행 및 소요 시간 기록"""
+        started = time.perf_counter()
+        response = getattr(self.system.robot, name)()
+        elapsed = time.perf_counter() - started
+
+        if response:
+            previous = self.task_seconds.get(name)
+            self.task_seconds[name] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+        counts[name] = counts.get(name, 0) + 1
+        return response
+
+    def _change_tool(self, tool, counts: dict) -> bool:
+        """현재 툴 탈착 후 새 툴 장착 (tool=None이면 탈착만)"""
+        if self.current_tool:
+            detach = TOOL_TASKS[self.current_tool][1]
+            if not self._robot_task(detach, counts):
+                print(f"✗ {detach} 실패")
+                return False
+
+            if tool is None or self.home_between_changes:
+                self._robot_task("robot_init", counts)
+
+        if tool:
+            attach = TOOL_TASKS[tool][0]
+            if not self._robot_task(attach, counts):
+                print(f"✗ {attach} 실패")
+                return False
+        return True
+
+    # ===== 실행 =====
+    async def run(self) -> dict:
+        """대기열 전체 실행"""
+        with self.lock:
+            if self.running:
+                return {"status": "busy"}
+            self.running = True
+            jobs = self.queue
+            self.queue = []
+
+        ordered = self.plan(jobs)
+        counts = {}
+        results = []
+        started = time.perf_counter()
+
+        print("\n" + "=" * 60)
+        print(f"작업 스케줄 실행: {len(ordered)}개")
+        for job in ordered:
+            print(f"  - [{job['tool']}] {job['kind']}: {job['shape']}")
+        print("=" * 60)
+
+        # 아직 시작하지 않은 작업 (중단/예외 시 finally에서 대기열로 복귀)
+        remaining = list(ordered)
+        try:
+            while remaining:
+                job = remaining[0]
+                if self.current_tool != job["tool"]:
+                    if not self._change_tool(job["tool"], counts):
+                        break
+
+                remaining.pop(0)
+                runner = self.processes[job["kind"]][1]
+                try:
+                    result = await runner(job["shape"], tool_attached=True, keep_tool=True)
+                except Exception as e:
+                    print(f"✗ 작업 오류 ({job['kind']} {job['shape']}): {e}")
+                    result = {"status": "error", "message": str(e)}
+                results.append({"job": job, "result": result})
+
+                if not result or result.get("status") != "completed":
+                    # 중단된 작업은 툴을 장착한 채로 두고 나머지 대기열 보존
+                    print(f"⚠️ 작업 중단 - 남은 {len(remaining)}개 대기열 복귀")
+                    break
+            else:
+                # 대기열 종료: 툴 탈착 후 대기 위치
+                if self.current_tool:
+                    self._change_tool(None, counts)
+        finally:
+            if remaining:
+                self._requeue(remaining)
+            with self.lock:
+                self.running = False
+
+        report = self._report(ordered, results, counts, time.perf_counter() - started)
+        self.last_report = report
+        self.system.events.publish("schedule", report)
+        return report
+
+    def _requeue(self, jobs):
+        with self.lock:
+            self.queue = jobs + self.queue
+
+    def _report(self, ordered, results, counts, elapsed) -> dict:
+        """툴 교체 생략으로 절약된 시간 계산
+
+        기준: 작업마다 장착 + 탈착 + 대기 위치 이동(탈착 후)을 각각 수행하는 경우
+        """
+        completed = len(results)
+        baseline = {"robot_init": completed}
+        for item in results:
+            attach, detach = TOOL_TASKS[item["job"]["tool"]]
+            baseline[attach] = baseline.get(attach, 0) + 1
+            baseline[detach] = baseline.get(detach, 0) + 1
+
+        skipped = {}
+        saved = 0.0
+        for name, count in baseline.items():
+            diff = count - counts.get(name, 0)
+            if diff <= 0:
+                continue
+            skipped[name] = diff
+            saved += diff * self.task_seconds.get(name, 0.0)
+
+        tool_changes = sum(n for name, n in counts.items() if name.startswith("attach_"))
+        print(f"✓ 스케줄 완료: 작업 {completed}개, 툴 장착 {tool_changes}회, "
+              f"생략 {sum(skipped.values())}회 (약 {saved:.1f}초 절약)")
+
+        return {
+            "status": "completed" if completed == len(ordered) else "interrupted",
+            "order": [job["id"] for job in ordered],
+            "jobs": [
+                {"id": item["job"]["id"], "kind": item["job"]["kind"],
+                 "shape": item["job"]["shape"],
+                 "status": (item["result"] or {}).get("status")}
+                for item in results
+            ],
+            "robot_tasks": counts,
+            "skipped_tasks": skipped,
+            "saved_seconds": round(saved, 1),
+            "elapsed_seconds": round(elapsed, 1),
+            "task_seconds": {k: round(v, 2) for k, v in self.task_seconds.items()}
+        }
+
+    def get_status(self) -> dict:
+        with self.lock:
+            queue = list(self.queue)
+        return {
+            "running": self.running,
+            "current_tool": self.current_tool,
+            "queue": queue,
+            "plan": [job["id"] for job in self.plan(queue)],
+            "last_report": self.last_report
+        }
@@ -1,118 +1,198 @@
-import json
-import os
+import time
 import asyncio
 
-def camera_to_robot(camera_x, camera_y):
-    """카메라 좌표를 로봇 좌표로 변환"""
-    robot_x = 0.0001736920 * camera_x + -0.1155149323 * camera_y + 101.5115976961
-    robot_y = -0.1155644249 * camera_x + -0.0000938678 * camera_y + 490.8506301772
-    return robot_x, robot_y
+from job_journal import JobJournal
+from cell_config import cell_path
+from pick_process import PickProcess, camera_to_robot, camera_angle_to_robot
+
+class LegoProcess(PickProcess):
+    job = "lego"
 
-class LegoProcess:
     def __init__(self, system):
-        self.system = system
-        self.coordination_path = os.path.join(
-            os.path.dirname(__file__), "..", "UI", "coordination.json"
-        )
-        self.load_coordination()
-    
-    def load_coordination(self):
-        """coordination.json 로드"""
-        with open(self.coordination_path, 'r', encoding='utf-8') as f:
-            self.coordination = json.load(f)
-        print("✓ coordination.json 로드 완료")
+        super().__init__(system, "feeder_policy")
+        
+        # 작업 저널 (끝난 작업은 시작 시 정리)
+        self.journal = JobJournal(cell_path(system.name, "journal", "lego_jobs.jsonl"))
+        self.journal.compact()
+        self.active_jobs = set()
     
     def get_green_centroids(self):
-        """카메라에서 초록색(front) 객체 좌표 리스트 가져오기"""
-        centroids = self.system.camera.get_front_centroids()
-        print(f"📷 검출된 레고 개수: {len(centroids)}")
-        return centroids
+        """카메라에서 초록색(front) 객체 (x, y, angle) 리스트 가져오기
+
+        좌표/각도는 세그멘테이션 마스크 모멘트 기반 (서브픽셀)
+        """
+        # 여러 프레임에서 확인된 트랙의 평활 좌표 우선 (없으면 마지막 프레임 결과)
+        targets = self.system.camera.get_front_targets(confirmed_only=True)
+        if not targets:
+            targets = self.system.camera.get_front_targets()
+        print(f"📷 검출된 레고 개수: {len(targets)}")
+        return targets
+    
+    def observe_tray(self):
+        return self.feeder_policy.observe(self.system.camera.get_detection_snapshot())
+    
+    async def find_targets(self):
+        return self.get_green_centroids()
+    
+    async def ensure_lego_mode(self, timeout=2.0):
+        """카메라를 레고(YOLO) 검출 모드로 전환하고 첫 결과 대기"""
+        if self.system.camera.mode == "lego":
+            return
+        self.system.camera.set_mode("lego")
+        deadline = time.perf_counter() + timeout
+        while self.system.camera.latest_detections is None and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
     
-    async def execute_lego_drawing(self, shape_name: str):
-        """레고 그림 그리기 전체 프로세스"""
+    async def execute_lego_drawing(self, shape_name: str, resume_job_id: str = None,
+                                   tool_attached: bool = False, keep_tool: bool = False):
+        """레고 그림 그리기 전체 프로세스
+
+        Args:
+            shape_name: 그림 이름 (coordination.json 키)
+            resume_job_id: 중단된 작업 ID (지정 시 남은 플레이트부터 재개)
+            tool_attached: 석션이 이미 장착되어 있음 (스케줄러가 툴 관리)
+            keep_tool: 완료 후 석션 탈착/대기 위치 이동 생략 (다음 작업도 석션 사용)
+        """
         print("\n" + "=" * 60)
-        print(f"레고 그림 그리기 시작: {shape_name}")
+        print(f"레고 그림 그리기 {'재개' if resume_job_id else '시작'}: {shape_name}")
         print("=" * 60)
         
-        # 1. 석션 장착
-        print("\n[Step 1] 석션 장착")
-        response = self.system.robot.attach_suction()
-        if not response:
-            print("✗ 석션 장착 실패")
-            return {"status": "error", "message": "석션 장착 실패"}
+        job_started = time.perf_counter()
+        
+        # 0. 작업 저널 (신규 작업 또는 중단된 작업 복원)
+        if resume_job_id:
+            job = self.journal.get_job(resume_job_id)
+            if not job or job["status"] in self.journal.FINISHED:
+                print(f"✗ 재개할 작업 없음: {resume_job_id}")
+                return {"status": "error", "message": f"재개할 작업 없음: {resume_job_id}"}
+            job_id = resume_job_id
+            plate_list = job["plates"]
+            tool_attached = tool_attached or job["tool_attached"]
+            done = set(job["completed"])
+            print(f"  작업 {job_id}: {len(done)}/{len(plate_list)} 완료 상태에서 재개")
+        else:
+            # coordination.json에서 플레이트 번호 리스트 가져오기
+            plate_list = self.coordination.get(shape_name.lower())
+            if not plate_list:
+                print(f"✗ '{shape_name}' 좌표 데이터 없음")
+                self.publish_progress(shape_name, 0, 0, "error", message=f"'{shape_name}' 데이터 없음")
+                return {"status": "error", "message": f"'{shape_name}' 데이터 없음"}
+            job_id = self.journal.start_job(shape_name, plate_list)
+            if tool_attached:
+                self.journal.record_tool(job_id, True)
+            done = set()
+        
+        if job_id in self.active_jobs:
+            print(f"✗ 이미 실행 중인 작업: {job_id}")
+            return {"status": "error", "message": f"이미 실행 중인 작업: {job_id}"}
+        
+        self.active_jobs.add(job_id)
+        try:
+            return await self._run_job(
+                shape_name, job_id, plate_list, tool_attached, keep_tool, done, job_started
+            )
+        finally:
+            self.active_jobs.discard(job_id)
+    
+    async def _run_job(self, shape_name, job_id, plate_list, tool_attached, keep_tool, done, job_started):
+        """저널에 기록하며 남은 플레이트 작업 수행"""
+        total_plates = len(plate_list)
+        pending = [i for i in range(total_plates) if i not in done]
         
-        # 2. coordination.json에서 플레이트 번호 리스트 가져오기
-        plate_list = self.coordination.get(shape_name.lower())
-        if not plate_list:
-            print(f"✗ '{shape_name}' 좌표 데이터 없음")
-            return {"status": "error", "message": f"'{shape_name}' 데이터 없음"}
+        # 1. 석션 장착 (재개 시 이미 장착되어 있으면 생략)
+        if not tool_attached:
+            print("\n[Step 1] 석션 장착")
+            self.publish_progress(shape_name, len(done), total_plates, "attaching", job_id=job_id)
+            started = time.perf_counter()
+            response = self.system.robot.attach_suction()
+            self.publish_step("attach_suction", started)
+            if not response:
+                print("✗ 석션 장착 실패")
+                self.journal.set_status(job_id, "interrupted", "석션 장착 실패")
+                self.publish_progress(shape_name, len(done), total_plates, "error", job_id=job_id, message="석션 장착 실패")
+                return {"status": "error", "job_id": job_id, "message": "석션 장착 실패"}
+            self.journal.record_tool(job_id, True)
         
-        print(f"\n[Step 2] 플레이트 리스트 로드: {len(plate_list)}개")
+        print(f"\n[Step 2] 플레이트 리스트 로드: {len(pending)}/{total_plates}개 남음")
         
         # 3. 초기 카메라 좌표 리스트 가져오기
+        await self.ensure_lego_mode()
         green_coords = self.get_green_centroids()
         
-        plate_index = 0
-        total_plates = len(plate_list)
+        interrupted = None
+        self.publish_progress(shape_name, len(done), total_plates, "running", job_id=job_id)
         
-        # 4-6. 플레이트 번호 리스트 순회
-        while plate_index < total_plates:
+        # 4-6. 남은 플레이트 순회
+        while pending:
+            plate_index = pending[0]
+            
             # 남은 초록색 객체가 없으면
             if not green_coords:
                 print("\n⚠️ 초록색 객체 없음 - 피더 동작 및 재검출")
-                
-                # 로봇 대기 위치로 이동
-                self.system.robot.robot_init()
-                
-                # 피더 바운스 동작
-                print("  - 피더 바운스 동작")
-                self.system.feeder.client.write_register(1, 10113)  # 바운스(13)
-                self.system.feeder.client.write_register(0, 1)      # 시작
-                await asyncio.sleep(0.5)
-                self.system.feeder.client.write_register(0, 0)      # 정지
-                
-                # 피더 집합 동작
-                print("  - 피더 집합 동작 3초")
-                self.system.feeder.client.write_register(1, 10114)  # 집합(14)
-                self.system.feeder.client.write_register(0, 1)      # 시작
-                await asyncio.sleep(3.0)
-                self.system.feeder.client.write_register(0, 0)      # 정지
-                
-                # 재검출
-                await asyncio.sleep(1.0)
-                green_coords = self.get_green_centroids()
+                # 피더 통신 실패 시 중단 (재개 시 이 플레이트부터)
+                green_coords, interrupted = await self.refill()
+                if interrupted:
+                    break
                 
                 if not green_coords:
                     print("✗ 여전히 객체 없음 - 프로세스 중단")
+                    interrupted = "레고 부족"
                     break
             
             # 플레이트 번호와 좌표 가져오기
             plate_seq = plate_list[plate_index]
 
             # 초록색 객체 좌표 하나 가져오기
-            roi_x, roi_y = green_coords.pop(0)
+            roi_x, roi_y, angle = green_coords.pop(0)
             camera_x = self.system.camera.roi[0] + roi_x
             camera_y = self.system.camera.roi[1] + roi_y
             
-            # 로봇 좌표로 변환
+            # 로봇 좌표로 변환 (각도는 주축 방향이므로 180° 주기)
             robot_x, robot_y = camera_to_robot(camera_x, camera_y)
+            robot_angle = camera_angle_to_robot(angle)
             
             print(f"\n[{plate_index + 1}/{total_plates}] Plate #{plate_seq}")
-            print(f"  카메라 좌표: ({camera_x}, {camera_y})")
-            print(f"  로봇 좌표: ({robot_x:.3f}, {robot_y:.3f})")
+            print(f"  카메라 좌표: ({camera_x:.1f}, {camera_y:.1f}), 각도: {angle:.1f}°")
+            print(f"  로봇 좌표: ({robot_x:.3f}, {robot_y:.3f}), 각도: {robot_angle:.1f}°")
             
             # lego_pick_place 실행
+            started = time.perf_counter()
             response = self.system.robot.lego_pick_place(
                 x=int(robot_x),
                 y=int(robot_y),
-                angle=0,
+                angle=int(round(robot_angle)),
                 plate_seq=plate_seq
             )
+            self.publish_step("pick_place", started, plate_seq=plate_seq, ok=bool(response))
+            self.journal.record_placement(job_id, plate_index, plate_seq, bool(response))
             
             if not response:
-                print(f"⚠️ Plate #{plate_seq} 작업 실패")
+                # send_task 재시도까지 실패 → 저널에 남기고 중단 (재개 시 이 플레이트부터)
+                print(f"⚠️ Plate #{plate_seq} 작업 실패 - 프로세스 중단")
+                self.system.camera.dump_recording(10.0, "pick_failed")
+                interrupted = f"Plate #{plate_seq} 작업 실패"
+                break
             
-            plate_index += 1
+            pending.pop(0)
+            done.add(plate_index)
+            self.publish_progress(shape_name, len(done), total_plates, "running", job_id=job_id)
+        
+        if interrupted:
+            # 석션은 장착된 채로 두고 재개를 기다림
+            self.journal.set_status(job_id, "interrupted", interrupted)
+            self.publish_progress(
+                shape_name, len(done), total_plates, "interrupted",
+                job_id=job_id, message=interrupted
+            )
+            print(f"\n⚠️ 작업 중단 ({len(done)}/{total_plates}) - 재개 가능: {job_id}")
+            return {
+                "status": "interrupted",
+                "job_id": job_id,
+                "shape": shape_name,
+                "completed_plates": len(done),
+                "total_plates": total_plates,
+                "message": interrupted
+            }
         
         print("\n" + "=" * 60)
         print("모든 플레이트 작업 완료")
@@ -120,28 +200,43 @@ class LegoProcess:
         
         # 7. 완료 후 처리
         print("\n[최종 단계] 마무리")
+        self.publish_progress(shape_name, len(done), total_plates, "finishing", job_id=job_id)
+        started = time.perf_counter()
         
         # 대기 위치로 이동
         print("  - 대기 위치로 이동")
         self.system.robot.robot_init()
         
-        # 실린더 1번 pulse
-        print("  - 실린더 1번 pulse")
-        self.system.cylinder.cylinder_1_pulse(on_time=1.0, off_time=1.0)
+        # 실린더 1번 pulse (카드 없는 셀은 생략)
+        if self.system.cylinder.connected:
+            print("  - 실린더 1번 pulse")
+            await asyncio.wrap_future(self.system.cylinder.pulse_async(1, on_time=1.0, off_time=1.0))
+        else:
+            print("  ⚠️ 실린더 미연결 - pulse 생략")
         
-        # 석션 탈착
-        print("  - 석션 탈착")
-        self.system.robot.detach_suction()
+        if not keep_tool:
+            # 석션 탈착
+            print("  - 석션 탈착")
+            self.system.robot.detach_suction()
+            self.journal.record_tool(job_id, False)
 
-        # 대기 위치로 이동
-        print("  - 대기 위치로 이동")
-        self.system.robot.robot_init()
+            # 대기 위치로 이동
+            print("  - 대기 위치로 이동")
+            self.system.robot.robot_init()
+        self.journal.set_status(job_id, "completed")
 
+        self.publish_step("finish", started)
+        
         print("\n✓ 레고 그림 그리기 완료!")
+        self.publish_progress(
+            shape_name, len(done), total_plates, "completed",
+            job_id=job_id, seconds=round(time.perf_counter() - job_started, 3)
+        )
 
         return {
             "status": "completed",
+            "job_id": job_id,
             "shape": shape_name,
             "total_plates": total_plates,
             "message": "레고 그림 그리기 완료"
-        }
\ No newline at end of file
+        }
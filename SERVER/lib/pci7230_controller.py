@@ -2,7 +2,7 @@ import ctypes
 import os
 
 class PCI7230Controller:
-    def __init__(self, dll_path='pci7230_wrapper.dll'):
+    def __init__(self, dll_path='pci7230_wrapper.dll', verbose=True):
         if not os.path.exists(dll_path):
             raise FileNotFoundError(f"DLL 없음: {dll_path}")
         
@@ -26,6 +26,15 @@ class PCI7230Controller:
         self.dll.PCI7230_ReadPort.argtypes = [ctypes.POINTER(ctypes.c_uint32)]  # c_ushort -> c_uint32
         self.dll.PCI7230_ReadPort.restype = ctypes.c_short
         
+        # 출력 포트 읽기 (DO_ReadPort) - 새 wrapper DLL에만 있음
+        try:
+            self.dll.PCI7230_ReadOutputPort.argtypes = [ctypes.POINTER(ctypes.c_uint32)]
+            self.dll.PCI7230_ReadOutputPort.restype = ctypes.c_short
+            self.can_read_output = True
+        except AttributeError:
+            self.can_read_output = False
+        
+        self.verbose = verbose
         self.connected = False
     
     def connect(self, card_number=0):
@@ -53,7 +62,8 @@ class PCI7230Controller:
             print(f"✗ 채널 {channel} 제어 실패")
             return False
         
-        print(f"✓ 채널 {channel}: {'ON' if state else 'OFF'}")
+        if self.verbose:
+            print(f"✓ 채널 {channel}: {'ON' if state else 'OFF'}")
         return True
     
     def read_channel(self, channel):
@@ -73,7 +83,8 @@ class PCI7230Controller:
         if result < 0:
             print(f"✗ 포트 쓰기 실패")
             return False
-        print(f"✓ 포트 출력: 0x{value:08X}")
+        if self.verbose:
+            print(f"✓ 포트 출력: 0x{value:08X}")
         return True
     
     def read_port(self):
@@ -83,7 +94,18 @@ class PCI7230Controller:
         result = self.dll.PCI7230_ReadPort(ctypes.byref(value))
         if result < 0:
             return None
-        print(f"📥 포트 입력: 0x{value.value:08X}")
+        if self.verbose:
+            print(f"📥 포트 입력: 0x{value.value:08X}")
+        return value.value
+    
+    def read_output_port(self):
+        """출력 포트 현재 값 읽기 (지원하지 않는 DLL이면 None)"""
+        if not self.connected or not self.can_read_output:
+            return None
+        value = ctypes.c_uint32()
+        result = self.dll.PCI7230_ReadOutputPort(ctypes.byref(value))
+        if result < 0:
+            return None
         return value.value
     
     def __enter__(self):
@@ -0,0 +1,86 @@
+import numpy as np
+
+def _reductions(masks):
+    """마스크 (N,H,W) → 행 합 (N,H), 열 합 (N,W), x 가중 행 합 (N,H)
+
+    torch 텐서면 장치(GPU/CPU)에서 줄인 뒤 작은 배열만 NumPy로 옮긴다.
+    """
+    if hasattr(masks, "cpu"):
+        masks = masks.float()
+        xs = masks.new_tensor(np.arange(masks.shape[2], dtype=np.float32))
+        row_sum = masks.sum(dim=2)
+        col_sum = masks.sum(dim=1)
+        row_x = masks @ xs
+        return (row_sum.cpu().numpy().astype(np.float64),
+                col_sum.cpu().numpy().astype(np.float64),
+                row_x.cpu().numpy().astype(np.float64))
+
+    masks = np.asarray(masks, dtype=np.float32)
+    xs = np.arange(masks.shape[2], dtype=np.float32)
+    return (masks.sum(axis=2).astype(np.float64),
+            masks.sum(axis=1).astype(np.float64),
+            (masks @ xs).astype(np.float64))
+
+def mask_moments(masks):
+    """모든 마스크의 무게중심과 주축 각도 (한 번의 배치 계산)
+
+    Args:
+        masks: (N,H,W) 0/1 마스크 (NumPy 배열 또는 torch 텐서)
+
+    Returns:
+        centers (N,2) float64 - 마스크 좌표, angles (N,) 도 [-90, 90), area (N,)
+    """
+    n, h, w = masks.shape
+    if n == 0:
+        return np.zeros((0, 2)), np.zeros(0), np.zeros(0)
+
+    row_sum, col_sum, row_x = _reductions(masks)
+    xs = np.arange(w, dtype=np.float64)
+    ys = np.arange(h, dtype=np.float64)
+
+    m00 = row_sum.sum(axis=1)
+    safe = np.maximum(m00, 1e-9)
+    cx = (col_sum @ xs) / safe
+    cy = (row_sum @ ys) / safe
+
+    # 중심 2차 모멘트 (원점 모멘트에서 변환)
+    mu20 = (col_sum @ (xs * xs)) / safe - cx * cx
+    mu02 = (row_sum @ (ys * ys)) / safe - cy * cy
+    mu11 = (row_x @ ys) / safe - cx * cy
+
+    angles = np.degrees(0.5 * np.arctan2(2 * mu11, mu20 - mu02))
+    angles = (angles + 90.0) % 180.0 - 90.0
+    return np.stack([cx, cy], axis=1), angles, m00
+
+def letterbox_to_image(points, mask_shape, image_shape):
+    """마스크(레터박스 입력 크기) 좌표 → 원본 이미지 좌표 (ultralytics scale_boxes와 동일한 변환)"""
+    mh, mw = mask_shape
+    ih, iw = image_shape
+    gain = min(mh / ih, mw / iw)
+    pad_x = (mw - iw * gain) / 2
+    pad_y = (mh - ih * gain) / 2
+    # 픽셀 중심 기준으로 변환
+    out = np.empty_like(points)
+    out[:, 0] = (points[:, 0] + 0.5 - pad_x) / gain - 0.5
+    out[:, 1] = (points[:, 1] + 0.5 - pad_y) / gain - 0.5
+    return out
+
+def pick_points(masks, image_shape, boxes):
+    """세그멘테이션 마스크 → 픽업 점 (서브픽셀)과 각도
+
+    마스크가 비어 있는 검출은 박스 중심, 각도 0으로 대체한다.
+
+    Returns:
+        centers (N,2) float32 - 이미지 좌표, angles (N,) float32 도
+    """
+    box_centers = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+    if masks is None or len(boxes) == 0:
+        return box_centers.astype(np.float32), np.zeros(len(boxes), np.float32)
+
+    centers, angles, area = mask_moments(masks)
+    centers = letterbox_to_image(centers, masks.shape[1:], image_shape)
+
+    valid = area > 0
+    centers = np.where(valid[:, None], centers, box_centers)
+    angles = np.where(valid, angles, 0.0)
+    return centers.astype(np.float32), angles.astype(np.float32)
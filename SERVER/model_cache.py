@@ -0,0 +1,139 @@
+"""YOLO 모델 캐시 로드와 예열(warm-up)
+
+.pt를 매번 언피클하고 첫 추론에서 레이어 융합/메모리 할당을 하면 서버 시작 후 첫 검출이
+느리다. .pt 파일 해시를 키로 내보낸 형식(ONNX/TorchScript)을 model_cache/에 저장해 두고
+다음 시작부터는 그 파일을 바로 읽는다. 로드 후 참조 ROI 이미지로 예열 추론을 한 번 돌린다.
+
+    FLEXIBOT_MODEL_FORMAT=pt|onnx|torchscript        (기본 pt: 검증된 .pt 그대로, 나머지는 명시적으로 선택)
+    FLEXIBOT_WARMUP_IMAGE=<경로>                     (기본: MODEL/data_lego/lego_1.png)
+
+ONNX는 dynamic=True로 내보내 배치 크기/입력 크기(타일, 확대 추론)가 달라도 쓸 수 있다.
+TorchScript는 입력 크기가 고정이므로 plain 추론에만 적합하다.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import time
+
+import numpy as np
+from ultralytics import YOLO
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "model_cache")
+FORMATS = ("pt", "onnx", "torchscript")
+DEFAULT_WARMUP_IMAGE = os.path.join(os.path.dirname(__file__), "..", "MODEL", "data_lego", "lego_1.png")
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def default_format():
+    """모델 형식 (기본 pt)
+
+    ONNX/TorchScript는 후처리(NMS)와 수치가 .pt와 조금씩 달라 검증된 .pt에서 자동으로
+    바꾸지 않는다. FLEXIBOT_MODEL_FORMAT으로 켰는데 onnxruntime이 없으면 pt로 로드한다.
+    """
+    fmt = os.environ.get("FLEXIBOT_MODEL_FORMAT", "pt")
+    if fmt == "onnx" and not importlib.util.find_spec("onnxruntime"):
+        print("⚠️ FLEXIBOT_MODEL_FORMAT=onnx 이지만 onnxruntime 없음 - .pt 로드")
+        return "pt"
+    if fmt not in FORMATS:
+        raise ValueError(f"Invalid model format: {fmt}")
+    return fmt
+
+def _export(model_path, fmt, cached, meta_path, imgsz):
+    """.pt → fmt 내보내기 후 캐시 폴더로 이동"""
+    source = YOLO(model_path)
+    exported = source.export(format=fmt, imgsz=imgsz, dynamic=(fmt == "onnx"), verbose=False)
+    os.replace(str(exported), cached)
+    meta = {"source": os.path.abspath(model_path), "format": fmt, "task": source.task, "imgsz": imgsz}
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+def load_model(model_path, fmt=None, imgsz=640, cache_dir=CACHE_DIR):
+    """캐시된 형식으로 모델 로드 → (model, report)
+
+    캐시가 없거나 내보내기에 실패하면 .pt를 그대로 로드한다.
+    """
+    fmt = fmt or default_format()
+    started = time.perf_counter()
+    report = {"path": model_path, "format": "pt", "cache": None}
+
+    if fmt != "pt":
+        try:
+            digest = file_hash(model_path)
+            stem = os.path.splitext(os.path.basename(model_path))[0]
+            cached = os.path.join(cache_dir, f"{stem}-{digest[:16]}-{imgsz}.{fmt}")
+            meta_path = cached + ".json"
+            report["sha256"] = digest
+
+            if os.path.exists(cached) and os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                report["cache"] = "hit"
+            else:
+                os.makedirs(cache_dir, exist_ok=True)
+                export_started = time.perf_counter()
+                meta = _export(model_path, fmt, cached, meta_path, imgsz)
+                report["cache"] = "miss"
+                report["export_seconds"] = round(time.perf_counter() - export_started, 2)
+
+            model = YOLO(cached, task=meta["task"])
+            report.update(format=fmt, cached_path=cached)
+        except Exception as e:
+            print(f"⚠️ 모델 캐시 사용 실패 ({fmt}) - .pt 로드: {e}")
+            model = YOLO(model_path)
+    else:
+        model = YOLO(model_path)
+
+    report["load_seconds"] = round(time.perf_counter() - started, 3)
+    cache = f", 캐시 {report['cache']}" if report["cache"] else ""
+    print(f"✓ 모델 로드: {model_path} ({report['format']}{cache}, {report['load_seconds']:.2f}초)")
+    return model, report
+
+def reference_image(shape=(978, 1256, 3)):
+    """예열용 참조 ROI 이미지 (없으면 같은 크기의 빈 이미지)"""
+    path = os.environ.get("FLEXIBOT_WARMUP_IMAGE", DEFAULT_WARMUP_IMAGE)
+    if os.path.exists(path):
+        import cv2
+        image = cv2.imread(path)
+        if image is not None:
+            return image
+    return np.zeros(shape, np.uint8)
+
+def reference_images(directory=None, limit=5):
+    """검증용 참조 ROI 이미지 목록 (FLEXIBOT_REFERENCE_DIR, 기본: MODEL/data_lego)"""
+    import cv2
+    directory = directory or os.environ.get("FLEXIBOT_REFERENCE_DIR", os.path.dirname(DEFAULT_WARMUP_IMAGE))
+    images = []
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            if len(images) >= limit:
+                break
+            if name.lower().endswith((".png", ".jpg", ".jpeg")):
+                image = cv2.imread(os.path.join(directory, name))
+                if image is not None:
+                    images.append(image)
+    return images or [reference_image()]
+
+def warm_up(model, image, report, imgsz=None):
+    """예열 추론 1회 (그래프 준비/메모리 할당을 시작 시점으로 당김) → report 갱신"""
+    started = time.perf_counter()
+    if imgsz is None:
+        model(image, verbose=False)
+    else:
+        model(image, imgsz=imgsz, verbose=False)
+    report["warmup_seconds"] = round(time.perf_counter() - started, 3)
+    report["startup_seconds"] = round(report["load_seconds"] + report["warmup_seconds"], 3)
+    print(f"✓ 모델 예열: {report['warmup_seconds']:.2f}초 (시작 총 {report['startup_seconds']:.2f}초)")
+    return report
+
+def record_first_frame(report, seconds):
+    """예열 후 첫 실제 프레임 추론 시간 기록 (한 번만)"""
+    if "first_frame_ms" not in report:
+        report["first_frame_ms"] = round(seconds * 1000, 1)
+        print(f"✓ 첫 프레임 추론: {report['first_frame_ms']:.1f}ms")
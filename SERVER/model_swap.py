@@ -0,0 +1,151 @@
+"""검출 모델 무중단 교체
+
+재학습한 모델을 서버 재시작 없이 적용한다 (재시작하면 로봇 Task 0/1 초기화와 실린더
+펄스까지 다시 돌아 몇 분이 걸린다). 백그라운드에서 로드 → 참조 이미지 검증 → 공유 추론
+서비스의 배치 사이에서 교체하고, 이전 모델은 롤백용으로 보관한다.
+
+.pt 로드는 언피클(임의 코드 실행)이므로 MODEL/ 폴더 안의 .pt 파일 이름만 받는다.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+from detections import result_arrays
+from model_cache import load_model, reference_image, reference_images, warm_up
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "MODEL")
+
+def resolve_model(name, model_dir=MODEL_DIR):
+    """모델 파일 이름 → MODEL/ 안의 절대 경로
+
+    Raises:
+        ValueError: 경로 구분자/상위 폴더 포함, .pt가 아님, MODEL/ 밖을 가리킴 (심볼릭 링크 포함)
+        FileNotFoundError: 파일 없음
+    """
+    if not name or os.path.basename(name) != name or name in (".", "..") or "\\" in name:
+        raise ValueError(f"모델 파일 이름만 허용: {name!r}")
+    if not name.lower().endswith(".pt"):
+        raise ValueError(f".pt 모델만 허용: {name}")
+
+    root = os.path.realpath(model_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"MODEL 폴더 밖의 모델: {name}")
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"모델 파일 없음: {name}")
+    return path
+
+class ModelSwapper:
+    """InferenceService 모델 교체 관리
+
+    검증 기준 (force=True면 검증 결과와 무관하게 교체):
+      - 새 모델이 참조 이미지 전부에서 오류 없이 추론
+      - 클래스 이름이 현재 모델과 같음
+      - 기준 신뢰도 이상 검출 수가 현재 모델의 min_ratio배 이상
+    """
+
+    def __init__(self, service, conf_threshold=0.8, min_ratio=0.5, max_images=5, model_dir=MODEL_DIR):
+        self.service = service
+        self.model_dir = model_dir
+        self.conf_threshold = conf_threshold
+        self.min_ratio = min_ratio
+        self.max_images = max_images
+
+        self.lock = threading.Lock()
+        self.state = "idle"         # idle / loading / warming / validating / swapped / rejected / failed
+        self.last = None            # 마지막 교체 시도 결과
+
+    @property
+    def busy(self):
+        return self.state in ("loading", "warming", "validating")
+
+    def start(self, name, force=False):
+        """백그라운드 교체 시작 (ValueError, FileNotFoundError, RuntimeError는 호출자가 변환)
+
+        Args:
+            name: MODEL/ 폴더 안의 .pt 파일 이름
+        """
+        path = resolve_model(name, self.model_dir)
+        with self.lock:
+            if self.busy:
+                raise RuntimeError(f"모델 교체 진행 중 ({self.state})")
+            self.state = "loading"
+            self.last = {"path": path, "force": force, "started": time.time()}
+        threading.Thread(target=self._run, args=(path, force), daemon=True).start()
+
+    def _run(self, path, force):
+        last = self.last
+        try:
+            model, report = load_model(path)
+            # 시작 시와 같은 예열을 교체 전에 (첫 실제 프레임이 콜드 스타트 비용을 내지 않도록)
+            self.state = "warming"
+            warm_up(model, reference_image(), report)
+            last["warmup_seconds"] = report["warmup_seconds"]
+            self.state = "validating"
+            validation = self.validate(model)
+            last["validation"] = validation
+
+            if validation["ok"] or force:
+                self.service.swap_model(model, report, path)
+                self.state = "swapped"
+            else:
+                self.state = "rejected"
+                print(f"⚠️ 모델 교체 거부: {validation['reason']}")
+        except Exception as e:
+            last["error"] = str(e)
+            self.state = "failed"
+            print(f"✗ 모델 교체 실패: {e}")
+        last["state"] = self.state
+        last["seconds"] = round(time.time() - last["started"], 2)
+
+    def _counts(self, results, images):
+        return [
+            int((result_arrays(result, image.shape)[2] >= self.conf_threshold).sum())
+            for result, image in zip(results, images)
+        ]
+
+    def validate(self, model):
+        """참조 이미지에서 새 모델과 현재 모델 비교"""
+        images = reference_images(limit=self.max_images)
+
+        # 새 모델은 아직 이 스레드만 쓰므로 직접 호출 (예열은 _run에서 끝남)
+        results, times = [], []
+        for image in images:
+            started = time.perf_counter()
+            results.extend(model(image, verbose=False))
+            times.append(time.perf_counter() - started)
+        new_counts = self._counts(results, images)
+
+        # 현재 모델은 서비스 스레드에서만 호출 (배치 대기열로 요청)
+        current = self.service.submit("model_validation", images).result(timeout=60.0)
+        current_counts = self._counts(current, images)
+
+        validation = {
+            "images": len(images),
+            "new_counts": new_counts,
+            "current_counts": current_counts,
+            "new_ms": round(float(np.mean(times)) * 1000, 1),
+            "ok": True,
+            "reason": None
+        }
+        if model.names != self.service.model.names:
+            validation.update(ok=False, reason=f"클래스 이름 불일치: {model.names}")
+        elif sum(new_counts) < self.min_ratio * sum(current_counts):
+            validation.update(ok=False, reason=f"검출 수 감소 ({sum(current_counts)} → {sum(new_counts)})")
+        return validation
+
+    def rollback(self):
+        ok = self.service.rollback_model("manual")
+        if ok:
+            self.state = "idle"
+        return ok
+
+    def get_status(self):
+        return {
+            "state": self.state,
+            "current": self.service.model_path,
+            "previous": self.service.previous[2] if self.service.previous else None,
+            "last": self.last
+        }
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import math
+import os
+import time
+
+from cell_config import cell_dir
+from feeder_policy import FeederPolicy, ACTION_NAMES
+
+def camera_to_robot(camera_x, camera_y):
+    """카메라 좌표를 로봇 좌표로 변환"""
+    robot_x = 0.0001736920 * camera_x + -0.1155149323 * camera_y + 101.5115976961
+    robot_y = -0.1155644249 * camera_x + -0.0000938678 * camera_y + 490.8506301772
+    return robot_x, robot_y
+
+def camera_angle_to_robot(angle, period=180.0):
+    """카메라(이미지) 좌표계 각도 → 로봇 좌표계 각도 (도)
+
+    camera_to_robot의 선형 부분으로 방향 벡터를 변환한다. 축을 맞바꾸고 부호를 뒤집는
+    반사 변환이라 대략 90° - θ가 된다 (각도를 그대로 넘기면 회전 방향이 반대).
+    결과는 물체 대칭 주기 period로 [-period/2, period/2) 범위에 맞춘다.
+    """
+    theta = math.radians(angle)
+    origin_x, origin_y = camera_to_robot(0.0, 0.0)
+    tip_x, tip_y = camera_to_robot(math.cos(theta), math.sin(theta))
+    robot = math.degrees(math.atan2(tip_y - origin_y, tip_x - origin_x))
+    return (robot + period / 2) % period - period / 2
+
+class PickProcess:
+    """레고/블럭 픽앤플레이스 작업 공통 부분
+
+    좌표 데이터(coordination.json), 진행 이벤트 발행, 트레이 상태 기반 피더 재공급을
+    담당한다. 하위 클래스는 job(이벤트 이름), observe_tray(), find_targets()를 정한다.
+    """
+
+    job = None
+
+    def __init__(self, system, policy_name):
+        self.system = system
+        self.coordination_path = os.path.join(
+            os.path.dirname(__file__), "..", "UI", "coordination.json"
+        )
+        self.load_coordination()
+
+        # 트레이 상태 기반 피더 동작 선택 (작업 종류별로 실적을 따로 쌓음)
+        self.feeder_policy = FeederPolicy(log_dir=cell_dir(system.name, "logs"), name=policy_name)
+
+    def load_coordination(self):
+        """coordination.json 로드"""
+        with open(self.coordination_path, 'r', encoding='utf-8') as f:
+            self.coordination = json.load(f)
+        print("✓ coordination.json 로드 완료")
+
+    def publish_progress(self, shape_name, plate, total, status, **extra):
+        """작업 진행률 이벤트 발행"""
+        self.system.events.publish("job_progress", {
+            "job": self.job,
+            "shape": shape_name,
+            "plate": plate,
+            "total": total,
+            "status": status,
+            **extra
+        })
+
+    def publish_step(self, step, started, **extra):
+        """단계별 소요 시간 이벤트 발행"""
+        self.system.events.publish("job_step", {
+            "job": self.job,
+            "step": step,
+            "seconds": round(time.perf_counter() - started, 3),
+            **extra
+        })
+
+    def observe_tray(self) -> dict:
+        """현재 트레이 상태 (FeederPolicy.observe 형식)"""
+        raise NotImplementedError
+
+    async def find_targets(self) -> list:
+        """픽업 대상 [(x, y, angle), ...] - ROI 좌표"""
+        raise NotImplementedError
+
+    async def refill(self):
+        """트레이 상태에 맞는 피더 동작 후 재검출 → (targets, 중단 사유 또는 None)
+
+        피더 통신이 재연결 대기 한도를 넘겨 실패하면 targets는 빈 리스트다.
+        """
+        started = time.perf_counter()
+        policy = self.feeder_policy
+
+        state = self.observe_tray()
+        recipe = policy.choose(state)
+        print(f"  - 트레이 상태: {state['condition']} "
+              f"(앞면 {state['front']}, 뒷면 {state['back']})")
+
+        # 로봇 대기 위치로 이동
+        self.system.robot.robot_init()
+
+        # 피더 동작
+        feeder_started = time.perf_counter()
+        try:
+            for action, duration in recipe:
+                print(f"  - 피더 {ACTION_NAMES.get(action, action)} 동작 {duration}초")
+                await self.system.feeder.run_action(action, duration)
+        except IOError as e:
+            print(f"✗ 피더 통신 실패 - 프로세스 중단: {e}")
+            return [], f"피더 통신 실패: {e}"
+        feeder_elapsed = time.perf_counter() - feeder_started
+
+        # 재검출
+        await asyncio.sleep(policy.settle_time)
+        targets = await self.find_targets()
+        policy.record(state, recipe, self.observe_tray(), feeder_elapsed)
+        self.publish_step(
+            "feeder_refill", started, found=len(targets),
+            condition=state["condition"], recipe=policy.recipe_key(recipe)
+        )
+        return targets, None
@@ -1,6 +1,9 @@
 import socket
 import time
 
+# 툴 장착/탈착 Task → 완료 후 장착된 툴 (None: 없음)
+TOOL_CHANGES = {2: "gripper", 3: None, 4: "suction", 5: None}
+
 class RobotController:
     
     def __init__(self, host='192.168.0.10', port=64512, max_retries=3, max_connect_retries=100):
@@ -19,6 +22,10 @@ class RobotController:
         self.max_connect_retries = max_connect_retries
         self.sock = None
         self.connected = False
+        
+        # 현재 장착된 툴 ("suction", "gripper", None) - 장착/탈착 Task 성공 시 갱신
+        # (스케줄러, 단독 실행 API, 로봇 Task API 등 모든 경로가 같은 값을 봄)
+        self.tool = None
     
     def connect(self):
         """로봇 연결 (최대 100회 시도)"""
@@ -100,6 +107,8 @@ class RobotController:
                     continue
                 
                 print(f"← 응답: {response}")
+                if task_num in TOOL_CHANGES:
+                    self.tool = TOOL_CHANGES[task_num]
                 return response
                 
             except socket.timeout:
@@ -0,0 +1,364 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+from cylinder_controller import channel_mask
+
+# 단계 종류별 필수 파라미터
+REQUIRED_PARAMS = {
+    "cylinder": ("cylinder", "action"),
+    "robot": ("task",),
+    "light": ("on",),
+    "feeder": ("action", "duration"),
+    "wait": ("duration",),
+    "input": ("channel",),
+    "camera": (),
+    "parallel": ("branches",)
+}
+
+CYLINDER_ACTIONS = ("on", "off", "pulse")
+
+# 같은 장치를 쓰는 단계는 병렬 분기에서도 순서대로 실행
+RESOURCES = {"robot": "robot", "light": "feeder", "feeder": "feeder"}
+
+class CompiledStep:
+    """검증이 끝난 실행 단계 (의존 단계가 모두 끝나면 실행)"""
+
+    def __init__(self, index, step_id, step_type, params, deps, label):
+        self.index = index          # 결과 정렬 순서
+        self.id = step_id
+        self.type = step_type
+        self.params = params
+        self.deps = deps            # 먼저 끝나야 하는 단계 id 목록
+        self.label = label          # 원래 시퀀스에서의 위치 (예: "3", "3.b1.2")
+
+    def to_dict(self):
+        return {"id": self.id, "step": self.label, "type": self.type, "after": list(self.deps)}
+
+class CompiledSequence:
+    def __init__(self, name, steps, source):
+        self.name = name
+        self.steps = steps
+        self.source = source        # 원본 단계 (저장/재컴파일용)
+
+    def levels(self):
+        """동시에 시작할 수 있는 단계 묶음 (실행 계획 표시용)"""
+        depth = {}
+        for step in self.steps:
+            depth[step.id] = 1 + max((depth[dep] for dep in step.deps), default=-1)
+        plan = {}
+        for step in self.steps:
+            plan.setdefault(depth[step.id], []).append(step.id)
+        return [plan[level] for level in sorted(plan)]
+
+def _check_params(step_type, params, where):
+    if step_type not in REQUIRED_PARAMS:
+        raise ValueError(f"{where}: 알 수 없는 단계 종류 '{step_type}'")
+    missing = [key for key in REQUIRED_PARAMS[step_type] if key not in params]
+    if missing:
+        raise ValueError(f"{where}: {step_type} 파라미터 누락 {missing}")
+
+    if step_type == "cylinder":
+        if params["action"] not in CYLINDER_ACTIONS:
+            raise ValueError(f"{where}: 잘못된 실린더 동작 '{params['action']}'")
+        cylinders = params["cylinder"]
+        try:
+            channel_mask(*(cylinders if isinstance(cylinders, list) else [cylinders]))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{where}: {e}")
+    elif step_type in ("wait", "feeder") and float(params["duration"]) < 0:
+        raise ValueError(f"{where}: duration은 0 이상이어야 함")
+    elif step_type == "parallel":
+        branches = params["branches"]
+        if not isinstance(branches, list) or not all(isinstance(b, list) for b in branches):
+            raise ValueError(f"{where}: branches는 단계 리스트의 리스트여야 함")
+
+def compile_sequence(name, steps):
+    """단계 리스트 → 단계 그래프
+
+    기본은 앞 단계가 끝난 뒤 실행(기존 직렬 동작). 병렬 실행 방법:
+      - "after": [id, ...] 로 의존 단계를 직접 지정 ([]이면 바로 시작)
+      - {"type": "parallel", "params": {"branches": [[...], [...]]}}
+        분기들은 동시에 실행되고, 다음 단계는 모든 분기가 끝난 뒤 실행
+
+    Args:
+        steps: [{"type", "params", "id"(선택), "after"(선택)}, ...]
+
+    Raises:
+        ValueError: 알 수 없는 단계, 누락된 파라미터, 없는 의존 id, 순환
+    """
+    compiled = []
+    ids = set()
+
+    def add(raw, label, default_deps):
+        step_type = raw.get("type")
+        params = raw.get("params") or {}
+        where = f"Step {label}"
+        _check_params(step_type, params, where)
+
+        step_id = str(raw.get("id") or f"s{label}")
+        if step_id in ids:
+            raise ValueError(f"{where}: 중복된 id '{step_id}'")
+        ids.add(step_id)
+
+        after = raw.get("after")
+        deps = [str(dep) for dep in after] if after is not None else list(default_deps)
+
+        if step_type != "parallel":
+            compiled.append(CompiledStep(len(compiled), step_id, step_type, params, deps, label))
+            return [step_id]
+
+        # 분기 진입/합류 지점을 빈 단계 대신 의존 관계로 표현
+        tails = []
+        for b, branch in enumerate(params["branches"], 1):
+            prev = deps
+            for n, child in enumerate(branch, 1):
+                prev = add(child, f"{label}.b{b}.{n}", prev)
+            tails.extend(prev)
+        return tails or deps
+
+    prev = []
+    for i, raw in enumerate(steps, 1):
+        prev = add(raw, str(i), prev)
+
+    # 의존 id 확인 및 순환 검사 (위상 정렬)
+    by_id = {step.id: step for step in compiled}
+    for step in compiled:
+        unknown = [dep for dep in step.deps if dep not in by_id]
+        if unknown:
+            raise ValueError(f"Step {step.label}: 없는 의존 단계 {unknown}")
+
+    indegree = {step.id: len(step.deps) for step in compiled}
+    children = {step.id: [] for step in compiled}
+    for step in compiled:
+        for dep in step.deps:
+            children[dep].append(step.id)
+    ready = [step_id for step_id, count in indegree.items() if count == 0]
+    visited = 0
+    while ready:
+        step_id = ready.pop()
+        visited += 1
+        for child in children[step_id]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+    if visited != len(compiled):
+        raise ValueError("단계 의존 관계에 순환이 있음")
+
+    # levels()가 의존 단계를 먼저 보도록 위상 순서로 정렬
+    order = []
+    done = set()
+    pending = list(compiled)
+    while pending:
+        rest = []
+        for step in pending:
+            if all(dep in done for dep in step.deps):
+                order.append(step)
+                done.add(step.id)
+            else:
+                rest.append(step)
+        pending = rest
+
+    return CompiledSequence(name, order, steps)
+
+class SequenceEngine:
+    """컴파일된 시퀀스 저장 및 병렬 실행"""
+
+    def __init__(self, system, store_path=None):
+        self.system = system
+        if store_path is None:
+            store_path = os.path.join(os.path.dirname(__file__), "sequences", "sequences.json")
+        self.store_path = store_path
+        self.lock = threading.Lock()
+        self.sequences = {}
+        self._load()
+
+    # ===== 저장 =====
+    def register(self, name, steps, save=True) -> CompiledSequence:
+        """검증/컴파일 후 이름으로 저장 (ValueError는 호출자가 400으로 변환)"""
+        sequence = compile_sequence(name, steps)
+        with self.lock:
+            self.sequences[name] = sequence
+            if save:
+                self._save()
+        return sequence
+
+    def get(self, name):
+        return self.sequences.get(name)
+
+    def list(self):
+        return [
+            {"name": name, "steps": len(sequence.steps), "plan": sequence.levels()}
+            for name, sequence in self.sequences.items()
+        ]
+
+    def _load(self):
+        if not os.path.exists(self.store_path):
+            return
+        try:
+            with open(self.store_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ 저장된 시퀀스 로드 실패: {e}")
+            return
+        for name, steps in stored.items():
+            try:
+                self.sequences[name] = compile_sequence(name, steps)
+            except ValueError as e:
+                print(f"⚠️ 시퀀스 '{name}' 컴파일 실패: {e}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.store_path), exist_ok=True)
+        data = {name: sequence.source for name, sequence in self.sequences.items()}
+        tmp_path = self.store_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.store_path)
+
+    # ===== 실행 =====
+    async def run(self, sequence: CompiledSequence, stop_on_error=False):
+        """단계 그래프 실행 → 단계별 시작 시각/소요 시간 포함 결과
+
+        Args:
+            stop_on_error: 실패한 단계에 의존하는 단계를 건너뜀 (기본은 기존처럼 계속 실행)
+        """
+        print(f"\n시퀀스 실행: {sequence.name} ({len(sequence.steps)}단계)")
+        print("=" * 40)
+
+        started = time.perf_counter()
+        locks = {resource: asyncio.Lock() for resource in set(RESOURCES.values())}
+        tasks = {}
+        results = {}
+
+        async def run_step(step):
+            failed = False
+            for dep in step.deps:
+                ok = await tasks[dep]
+                failed = failed or not ok
+
+            result = {"step": step.label, "id": step.id, "type": step.type}
+            if failed and stop_on_error:
+                result["skipped"] = True
+                results[step.id] = result
+                return False
+
+            lock = locks.get(RESOURCES.get(step.type))
+            step_started = time.perf_counter()
+            try:
+                if lock:
+                    async with lock:
+                        step_started = time.perf_counter()
+                        result.update(await self._execute(step))
+                else:
+                    result.update(await self._execute(step))
+                ok = True
+            except Exception as e:
+                result["error"] = str(e)
+                print(f"  ✗ Step {step.label} 오류: {e}")
+                ok = False
+
+            result["start"] = round(step_started - started, 3)
+            result["seconds"] = round(time.perf_counter() - step_started, 3)
+            results[step.id] = result
+            return ok
+
+        for step in sequence.steps:
+            tasks[step.id] = asyncio.ensure_future(run_step(step))
+        await asyncio.gather(*tasks.values())
+
+        total = time.perf_counter() - started
+        ordered = [results[step.id] for step in sorted(sequence.steps, key=lambda s: s.index)]
+        serial = sum(r.get("seconds", 0.0) for r in ordered)
+
+        print("=" * 40)
+        print(f"시퀀스 완료 ({total:.2f}초, 직렬 합계 {serial:.2f}초)\n")
+
+        return {
+            "status": "completed",
+            "sequence": sequence.name,
+            "seconds": round(total, 3),
+            "serial_seconds": round(serial, 3),
+            "results": ordered
+        }
+
+    async def _execute(self, step):
+        params = step.params
+        system = self.system
+        print(f"Step {step.label}: {step.type}")
+
+        if step.type == "cylinder":
+            cylinder_num = params["cylinder"]
+            action = params["action"]
+            cylinders = tuple(cylinder_num) if isinstance(cylinder_num, list) else (cylinder_num,)
+            result = {"result": f"Cylinder {cylinder_num} {action}"}
+            if not system.cylinder.connected:
+                raise RuntimeError("실린더 미연결")
+
+            if action == "pulse":
+                pulse = await asyncio.wrap_future(system.cylinder.pulse_async(
+                    cylinders, params.get("on_time", 1.0), params.get("off_time", 1.0)
+                ))
+                if not pulse["ok"]:
+                    raise RuntimeError("실린더 출력 실패")
+            elif params.get("confirm"):
+                # 센서 확인까지 대기 (센서 미매핑 채널은 fallback초 대기)
+                result["data"] = await asyncio.gather(*(
+                    system.cylinder.stroke(
+                        ch, action == "on",
+                        timeout=params.get("timeout", 2.0),
+                        fallback=params.get("fallback", 1.0)
+                    )
+                    for ch in cylinders
+                ))
+                # None은 센서 미매핑 채널 (fallback 대기로 완료)
+                failed = [ch for ch, stroke in zip(cylinders, result["data"]) if stroke["confirmed"] is False]
+                if failed:
+                    raise RuntimeError(f"실린더 {failed} 행정 미확인")
+            elif not system.cylinder.set_channels(channel_mask(*cylinders), action == "on"):
+                raise RuntimeError("실린더 출력 실패")
+            return result
+
+        if step.type == "robot":
+            # 로봇 통신은 블로킹이므로 스레드에서 실행
+            response = await asyncio.to_thread(
+                system.robot.send_task, params["task"],
+                params.get("x", 0), params.get("y", 0),
+                params.get("angle", 0), params.get("plate_seq", 0)
+            )
+            return {"result": response}
+
+        if step.type == "light":
+            on = params["on"]
+            brightness = params.get("brightness", 0)
+            await system.feeder.set_light(on, brightness)
+            return {"result": f"Light {'on' if on else 'off'}, brightness: {brightness}"}
+
+        if step.type == "feeder":
+            action = params["action"]
+            duration = float(params["duration"])
+            await system.feeder.run_action(action, duration)
+            return {"result": f"Feeder action {action} for {duration} seconds"}
+
+        if step.type == "wait":
+            duration = params["duration"]
+            await asyncio.sleep(duration)
+            return {"result": f"Waited {duration} seconds"}
+
+        if step.type == "input":
+            channel = params["channel"]
+            reached = await system.cylinder.inputs.wait_for_async(
+                channel, params.get("state", True), params.get("timeout", 2.0)
+            )
+            if not reached:
+                raise RuntimeError(f"Input {channel} timeout")
+            return {"result": f"Input {channel} reached"}
+
+        if step.type == "camera":
+            if params.get("action") == "capture":
+                centroids = system.camera.get_front_centroids()
+                return {"result": f"Detected {len(centroids)} objects", "data": centroids}
+            return {"result": "no-op"}
+
+        raise ValueError(f"알 수 없는 단계 종류 '{step.type}'")
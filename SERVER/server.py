@@ -1,7 +1,6 @@
 # SERVER/server.py
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
 import os
 import asyncio
@@ -10,11 +9,19 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 
 # 컨트롤러 임포트
-from camera_controller import CameraController
 from feeder_controller import FeederController
-from cylinder_controller import CylinderController
+from cylinder_controller import CylinderController, channel_mask
 from robot_controller import RobotController
 from lego_process import LegoProcess
+from block_process import BlockProcess
+from event_broadcaster import EventBroadcaster
+from job_scheduler import JobScheduler
+from command_coalescer import CommandCoalescer
+from sequence_engine import SequenceEngine, compile_sequence
+from static_cache import StaticCache
+from model_swap import ModelSwapper
+import cpu_tuning
+from cell_config import load_cells, cell_dir, cell_path, DEFAULT_CELL
 
 # ===== 요청/응답 모델 =====
 class ROIRequest(BaseModel):
@@ -30,6 +37,12 @@ class CylinderRequest(BaseModel):
     action: str  # "on", "off", "pulse"
     on_time: Optional[float] = 1.0
     off_time: Optional[float] = 1.0
+    cylinders: Optional[List[int]] = None  # 여러 실린더 동시 제어 (지정 시 cylinder_num 무시)
+    verify: bool = False
+
+class CylinderTimelineRequest(BaseModel):
+    steps: List[Dict[str, Any]]  # [{"t": 0.0, "cylinders": [0, 2], "on": true}, ...]
+    wait: bool = True
 
 class RobotTaskRequest(BaseModel):
     task_num: int
@@ -39,30 +52,96 @@ class RobotTaskRequest(BaseModel):
     plate_seq: Optional[int] = 0
 
 class SequenceStep(BaseModel):
-    type: str  # "cylinder", "robot", "light", "wait", "camera"
-    params: Dict[str, Any]
+    type: str  # "cylinder", "robot", "light", "feeder", "wait", "input", "camera", "parallel"
+    params: Dict[str, Any] = {}
+    id: Optional[str] = None
+    after: Optional[List[str]] = None  # 의존 단계 id (생략 시 앞 단계 뒤에 실행)
 
 class SequenceRequest(BaseModel):
     name: str
     steps: List[SequenceStep]
+    save: bool = False
+    stop_on_error: bool = False
 
 class LegoDrawingRequest(BaseModel):
     shape: str  # "하트", "물고기", "스마일", "고양이", "판다", "튤립"
 
+class ResumeRequest(BaseModel):
+    job_id: str
+
+class BlockDrawingRequest(BaseModel):
+    shape: str  # "A" - "Z"
+
+class ModelSwapRequest(BaseModel):
+    name: str  # MODEL/ 폴더 안의 새 모델 파일 이름 (.pt)
+    force: bool = False  # 검증 실패해도 교체
+
+class JobRequest(BaseModel):
+    kind: str  # "lego", "block"
+    shape: str
+
+# 레고 그림 한글 -> 영어 매핑
+LEGO_SHAPES = {
+    "하트": "heart",
+    "물고기": "fish",
+    "스마일": "smile",
+    "고양이": "cat",
+    "판다": "panda",
+    "튤립": "tulip"
+}
+
 # ===== 통합 시스템 클래스 =====
 class IntegratedSystem:
-    def __init__(self):
-        self.camera = CameraController()
-        self.feeder = FeederController()
-        self.cylinder = CylinderController()
-        self.robot = RobotController()
+    """셀 하나 (카메라/피더/실린더/로봇 한 세트와 작업 대기열)"""
+    
+    def __init__(self, config=DEFAULT_CELL):
+        self.name = config["name"]
+        self.config = config
+        camera_config = config["camera"]
+        recording_dir = cell_dir(self.name, "recordings")
+        
+        self.inference = None
+        if os.environ.get("FLEXIBOT_VISION_PROCESS") == "1":
+            # 비전 파이프라인을 별도 프로세스로 실행 (공유 메모리로 결과 수신)
+            from vision_process import VisionProcessCamera
+            self.camera = VisionProcessCamera(
+                roi=camera_config["roi"], serial=camera_config["serial"], recording_dir=recording_dir
+            )
+        else:
+            # 모델은 공유 추론 서비스가 한 벌만 로드 (카메라/셀이 늘어도 배치로 추론)
+            from camera_controller import CameraController
+            from inference_service import shared_service
+            self.inference = shared_service('../MODEL/final_lego_model.pt')
+            self.camera = CameraController(
+                service=self.inference, source=self.name, serial=camera_config["serial"],
+                roi=camera_config["roi"], recording_dir=recording_dir
+            )
+        self.feeder = FeederController(**config["feeder"])
+        self.cylinder = CylinderController(
+            sensors=config["cylinder"].get("sensors"),
+            input_rate_hz=config["cylinder"].get("input_rate_hz", 500)
+        )
+        self.cylinder_card = config["cylinder"].get("card")
+        self.robot = RobotController(**config["robot"])
+        self.events = EventBroadcaster()
+        # 클라이언트 오버레이용 프레임별 검출 메시지 (느린 브라우저는 최신 2개만 받음)
+        self.frame_events = EventBroadcaster(queue_size=2)
+        self.coalescer = CommandCoalescer(window=0.05)
+        self.sequences = SequenceEngine(self, cell_path(self.name, "sequences", "sequences.json"))
         self.lego_process = None
+        self.block_process = None
+        self.scheduler = None
         self.is_initialized = False
+        self.monitor_task = None
         
     async def initialize(self):
         """시스템 초기화"""
+        self.events.bind(asyncio.get_running_loop())
+        self.frame_events.bind(asyncio.get_running_loop())
+        self.camera.on_detections = self._publish_detections
+        
         print("=" * 60)
-        print("시스템 초기화 시작...")
+        print(f"[{self.name}] 시스템 초기화 시작...")
         print("=" * 60)
         
         # 1. 카메라 연결
@@ -76,18 +155,21 @@ class IntegratedSystem:
         if self.feeder.connect():
             print("✓ 피더 연결")
             # 조명 자동 켜기 (밝기 10%)
-            if self.feeder.set_light(True, 10):
+            if await self.feeder.set_light(True, 10):
                 print("✓ 피더 조명 ON (10%)")
             else:
                 print("⚠️ 피더 조명 제어 실패")
         else:
             print("⚠️ 피더 없이 시작")
             
-        # 3. 실린더 연결 및 초기화
-        if self.cylinder.connect():
+        # 3. 실린더 연결 및 초기화 (카드가 없는 셀은 생략)
+        if self.cylinder_card is not None and self.cylinder.connect(self.cylinder_card):
             print("✓ 실린더 연결")
-            self.cylinder.cylinder_0_pulse()
-            self.cylinder.cylinder_2_pulse()
+            # 0번, 2번 펄스 동시 실행
+            await asyncio.gather(
+                asyncio.wrap_future(self.cylinder.pulse_async(0)),
+                asyncio.wrap_future(self.cylinder.pulse_async(2))
+            )
             print("✓ 실린더 초기화 완료 (모두 OFF)")
         else:
             print("⚠️ 실린더 없이 시작")
@@ -117,46 +199,162 @@ class IntegratedSystem:
         self.lego_process = LegoProcess(self)
         print("✓ LegoProcess 초기화")
         
+        self.block_process = BlockProcess(self)
+        print("✓ BlockProcess 초기화")
+        
+        # 6. 작업 스케줄러 (툴별 묶음 실행)
+        self.scheduler = JobScheduler(self)
+        self.scheduler.register("lego", "suction", self.lego_process.execute_lego_drawing)
+        self.scheduler.register("block", "gripper", self.block_process.execute_block_drawing)
+        print("✓ JobScheduler 초기화")
+        
         self.is_initialized = True
         print("=" * 60)
-        print("시스템 초기화 완료")
+        print(f"[{self.name}] 시스템 초기화 완료")
         print("=" * 60)
         
-        # 6. 브라우저 자동 실행
-        await asyncio.sleep(1)  # 서버 완전 시작 대기
-        webbrowser.open('http://localhost:8000')
-        print("\n🌐 브라우저 자동 실행: http://localhost:8000\n")
+        # 장치 상태/검출 개수 모니터 (구독자 수와 무관하게 1개만 실행)
+        self.monitor_task = asyncio.create_task(self.monitor_state())
+    
+    def get_status(self):
+        """전체 시스템 상태"""
+        return {
+            "cell": self.name,
+            "initialized": self.is_initialized,
+            "modules": {
+                "cylinder": {
+                    "connected": self.cylinder.connected,
+                    "status": "online" if self.cylinder.connected else "offline"
+                },
+                "robot": {
+                    "connected": self.robot.connected,
+                    "status": "online" if self.robot.connected else "offline",
+                    "host": self.robot.host if self.robot.connected else None
+                },
+                "camera": {
+                    "connected": self.camera.camera is not None,
+                    "status": "online" if self.camera.camera else "offline",
+                    "roi": list(self.camera.roi) if self.camera.camera else None
+                },
+                "feeder": {
+                    "connected": self.feeder.connected,
+                    "status": "online" if self.feeder.connected else "offline"
+                }
+            }
+        }
+    
+    async def monitor_state(self, interval=0.5):
+        """장치 온라인/오프라인 변화와 검출 개수를 이벤트로 발행"""
+        last_status = None
+        last_count = None
+        
+        while True:
+            try:
+                status = self.get_status()
+                if status != last_status:
+                    self.events.publish("device_state", status)
+                    last_status = status
+                
+                # 검출 개수는 구독자가 있을 때만 계산
+                if self.events.subscriber_count > 0:
+                    count = len(self.camera.get_front_centroids())
+                    if count != last_count:
+                        self.events.publish("detections", {"count": count})
+                        last_count = count
+            except Exception as e:
+                # 재연결 중인 장치 읽기 오류 등 - 감시는 계속
+                print(f"⚠️ [{self.name}] 상태 감시 오류: {e}")
+            
+            await asyncio.sleep(interval)
+    
+    def _publish_detections(self, message):
+        """프레임별 검출 메시지 발행 (캡처 스레드에서 호출, 구독자가 없으면 직렬화 생략)"""
+        if self.frame_events.subscriber_count > 0:
+            self.frame_events.publish("frame", message)
     
     async def shutdown(self):
         """시스템 종료"""
-        print("\n시스템 종료 중...")
+        print(f"\n[{self.name}] 시스템 종료 중...")
+        
+        if self.monitor_task:
+            self.monitor_task.cancel()
         
         # 조명 끄기
-        if self.feeder.client:
-            self.feeder.set_light(False, 0)
+        if self.feeder.connected:
+            await self.feeder.set_light(False, 0)
             print("✓ 피더 조명 OFF")
         
         # 실린더 모두 OFF
         if self.cylinder.connected:
-            for i in range(4):
-                getattr(self.cylinder, f'cylinder_{i}_off')()
+            self.cylinder.timeline.stop()
+            self.cylinder.all_off()
             print("✓ 실린더 모두 OFF")
         
         self.camera.stop()
         self.feeder.disconnect()
         self.cylinder.disconnect()
         # self.robot.disconnect()
-        print("✓ 시스템 종료 완료")
+        print(f"✓ [{self.name}] 시스템 종료 완료")
+
+class CellRegistry:
+    """구성 파일의 셀들을 만들고 이름으로 찾는다 (YOLO 모델은 공유 추론 서비스 한 벌)"""
+    
+    def __init__(self, configs):
+        self.cells = {}
+        for config in configs:
+            self.cells[config["name"]] = IntegratedSystem(config)
+        self.default = next(iter(self.cells.values()))
+        
+        # 공유 추론 서비스 모델 무중단 교체 (비전 프로세스 모드는 미지원)
+        inference = self.default.inference
+        self.swapper = ModelSwapper(inference) if inference else None
+    
+    def get(self, name=None) -> IntegratedSystem:
+        if name is None:
+            return self.default
+        cell = self.cells.get(name)
+        if cell is None:
+            raise HTTPException(status_code=404, detail=f"셀 없음: {name}")
+        return cell
+    
+    async def initialize(self):
+        # 로봇/피더 연결이 블로킹이라 셀 순서대로 초기화
+        for cell in self.cells.values():
+            await cell.initialize()
+        
+        # 브라우저 자동 실행
+        await asyncio.sleep(1)  # 서버 완전 시작 대기
+        webbrowser.open('http://localhost:8000')
+        print("\n🌐 브라우저 자동 실행: http://localhost:8000\n")
+    
+    async def shutdown(self):
+        for cell in self.cells.values():
+            await cell.shutdown()
+        inference = self.default.inference
+        if inference:
+            inference.stop()
+    
+    def get_status(self):
+        return {name: cell.get_status() for name, cell in self.cells.items()}
 
-# 시스템 인스턴스
-system = IntegratedSystem()
+# 스레드 수 설정은 모델 로드 전에 적용
+cpu_tuning.configure()
+
+# 셀 인스턴스 (첫 번째 셀이 기존 /api/... 경로의 기본 셀)
+cells = CellRegistry(load_cells())
+system = cells.default
+
+def resolve_cell(cell: Optional[str] = None) -> IntegratedSystem:
+    """요청 대상 셀 (/api/cells/{cell}/... 경로 또는 ?cell=, 생략 시 기본 셀)"""
+    return cells.get(cell)
 
 # ===== FastAPI 앱 설정 =====
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await system.initialize()
+    cpu_tuning.pin_thread("api")    # 이벤트 루프 스레드
+    await cells.initialize()
     yield
-    await system.shutdown()
+    await cells.shutdown()
 
 app = FastAPI(
     title="레고 & 블럭 통합 제어 시스템",
@@ -164,11 +362,17 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# ===== 셀 API =====
+@app.get("/api/cells")
+async def list_cells():
+    """셀 목록과 장치 상태 (셀별 API는 /api/cells/{cell}/...)"""
+    return {"status": "ok", "default": system.name, "cells": cells.get_status()}
+
 # ===== 비디오 스트리밍 =====
-def generate_frames():
-    """비디오 스트림 생성"""
+def generate_frames(system, raw=False):
+    """비디오 스트림 생성 (raw=True면 박스 없는 원본 ROI)"""
     while True:
-        frame = system.camera.get_frame()
+        frame = system.camera.get_frame(raw)
         if frame:
             yield (b'--frame\r\n'
                    b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
@@ -177,71 +381,187 @@ def generate_frames():
             time.sleep(0.1)
 
 @app.get("/video_feed")
-async def video_feed():
+@app.get("/api/cells/{cell}/video_feed")
+async def video_feed(raw: bool = False, system: IntegratedSystem = Depends(resolve_cell)):
     """비디오 스트림"""
     return StreamingResponse(
-        generate_frames(),
+        generate_frames(system, raw),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
+@app.get("/api/overlay")
+@app.get("/api/cells/{cell}/overlay")
+async def get_overlay(system: IntegratedSystem = Depends(resolve_cell)):
+    """검출 박스 시각화 위치 (server: JPEG에 그림, client: 브라우저 캔버스에 그림)"""
+    return {"status": "ok", "mode": system.camera.overlay}
+
+@app.get("/api/detections_stream")
+@app.get("/api/cells/{cell}/detections_stream")
+async def detections_stream(system: IntegratedSystem = Depends(resolve_cell)):
+    """프레임별 검출 메시지 스트림 (클라이언트 오버레이용)"""
+    return StreamingResponse(
+        system.frame_events.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/recording/dump")
+@app.post("/api/cells/{cell}/recording/dump")
+async def dump_recording(seconds: float = 10.0, system: IntegratedSystem = Depends(resolve_cell)):
+    """최근 seconds초 녹화 프레임 저장 (FLEXIBOT_RECORD_SECONDS 설정 시)"""
+    path = system.camera.dump_recording(seconds, "manual")
+    if path is None:
+        raise HTTPException(status_code=503, detail="프레임 녹화 꺼짐 (FLEXIBOT_RECORD_SECONDS 미설정)")
+    return {"status": "ok", "path": path}
+
+@app.get("/api/vision_stats")
+@app.get("/api/cells/{cell}/vision_stats")
+async def vision_stats(system: IntegratedSystem = Depends(resolve_cell)):
+    """비전 프로세스 상태 (별도 프로세스 모드에서만)"""
+    if not hasattr(system.camera, "get_stats"):
+        return {"status": "ok", "process": False}
+    return {"status": "ok", "process": True, **system.camera.get_stats()}
+
+@app.get("/api/inference_stats")
+async def inference_stats():
+    """공유 추론 서비스 배치 점유율/대기 시간/소스별 처리량"""
+    if system.inference is None:
+        return {"status": "ok", "shared": False}
+    return {"status": "ok", "shared": True, **system.inference.get_stats()}
+
 # ===== 카메라 제어 API =====
 @app.post("/api/set_roi")
-async def set_roi(req: ROIRequest):
-    """ROI 위치 변경"""
-    system.camera.set_roi(req.x, req.y)
-    return {"status": "ok", "x": req.x, "y": req.y}
+@app.post("/api/cells/{cell}/set_roi")
+async def set_roi(req: ROIRequest, system: IntegratedSystem = Depends(resolve_cell)):
+    """ROI 위치 변경 (연속 요청은 최신 값만 적용)"""
+    system.coalescer.submit("roi", system.camera.set_roi, req.x, req.y)
+    return {"status": "queued", "x": req.x, "y": req.y}
 
 @app.get("/api/get_centroids")
-async def get_centroids():
-    """검출된 객체 중심점 반환"""
-    centroids = system.camera.get_front_centroids()
+@app.get("/api/cells/{cell}/get_centroids")
+async def get_centroids(confirmed: bool = False, system: IntegratedSystem = Depends(resolve_cell)):
+    """검출된 객체 픽업 점/각도 반환 (confirmed=true: 추적으로 확인된 평활 좌표)"""
+    targets = system.camera.get_front_targets(confirmed_only=confirmed)
     return {
         "status": "ok",
-        "count": len(centroids),
-        "centroids": centroids
+        "count": len(targets),
+        "centroids": [(x, y) for x, y, _ in targets],
+        "angles": [angle for _, _, angle in targets]
+    }
+
+@app.get("/api/feeder_policy")
+@app.get("/api/cells/{cell}/feeder_policy")
+async def get_feeder_policy(system: IntegratedSystem = Depends(resolve_cell)):
+    """피더 정책 상태별 레시피 실적 (픽업 가능 앞면 개수/초)"""
+    if not system.lego_process:
+        raise HTTPException(status_code=503, detail="LegoProcess 초기화되지 않음")
+    
+    snapshot = system.camera.get_detection_snapshot()
+    return {
+        "status": "ok",
+        "tray": system.lego_process.feeder_policy.observe(snapshot),
+        "stats": system.lego_process.feeder_policy.get_stats(),
+        "block_stats": system.block_process.feeder_policy.get_stats() if system.block_process else {}
     }
 
 # ===== 조명 제어 API =====
 @app.post("/api/light_control")
-async def light_control(req: LightRequest):
-    """조명 제어"""
-    success = system.feeder.set_light(req.on, req.brightness)
+@app.post("/api/cells/{cell}/light_control")
+async def light_control(req: LightRequest, system: IntegratedSystem = Depends(resolve_cell)):
+    """조명 제어 (슬라이더 연속 요청은 최신 값만 적용)"""
+    if not system.feeder.connected:
+        raise HTTPException(status_code=503, detail="피더 미연결")
+    
+    system.coalescer.submit("light", system.feeder.set_light, req.on, req.brightness)
     return {
-        "status": "ok" if success else "error",
+        "status": "queued",
         "on": req.on,
         "brightness": req.brightness
     }
 
+@app.get("/api/coalescer_stats")
+@app.get("/api/cells/{cell}/coalescer_stats")
+async def coalescer_stats(system: IntegratedSystem = Depends(resolve_cell)):
+    """제어 명령 병합 통계 (제출/적용/병합된 명령 수)"""
+    return {"status": "ok", "controls": system.coalescer.get_stats()}
+
+@app.get("/api/feeder_stats")
+@app.get("/api/cells/{cell}/feeder_stats")
+async def feeder_stats(system: IntegratedSystem = Depends(resolve_cell)):
+    """피더 Modbus 통계 (요청 레지스터 수, 생략된 쓰기, 실제 트랜잭션)"""
+    return {"status": "ok", **system.feeder.get_stats()}
+
 # ===== 실린더 제어 API =====
 @app.post("/api/cylinder_control")
-async def cylinder_control(req: CylinderRequest):
+@app.post("/api/cells/{cell}/cylinder_control")
+async def cylinder_control(req: CylinderRequest, system: IntegratedSystem = Depends(resolve_cell)):
     """실린더 제어"""
     if not system.cylinder.connected:
         raise HTTPException(status_code=503, detail="실린더 미연결")
     
+    if req.verify and not system.cylinder.can_verify:
+        raise HTTPException(status_code=501, detail="출력 검증 미지원 (PCI7230_ReadOutputPort 없는 DLL)")
+    
+    cylinders = tuple(req.cylinders) if req.cylinders else (req.cylinder_num,)
+    try:
+        mask = channel_mask(*cylinders)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         if req.action == "on":
-            getattr(system.cylinder, f'cylinder_{req.cylinder_num}_on')()
+            ok = system.cylinder.set_channels(mask, True, verify=req.verify)
         elif req.action == "off":
-            getattr(system.cylinder, f'cylinder_{req.cylinder_num}_off')()
+            ok = system.cylinder.set_channels(mask, False, verify=req.verify)
         elif req.action == "pulse":
-            getattr(system.cylinder, f'cylinder_{req.cylinder_num}_pulse')(
-                req.on_time, req.off_time
+            result = await asyncio.wrap_future(
+                system.cylinder.pulse_async(cylinders, req.on_time, req.off_time)
             )
+            ok = result["ok"]
         else:
             raise ValueError(f"Invalid action: {req.action}")
         
+        if not ok:
+            raise RuntimeError("실린더 출력 쓰기/검증 실패")
+        
         return {
             "status": "ok",
             "cylinder": req.cylinder_num,
-            "action": req.action
+            "cylinders": list(cylinders),
+            "action": req.action,
+            "outputs": f"0x{system.cylinder.get_outputs():04X}"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/cylinder_timeline")
+@app.post("/api/cells/{cell}/cylinder_timeline")
+async def cylinder_timeline(req: CylinderTimelineRequest,
+                            system: IntegratedSystem = Depends(resolve_cell)):
+    """실린더 타임라인(캠 테이블) 실행"""
+    if not system.cylinder.connected:
+        raise HTTPException(status_code=503, detail="실린더 미연결")
+    
+    try:
+        steps = [(step["t"], step["cylinders"], step["on"]) for step in req.steps]
+        future = system.cylinder.run_timeline(steps)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"잘못된 타임라인: {e}")
+    
+    if not req.wait:
+        return {"status": "scheduled", "edges": len(steps)}
+    return {"status": "ok", **(await asyncio.wrap_future(future))}
+
+@app.get("/api/cylinder_stats")
+@app.get("/api/cells/{cell}/cylinder_stats")
+async def cylinder_stats(system: IntegratedSystem = Depends(resolve_cell)):
+    """실린더 출력/타임라인 통계 (쓰기 횟수, 엣지 지터)"""
+    return {"status": "ok", **system.cylinder.get_stats()}
+
 # ===== 로봇 제어 API =====
 @app.post("/api/robot_task")
-async def robot_task(req: RobotTaskRequest):
+@app.post("/api/cells/{cell}/robot_task")
+async def robot_task(req: RobotTaskRequest, system: IntegratedSystem = Depends(resolve_cell)):
     """로봇 작업 실행"""
     if not system.robot.connected:
         raise HTTPException(status_code=503, detail="로봇 미연결")
@@ -264,7 +584,8 @@ async def robot_task(req: RobotTaskRequest):
         raise HTTPException(status_code=500, detail="로봇 응답 없음")
 
 @app.post("/api/robot_init")
-async def robot_init():
+@app.post("/api/cells/{cell}/robot_init")
+async def robot_init(system: IntegratedSystem = Depends(resolve_cell)):
     """로봇 초기화"""
     if not system.robot.connected:
         raise HTTPException(status_code=503, detail="로봇 미연결")
@@ -273,8 +594,24 @@ async def robot_init():
     return {"status": "ok" if response else "error", "response": response}
 
 # ===== 레고 프로세스 API =====
+def run_in_background(coro):
+    """코루틴을 별도 스레드의 이벤트 루프에서 실행 (로봇 통신이 블로킹이므로)"""
+    import threading
+    
+    def runner():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(coro)
+        loop.close()
+    
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    return thread
+
 @app.post("/api/start_lego_drawing")
-async def start_lego_drawing(req: LegoDrawingRequest):
+@app.post("/api/cells/{cell}/start_lego_drawing")
+async def start_lego_drawing(req: LegoDrawingRequest,
+                             system: IntegratedSystem = Depends(resolve_cell)):
     """레고 그림 그리기 시작 (백그라운드 실행)"""
     if not system.is_initialized:
         raise HTTPException(status_code=503, detail="시스템 초기화되지 않음")
@@ -282,32 +619,11 @@ async def start_lego_drawing(req: LegoDrawingRequest):
     if not system.lego_process:
         raise HTTPException(status_code=503, detail="LegoProcess 초기화되지 않음")
     
-    # 한글 -> 영어 매핑
-    shape_map = {
-        "하트": "heart",
-        "물고기": "fish",
-        "스마일": "smile",
-        "고양이": "cat",
-        "판다": "panda",
-        "튤립": "tulip"
-    }
-    
-    shape_en = shape_map.get(req.shape)
+    shape_en = LEGO_SHAPES.get(req.shape)
     if not shape_en:
         raise HTTPException(status_code=400, detail=f"지원하지 않는 그림: {req.shape}")
     
-    # 백그라운드 스레드에서 실행
-    import threading
-    
-    def run_lego_process():
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(system.lego_process.execute_lego_drawing(shape_en))
-        loop.close()
-    
-    thread = threading.Thread(target=run_lego_process, daemon=True)
-    thread.start()
+    run_in_background(system.lego_process.execute_lego_drawing(shape_en))
     
     # 즉시 응답 반환
     return {
@@ -316,167 +632,262 @@ async def start_lego_drawing(req: LegoDrawingRequest):
         "message": f"{req.shape} 그림 그리기 시작됨"
     }
 
-# ===== 시퀀스 실행 API =====
-@app.post("/api/execute_sequence")
-async def execute_sequence(req: SequenceRequest):
-    """복합 작업 시퀀스 실행"""
-    results = []
+@app.get("/api/lego_jobs")
+@app.get("/api/cells/{cell}/lego_jobs")
+async def get_lego_jobs(system: IntegratedSystem = Depends(resolve_cell)):
+    """중단되어 재개 가능한 레고 작업 목록"""
+    if not system.lego_process:
+        raise HTTPException(status_code=503, detail="LegoProcess 초기화되지 않음")
     
-    print(f"\n시퀀스 실행: {req.name}")
-    print("=" * 40)
+    jobs = system.lego_process.journal.get_resumable()
+    return {"status": "ok", "count": len(jobs), "jobs": jobs}
+
+@app.post("/api/resume_lego_drawing")
+@app.post("/api/cells/{cell}/resume_lego_drawing")
+async def resume_lego_drawing(req: ResumeRequest, system: IntegratedSystem = Depends(resolve_cell)):
+    """중단된 레고 그림 그리기 재개 (남은 플레이트부터)"""
+    if not system.is_initialized or not system.lego_process:
+        raise HTTPException(status_code=503, detail="시스템 초기화되지 않음")
     
-    for i, step in enumerate(req.steps):
-        print(f"Step {i+1}: {step.type}")
-        
-        try:
-            if step.type == "cylinder":
-                cylinder_num = step.params['cylinder']
-                action = step.params['action']
-                
-                if action == "on":
-                    getattr(system.cylinder, f'cylinder_{cylinder_num}_on')()
-                elif action == "off":
-                    getattr(system.cylinder, f'cylinder_{cylinder_num}_off')()
-                elif action == "pulse":
-                    on_time = step.params.get('on_time', 1.0)
-                    off_time = step.params.get('off_time', 1.0)
-                    getattr(system.cylinder, f'cylinder_{cylinder_num}_pulse')(
-                        on_time, off_time
-                    )
-                
-                results.append({
-                    "step": i+1,
-                    "type": "cylinder",
-                    "result": f"Cylinder {cylinder_num} {action}"
-                })
-                
-            elif step.type == "robot":
-                task_num = step.params['task']
-                x = step.params.get('x', 0)
-                y = step.params.get('y', 0)
-                angle = step.params.get('angle', 0)
-                plate_seq = step.params.get('plate_seq', 0)
-                
-                response = system.robot.send_task(task_num, x, y, angle, plate_seq)
-                results.append({
-                    "step": i+1,
-                    "type": "robot",
-                    "result": response
-                })
-                
-            elif step.type == "light":
-                on = step.params['on']
-                brightness = step.params.get('brightness', 0)
-                system.feeder.set_light(on, brightness)
-                
-                results.append({
-                    "step": i+1,
-                    "type": "light",
-                    "result": f"Light {'on' if on else 'off'}, brightness: {brightness}"
-                })
-                
-            elif step.type == "wait":
-                duration = step.params['duration']
-                await asyncio.sleep(duration)
-                
-                results.append({
-                    "step": i+1,
-                    "type": "wait",
-                    "result": f"Waited {duration} seconds"
-                })
-                
-            elif step.type == "camera":
-                if step.params.get('action') == 'capture':
-                    centroids = system.camera.get_front_centroids()
-                    results.append({
-                        "step": i+1,
-                        "type": "camera",
-                        "result": f"Detected {len(centroids)} objects",
-                        "data": centroids
-                    })
-                    
-        except Exception as e:
-            results.append({
-                "step": i+1,
-                "type": step.type,
-                "error": str(e)
-            })
-            print(f"  ✗ 오류: {e}")
-            continue
-    
-    print("=" * 40)
-    print("시퀀스 완료\n")
+    job = system.lego_process.journal.get_job(req.job_id)
+    if not job or job["status"] in system.lego_process.journal.FINISHED:
+        raise HTTPException(status_code=404, detail=f"재개할 작업 없음: {req.job_id}")
+    if req.job_id in system.lego_process.active_jobs:
+        raise HTTPException(status_code=409, detail=f"이미 실행 중인 작업: {req.job_id}")
+    
+    run_in_background(
+        system.lego_process.execute_lego_drawing(job["shape"], resume_job_id=req.job_id)
+    )
+    
+    return {
+        "status": "resumed",
+        "job_id": req.job_id,
+        "shape": job["shape"],
+        "remaining": len(job["plates"]) - len(job["completed"])
+    }
+
+@app.post("/api/lego_jobs/{job_id}/abandon")
+@app.post("/api/cells/{cell}/lego_jobs/{job_id}/abandon")
+async def abandon_lego_job(job_id: str, system: IntegratedSystem = Depends(resolve_cell)):
+    """중단된 작업 포기 (재개 목록에서 제거)"""
+    if not system.lego_process:
+        raise HTTPException(status_code=503, detail="LegoProcess 초기화되지 않음")
     
+    job = system.lego_process.journal.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"작업 없음: {job_id}")
+    
+    system.lego_process.journal.set_status(job_id, "abandoned")
+    return {"status": "ok", "job_id": job_id}
+
+# ===== 블럭 프로세스 API =====
+@app.post("/api/start_block_drawing")
+@app.post("/api/cells/{cell}/start_block_drawing")
+async def start_block_drawing(req: BlockDrawingRequest,
+                              system: IntegratedSystem = Depends(resolve_cell)):
+    """블럭 글자 만들기 시작 (백그라운드 실행)"""
+    if not system.is_initialized or not system.block_process:
+        raise HTTPException(status_code=503, detail="시스템 초기화되지 않음")
+    
+    shape = req.shape.upper()
+    if shape not in system.block_process.coordination:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 글자: {req.shape}")
+    
+    run_in_background(system.block_process.execute_block_drawing(shape))
+    
+    return {
+        "status": "started",
+        "shape": shape,
+        "message": f"{shape} 블럭 글자 만들기 시작됨"
+    }
+
+@app.get("/api/get_blocks")
+@app.get("/api/cells/{cell}/get_blocks")
+async def get_blocks(system: IntegratedSystem = Depends(resolve_cell)):
+    """검출된 블럭 (x, y, angle) 반환"""
+    blocks = system.camera.get_block_targets(pickable_only=False)
+    pickable = system.camera.get_block_targets()
     return {
-        "status": "completed",
-        "sequence": req.name,
-        "results": results
+        "status": "ok",
+        "mode": system.camera.mode,
+        "count": len(blocks),
+        "pickable": pickable,
+        "blocks": blocks
     }
 
+# ===== 작업 스케줄러 API =====
+@app.post("/api/jobs")
+@app.post("/api/cells/{cell}/jobs")
+async def enqueue_job(req: JobRequest, system: IntegratedSystem = Depends(resolve_cell)):
+    """작업 대기열 추가 (실행은 /api/jobs/run)"""
+    if not system.scheduler:
+        raise HTTPException(status_code=503, detail="JobScheduler 초기화되지 않음")
+    
+    shape = LEGO_SHAPES.get(req.shape, req.shape) if req.kind == "lego" else req.shape
+    try:
+        job = system.scheduler.enqueue(req.kind, shape)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"status": "queued", "job": job}
+
+@app.get("/api/jobs")
+@app.get("/api/cells/{cell}/jobs")
+async def get_jobs(system: IntegratedSystem = Depends(resolve_cell)):
+    """대기열, 툴별 실행 순서, 마지막 실행 보고"""
+    if not system.scheduler:
+        raise HTTPException(status_code=503, detail="JobScheduler 초기화되지 않음")
+    return system.scheduler.get_status()
+
+@app.post("/api/jobs/run")
+@app.post("/api/cells/{cell}/jobs/run")
+async def run_jobs(system: IntegratedSystem = Depends(resolve_cell)):
+    """대기열 실행 (백그라운드, 결과는 schedule 이벤트)"""
+    if not system.is_initialized or not system.scheduler:
+        raise HTTPException(status_code=503, detail="시스템 초기화되지 않음")
+    if system.scheduler.running:
+        raise HTTPException(status_code=409, detail="스케줄 실행 중")
+    
+    plan = system.scheduler.plan()
+    run_in_background(system.scheduler.run())
+    return {"status": "started", "plan": plan}
+
+# ===== 시퀀스 실행 API =====
+def _sequence_steps(req: SequenceRequest):
+    return [step.dict(exclude_none=True) for step in req.steps]
+
+@app.post("/api/execute_sequence")
+@app.post("/api/cells/{cell}/execute_sequence")
+async def execute_sequence(req: SequenceRequest, system: IntegratedSystem = Depends(resolve_cell)):
+    """복합 작업 시퀀스 실행 (컴파일 후 병렬 분기 실행, save=true면 이름으로 저장)"""
+    try:
+        if req.save:
+            sequence = system.sequences.register(req.name, _sequence_steps(req))
+        else:
+            sequence = compile_sequence(req.name, _sequence_steps(req))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return await system.sequences.run(sequence, stop_on_error=req.stop_on_error)
+
+@app.post("/api/sequences")
+@app.post("/api/cells/{cell}/sequences")
+async def save_sequence(req: SequenceRequest, system: IntegratedSystem = Depends(resolve_cell)):
+    """시퀀스 검증/컴파일 후 저장 (실행하지 않음)"""
+    try:
+        sequence = system.sequences.register(req.name, _sequence_steps(req))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "ok", "name": sequence.name, "plan": sequence.levels()}
+
+@app.get("/api/sequences")
+@app.get("/api/cells/{cell}/sequences")
+async def list_sequences(system: IntegratedSystem = Depends(resolve_cell)):
+    """저장된 시퀀스와 실행 계획 (동시에 시작하는 단계 묶음)"""
+    return {"status": "ok", "sequences": system.sequences.list()}
+
+@app.post("/api/sequences/{name}/run")
+@app.post("/api/cells/{cell}/sequences/{name}/run")
+async def run_sequence(name: str, stop_on_error: bool = False,
+                       system: IntegratedSystem = Depends(resolve_cell)):
+    """저장된 시퀀스 실행"""
+    sequence = system.sequences.get(name)
+    if sequence is None:
+        raise HTTPException(status_code=404, detail=f"시퀀스 '{name}' 없음")
+    return await system.sequences.run(sequence, stop_on_error=stop_on_error)
+
 # ===== 시스템 상태 API =====
 @app.get("/api/system_status")
-async def get_system_status():
+@app.get("/api/cells/{cell}/system_status")
+async def get_system_status(system: IntegratedSystem = Depends(resolve_cell)):
     """전체 시스템 상태 확인"""
-    return {
-        "initialized": system.is_initialized,
-        "modules": {
-            "cylinder": {
-                "connected": system.cylinder.connected,
-                "status": "online" if system.cylinder.connected else "offline"
-            },
-            "robot": {
-                "connected": system.robot.connected,
-                "status": "online" if system.robot.connected else "offline",
-                "host": system.robot.host if system.robot.connected else None
-            },
-            "camera": {
-                "connected": system.camera.camera is not None,
-                "status": "online" if system.camera.camera else "offline",
-                "roi": system.camera.roi if system.camera.camera else None
-            },
-            "feeder": {
-                "connected": system.feeder.client is not None,
-                "status": "online" if system.feeder.client else "offline"
-            }
-        }
-    }
+    return system.get_status()
+
+@app.get("/api/events")
+@app.get("/api/cells/{cell}/events")
+async def events(system: IntegratedSystem = Depends(resolve_cell)):
+    """실시간 이벤트 스트림 (작업 진행률, 단계별 시간, 검출 개수, 장치 상태)"""
+    return StreamingResponse(
+        system.events.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 # ===== 웹 페이지 라우팅 =====
+# UI 파일은 시작 시 한 번 메모리에 올림 (FLEXIBOT_UI_RELOAD=1이면 수정 시 자동 재로드)
+ui_cache = StaticCache(
+    os.path.join(os.path.dirname(__file__), "..", "UI"),
+    reload=os.environ.get("FLEXIBOT_UI_RELOAD") == "1"
+)
+
 @app.get("/")
-async def root():
+async def root(request: Request):
     """메인 페이지"""
-    html_path = os.path.join(os.path.dirname(__file__), "..", "UI", "index.html")
-    if not os.path.exists(html_path):
-        return HTMLResponse(content="<h1>UI 파일을 찾을 수 없습니다</h1>", status_code=404)
-    
-    with open(html_path, "r", encoding="utf-8") as f:
-        html_content = f.read()
-    return HTMLResponse(content=html_content)
+    return ui_cache.response("index.html", request, "<h1>UI 파일을 찾을 수 없습니다</h1>")
 
 @app.get("/camera")
-async def camera_page():
+async def camera_page(request: Request):
     """카메라 페이지"""
-    html_path = os.path.join(os.path.dirname(__file__), "..", "UI", "camera.html")
-    if not os.path.exists(html_path):
-        return HTMLResponse(content="<h1>카메라 페이지를 찾을 수 없습니다</h1>", status_code=404)
-    
-    with open(html_path, "r", encoding="utf-8") as f:
-        html_content = f.read()
-    return HTMLResponse(content=html_content)
+    return ui_cache.response("camera.html", request, "<h1>카메라 페이지를 찾을 수 없습니다</h1>")
 
 @app.get("/control")
-async def control_page():
+async def control_page(request: Request):
     """제어 페이지"""
-    html_path = os.path.join(os.path.dirname(__file__), "..", "UI", "control.html")
-    if not os.path.exists(html_path):
-        return HTMLResponse(content="<h1>제어 페이지를 찾을 수 없습니다</h1>", status_code=404)
-    
-    with open(html_path, "r", encoding="utf-8") as f:
-        html_content = f.read()
-    return HTMLResponse(content=html_content)
+    return ui_cache.response("control.html", request, "<h1>제어 페이지를 찾을 수 없습니다</h1>")
+
+@app.get("/api/model_info")
+@app.get("/api/cells/{cell}/model_info")
+async def model_info(system: IntegratedSystem = Depends(resolve_cell)):
+    """모델 로드 형식/캐시 적중/로드·예열 시간/첫 프레임 추론 시간"""
+    report = getattr(system.camera, "model_report", None)
+    if report is None:
+        raise HTTPException(status_code=503, detail="모델 정보 없음 (비전 프로세스 모드)")
+    return {"status": "ok", **report}
+
+@app.post("/api/model/swap")
+async def swap_model(req: ModelSwapRequest):
+    """새 모델 백그라운드 로드/검증 후 교체 (진행 상태는 GET /api/model/swap)"""
+    if cells.swapper is None:
+        raise HTTPException(status_code=503, detail="모델 교체는 공유 추론 서비스 모드에서만 지원")
+    try:
+        cells.swapper.start(req.name, force=req.force)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "started", "name": req.name}
+
+@app.get("/api/model/swap")
+async def swap_status():
+    """모델 교체 상태 (검증 결과, 현재/이전 모델)"""
+    if cells.swapper is None:
+        raise HTTPException(status_code=503, detail="모델 교체는 공유 추론 서비스 모드에서만 지원")
+    return {"status": "ok", **cells.swapper.get_status()}
+
+@app.post("/api/model/rollback")
+async def rollback_model():
+    """이전 모델로 즉시 되돌림"""
+    if cells.swapper is None:
+        raise HTTPException(status_code=503, detail="모델 교체는 공유 추론 서비스 모드에서만 지원")
+    if not cells.swapper.rollback():
+        raise HTTPException(status_code=409, detail="되돌릴 이전 모델 없음")
+    return {"status": "ok", **cells.swapper.get_status()}
+
+@app.get("/api/cpu_settings")
+async def cpu_settings():
+    """적용된 torch/OpenCV 스레드 수와 역할별 코어 고정 상태"""
+    return {"status": "ok", **cpu_tuning.get_report()}
+
+@app.get("/api/ui_cache_stats")
+async def ui_cache_stats():
+    """UI 캐시 통계 (파일 수, 304 응답 수, 재로드 횟수)"""
+    return {"status": "ok", **ui_cache.get_stats()}
 
 @app.get("/api/test_camera")
-async def test_camera():
+@app.get("/api/cells/{cell}/test_camera")
+async def test_camera(system: IntegratedSystem = Depends(resolve_cell)):
     frame = system.camera.get_frame()
     return {
         "has_frame": frame is not None,
@@ -485,17 +896,12 @@ async def test_camera():
     }
 
 # ===== 정적 파일 서빙 =====
-img_dir = os.path.join(os.path.dirname(__file__), "..", "UI", "img")
-if os.path.exists(img_dir):
-    app.mount("/img", StaticFiles(directory=img_dir), name="img")
-
-css_dir = os.path.join(os.path.dirname(__file__), "..", "UI", "css")
-if os.path.exists(css_dir):
-    app.mount("/css", StaticFiles(directory=css_dir), name="css")
-
-js_dir = os.path.join(os.path.dirname(__file__), "..", "UI", "js")
-if os.path.exists(js_dir):
-    app.mount("/js", StaticFiles(directory=js_dir), name="js")
+@app.get("/{folder}/{path:path}")
+async def static_file(folder: str, path: str, request: Request):
+    """UI/img, UI/css, UI/js 파일 (메모리 캐시)"""
+    if folder not in ("img", "css", "js"):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return ui_cache.response(f"{folder}/{path}", request)
 
 # ===== 메인 실행 =====
 if __name__ == "__main__":
@@ -0,0 +1,158 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 압축 효과가 있는 텍스트 형식만 미리 압축 (PNG 등은 이미 압축됨)
+COMPRESSIBLE = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+class CachedFile:
+    def __init__(self, path, body, mtime):
+        self.path = path
+        self.mtime = mtime
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+        # 인코딩 → 본문
+        self.variants = {"identity": body}
+        if self.media_type.startswith(COMPRESSIBLE) and len(body) > 512:
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body, quality=11)
+
+class StaticCache:
+    """UI 정적 파일 메모리 캐시
+
+    시작 시 UI 폴더를 한 번 읽어 강한 ETag와 gzip/brotli 압축본을 만들어 두고,
+    요청마다 디스크를 읽지 않고 메모리에서 응답한다. If-None-Match가 일치하면 304.
+    reload=True(개발용)이면 감시 스레드가 수정 시각을 확인해 바뀐 파일만 다시 읽는다.
+    """
+
+    def __init__(self, root, reload=False, watch_interval=1.0, html_max_age=0, asset_max_age=86400):
+        self.root = os.path.abspath(root)
+        self.reload = reload
+        self.watch_interval = watch_interval
+        self.html_max_age = html_max_age
+        self.asset_max_age = 0 if reload else asset_max_age   # 개발 중에는 매번 재검증
+
+        self.files = {}         # 상대 경로("img/1.png") → CachedFile
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "not_modified": 0, "misses": 0, "reloads": 0}
+
+        self.load_all()
+        if reload:
+            threading.Thread(target=self._watch, name="ui-watch", daemon=True).start()
+
+    def load_all(self):
+        files = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                cached = self._read(path)
+                if cached:
+                    files[self._relpath(path)] = cached
+        with self.lock:
+            self.files = files
+
+        size = sum(len(f.variants["identity"]) for f in files.values())
+        print(f"✓ UI 캐시 로드: {len(files)}개 파일, {size / 1024:.0f} KB"
+              f"{'' if brotli else ' (brotli 미설치 - gzip만 사용)'}")
+
+    def _relpath(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    @staticmethod
+    def _read(path):
+        try:
+            mtime = os.path.getmtime(path)
+            with open(path, "rb") as f:
+                return CachedFile(path, f.read(), mtime)
+        except OSError as e:
+            print(f"⚠️ UI 파일 읽기 실패 ({path}): {e}")
+            return None
+
+    def _watch(self):
+        """개발 모드: 수정/추가/삭제된 파일만 다시 읽기"""
+        while True:
+            time.sleep(self.watch_interval)
+            seen = set()
+            for dirpath, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    name = self._relpath(path)
+                    seen.add(name)
+                    try:
+                        mtime = os.path.getmtime(path)
+                    except OSError:
+                        continue
+                    cached = self.files.get(name)
+                    if cached is None or cached.mtime != mtime:
+                        updated = self._read(path)
+                        if updated:
+                            with self.lock:
+                                self.files[name] = updated
+                            self.stats["reloads"] += 1
+                            print(f"↻ UI 파일 다시 읽음: {name}")
+            with self.lock:
+                for name in set(self.files) - seen:
+                    del self.files[name]
+
+    def get(self, name):
+        return self.files.get(name)
+
+    def response(self, name, request: Request, not_found="<h1>파일을 찾을 수 없습니다</h1>"):
+        """캐시된 파일 응답 (ETag/304, Accept-Encoding에 따른 압축본 선택)"""
+        cached = self.files.get(name)
+        if cached is None:
+            self.stats["misses"] += 1
+            return Response(content=not_found, status_code=404, media_type="text/html; charset=utf-8")
+
+        max_age = self.html_max_age if cached.media_type == "text/html" else self.asset_max_age
+        headers = {
+            "ETag": cached.etag,
+            "Cache-Control": f"public, max-age={max_age}" if max_age else "no-cache",
+            "Vary": "Accept-Encoding"
+        }
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if cached.etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        accepted = {
+            token.split(";")[0].strip()
+            for token in request.headers.get("accept-encoding", "").split(",")
+        }
+        encoding = "identity"
+        for candidate in ("br", "gzip"):
+            if candidate in cached.variants and candidate in accepted:
+                encoding = candidate
+                break
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        self.stats["hits"] += 1
+        media_type = cached.media_type
+        if media_type.startswith("text/"):
+            media_type += "; charset=utf-8"
+        return Response(content=cached.variants[encoding], media_type=media_type, headers=headers)
+
+    def get_stats(self):
+        return {
+            "files": len(self.files),
+            "bytes": sum(len(f.variants["identity"]) for f in self.files.values()),
+            "compressed": sum(1 for f in self.files.values() if len(f.variants) > 1),
+            "brotli": brotli is not None,
+            "reload": self.reload,
+            **self.stats
+        }
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from block_detector import _isolated_mask, detect_blocks
+
+def brute_force_isolated(centers, min_distance):
+    diff = centers[:, None, :] - centers[None, :, :]
+    dist = np.sqrt((diff ** 2).sum(axis=2))
+    np.fill_diagonal(dist, np.inf)
+    return dist.min(axis=1) >= min_distance
+
+def test_isolated_mask_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        centers = rng.uniform(0, 1000, size=(rng.integers(2, 60), 2)).astype(np.float32)
+        np.testing.assert_array_equal(
+            _isolated_mask(centers, 100), brute_force_isolated(centers, 100)
+        )
+
+def test_isolated_mask_neighbours_across_cell_boundary():
+    # 격자 칸은 다르지만 거리는 min_distance 미만
+    centers = np.array([[99.0, 50.0], [101.0, 50.0], [500.0, 500.0]], np.float32)
+    np.testing.assert_array_equal(_isolated_mask(centers, 100), [False, False, True])
+
+def test_isolated_mask_single_block_is_pickable():
+    assert _isolated_mask(np.array([[10.0, 10.0]], np.float32), 100).tolist() == [True]
+
+def draw_square(img, center, side, angle):
+    box = cv2.boxPoints((center, (side, side), angle)).astype(np.int32)
+    cv2.fillPoly(img, [box], (0, 0, 0))
+
+def test_detect_blocks_finds_rotated_squares_and_pickability():
+    img = np.full((800, 1000, 3), 255, np.uint8)
+    draw_square(img, (200, 200), 170, 20)      # 고립
+    draw_square(img, (600, 400), 170, 0)       # 오른쪽 블럭과 가까움
+    draw_square(img, (780, 400), 170, 0)
+
+    blocks = detect_blocks(img, min_area=27000, max_area=31000, min_distance=250)
+
+    order = np.argsort(blocks["centers"][:, 0])
+    centers = blocks["centers"][order]
+    np.testing.assert_allclose(centers, [[200, 200], [600, 400], [780, 400]], atol=2)
+    assert blocks["pickable"][order].tolist() == [True, False, False]
+    angles = blocks["angles"][order]
+    assert np.all((angles >= -45) & (angles < 45))
+    assert abs(abs(angles[0]) - 20) < 2
+
+def test_detect_blocks_rejects_rectangles():
+    img = np.full((600, 600, 3), 255, np.uint8)
+    cv2.rectangle(img, (100, 100), (350, 215), (0, 0, 0), -1)    # 250x115 ≈ 28750 px²
+    assert len(detect_blocks(img)["centers"]) == 0
@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from cell_config import DEFAULT_CELL, DEFAULT_CELL_NAME, cell_dir, load_cells
+
+def write_cells(tmp_path, cells):
+    path = tmp_path / "cells.json"
+    path.write_text(json.dumps({"cells": cells}), encoding="utf-8")
+    return str(path)
+
+def test_missing_file_gives_default_cell(tmp_path):
+    cells = load_cells(str(tmp_path / "none.json"))
+    assert cells == [DEFAULT_CELL]
+    cells[0]["robot"]["host"] = "changed"
+    assert DEFAULT_CELL["robot"]["host"] != "changed"
+
+def test_env_path_is_used(tmp_path, monkeypatch):
+    monkeypatch.setenv("FLEXIBOT_CELLS", write_cells(tmp_path, [{"name": "only"}]))
+    assert [cell["name"] for cell in load_cells()] == ["only"]
+
+def test_partial_sections_are_merged_with_defaults(tmp_path):
+    path = write_cells(tmp_path, [
+        {"name": "main"},
+        {"name": "cell2", "robot": {"host": "192.168.0.11"}, "camera": {"serial": "40123456"},
+         "cylinder": {"card": None}},
+    ])
+    main, cell2 = load_cells(path)
+
+    assert main == DEFAULT_CELL
+    assert cell2["robot"] == {"host": "192.168.0.11", "port": DEFAULT_CELL["robot"]["port"]}
+    assert cell2["camera"]["serial"] == "40123456"
+    assert cell2["camera"]["roi"] == DEFAULT_CELL["camera"]["roi"]
+    assert cell2["feeder"] == DEFAULT_CELL["feeder"]
+    assert cell2["cylinder"]["card"] is None
+
+def test_duplicate_names_are_rejected(tmp_path):
+    path = write_cells(tmp_path, [{"name": "a"}, {"name": "a", "cylinder": {"card": None}}])
+    with pytest.raises(ValueError, match="이름 중복"):
+        load_cells(path)
+
+def test_second_cell_cannot_share_the_cylinder_card(tmp_path):
+    # 실린더 항목을 생략하면 기본 카드 0을 쓰므로 두 번째 셀은 명시적으로 null이어야 함
+    path = write_cells(tmp_path, [{"name": "main"}, {"name": "cell2"}])
+    with pytest.raises(ValueError, match="실린더 카드"):
+        load_cells(path)
+
+def test_empty_cell_list_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="비어 있음"):
+        load_cells(write_cells(tmp_path, []))
+
+def test_cell_dir_keeps_default_path_for_main():
+    main = cell_dir(DEFAULT_CELL_NAME, "recordings")
+    other = cell_dir("cell2", "recordings")
+    assert other == os.path.join(main, "cell2")
+
+def test_cylinder_sensor_map_is_merged_and_validated(tmp_path):
+    cells = load_cells(write_cells(tmp_path, [{"name": "main", "cylinder": {"sensors": {"0": 0, "2": 1}}}]))
+    assert cells[0]["cylinder"] == {"card": 0, "sensors": {"0": 0, "2": 1}, "input_rate_hz": 500}
+
+    with pytest.raises(ValueError, match="센서 매핑"):
+        load_cells(write_cells(tmp_path, [{"name": "main", "cylinder": {"sensors": {"a": 0}}}]))
@@ -0,0 +1,70 @@
+import asyncio
+
+from command_coalescer import CommandCoalescer
+
+def test_burst_applies_only_latest_value():
+    applied = []
+
+    async def scenario():
+        coalescer = CommandCoalescer(window=0.02)
+        for value in range(10):
+            coalescer.submit("light", applied.append, value)
+        await asyncio.sleep(0.05)
+        return coalescer.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert applied == [9]
+    assert stats["light"] == {"submitted": 10, "applied": 1, "coalesced": 9, "errors": 0}
+
+def test_keys_are_coalesced_independently():
+    applied = []
+
+    async def scenario():
+        coalescer = CommandCoalescer(window=0.02)
+        coalescer.submit("light", lambda v: applied.append(("light", v)), 1)
+        coalescer.submit("roi", lambda v: applied.append(("roi", v)), "a")
+        coalescer.submit("light", lambda v: applied.append(("light", v)), 2)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert sorted(applied) == [("light", 2), ("roi", "a")]
+
+def test_command_during_slow_apply_runs_next_window_in_order():
+    applied = []
+
+    async def slow_apply(value):
+        applied.append(("start", value))
+        await asyncio.sleep(0.05)
+        applied.append(("end", value))
+
+    async def scenario():
+        coalescer = CommandCoalescer(window=0.01)
+        coalescer.submit("light", slow_apply, 1)
+        await asyncio.sleep(0.02)       # 1 적용 중
+        coalescer.submit("light", slow_apply, 2)
+        await asyncio.sleep(0.15)
+
+    asyncio.run(scenario())
+    # 적용 중 들어온 명령은 버려지지 않고, 앞 명령이 끝난 뒤 적용
+    assert applied == [("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+
+def test_apply_error_is_counted_and_key_recovers():
+    applied = []
+
+    def apply(value):
+        if value == "bad":
+            raise ValueError("잘못된 값")
+        applied.append(value)
+
+    async def scenario():
+        coalescer = CommandCoalescer(window=0.01)
+        coalescer.submit("roi", apply, "bad")
+        await asyncio.sleep(0.03)
+        coalescer.submit("roi", apply, "good")
+        await asyncio.sleep(0.03)
+        return coalescer.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert applied == ["good"]
+    assert stats["roi"]["errors"] == 1
+    assert stats["roi"]["applied"] == 1
@@ -0,0 +1,91 @@
+import pytest
+
+import cylinder_controller
+from cylinder_controller import PORT_MASK, CylinderController, channel_mask
+
+class FakeCard:
+    """PCI-7230 대신 출력 포트 쓰기를 기록"""
+
+    def __init__(self, dll_path, verbose=False):
+        self.ports = []
+        self.output = 0
+        self.stuck = 0      # 검증 실패 재현용: 항상 0으로 읽히는 비트
+        self.can_read_output = True
+
+    def write_port(self, word):
+        self.ports.append(word)
+        self.output = word
+        return True
+
+    def read_output_port(self):
+        if not self.can_read_output:
+            return None
+        return self.output & ~self.stuck
+
+@pytest.fixture
+def cylinder(monkeypatch):
+    monkeypatch.setattr(cylinder_controller, "PCI7230Controller", FakeCard)
+    cylinder = CylinderController()
+    cylinder.connected = True       # 타임라인/입력 스레드 없이 출력만 확인
+    return cylinder
+
+def test_channel_mask():
+    assert channel_mask() == 0
+    assert channel_mask(0, 2) == 0b101
+    assert channel_mask(15) == 1 << 15
+    assert channel_mask(3, 3) == 0b1000
+
+@pytest.mark.parametrize("channel", [-1, 16])
+def test_channel_mask_rejects_out_of_range(channel):
+    with pytest.raises(ValueError):
+        channel_mask(channel)
+
+def test_write_outputs_changes_only_masked_bits(cylinder):
+    assert cylinder.write_outputs(channel_mask(0, 1, 2), 0b111)
+    assert cylinder.write_outputs(channel_mask(1, 3), channel_mask(3))
+    assert cylinder.get_outputs() == 0b1101
+    assert cylinder.controller.ports == [0b111, 0b1101]
+
+def test_unchanged_word_skips_port_write(cylinder):
+    cylinder.on(4)
+    cylinder.on(4)
+    cylinder.set_channels(channel_mask(4), True)
+    assert cylinder.controller.ports == [channel_mask(4)]
+    assert cylinder.stats["skipped"] == 2
+
+def test_all_off_clears_every_channel(cylinder):
+    cylinder.set_channels(channel_mask(0, 15), True)
+    cylinder.all_off()
+    assert cylinder.get_outputs() == 0
+    assert not cylinder.is_on(15)
+
+def test_verify_failure_resyncs_shadow(cylinder):
+    cylinder.controller.stuck = channel_mask(2)
+    assert not cylinder.write_outputs(channel_mask(1, 2), PORT_MASK, verify=True)
+    assert cylinder.get_outputs() == channel_mask(1)
+    assert cylinder.stats["verify_failed"] == 1
+
+def test_not_connected_writes_nothing(cylinder):
+    cylinder.connected = False
+    assert not cylinder.on(0)
+    assert cylinder.controller.ports == []
+
+def test_verify_without_read_back_is_not_success(cylinder):
+    # 출력 포트를 읽을 수 없는 DLL: 쓰기는 하지만 검증 성공으로 보고하지 않음
+    cylinder.controller.can_read_output = False
+    assert not cylinder.can_verify
+    assert not cylinder.on(0, verify=True)
+    assert cylinder.controller.ports == [channel_mask(0)]
+    assert cylinder.stats["unverified"] == 1
+
+def test_verify_reads_back_even_when_word_is_unchanged(cylinder):
+    cylinder.on(0)
+    cylinder.controller.output = 0          # 장치 쪽 출력이 바뀐 경우
+    assert not cylinder.on(0, verify=True)
+    assert cylinder.stats["verify_failed"] == 1
+    assert cylinder.get_outputs() == 0
+
+def test_sensor_map_from_cell_config_uses_int_channels(monkeypatch):
+    monkeypatch.setattr(cylinder_controller, "PCI7230Controller", FakeCard)
+    cylinder = CylinderController(sensors={"0": 0, "2": "1"})
+    assert cylinder.sensors == {0: 0, 2: 1}
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from cylinder_controller import channel_mask
+from cylinder_timeline import CylinderTimeline
+
+class FakeCylinder:
+    """write_outputs 호출을 (mask, values)로 기록"""
+
+    def __init__(self, ok=True):
+        self.writes = []
+        self.ok = ok
+        self.written = threading.Event()
+
+    def write_outputs(self, mask, values):
+        self.writes.append((mask, values))
+        self.written.set()
+        return self.ok
+
+@pytest.fixture
+def make_timeline():
+    timelines = []
+
+    def make(ok=True, **kwargs):
+        timeline = CylinderTimeline(FakeCylinder(ok), **kwargs)
+        timeline.start()
+        timelines.append(timeline)
+        return timeline
+
+    yield make
+    for timeline in timelines:
+        timeline.stop()
+
+def test_edges_fire_in_time_order(make_timeline):
+    timeline = make_timeline()
+    a, b = channel_mask(0), channel_mask(1)
+    # 시각 순서와 다르게 넣어도 시각 순으로 출력
+    result = timeline.schedule([(0.03, a, False), (0.0, a, True), (0.015, b, True)]).result(1.0)
+
+    assert timeline.cylinder.writes == [(a, a), (b, b), (a, 0)]
+    assert result["ok"] is True
+    assert result["edges"] == 3
+
+def test_simultaneous_edges_merge_into_one_write(make_timeline):
+    timeline = make_timeline(merge_window=0.005)
+    a, b = channel_mask(0), channel_mask(2)
+    first = timeline.schedule([(0.0, a, True)], delay=0.02)
+    second = timeline.schedule([(0.0, b, True)], delay=0.02)
+    first.result(1.0)
+    second.result(1.0)
+
+    assert timeline.cylinder.writes == [(a | b, a | b)]
+
+def test_later_edge_on_same_channel_wins_within_merge(make_timeline):
+    timeline = make_timeline(merge_window=0.005)
+    a = channel_mask(3)
+    timeline.schedule([(0.0, a, True), (0.001, a, False)], delay=0.02).result(1.0)
+    assert timeline.cylinder.writes == [(a, 0)]
+
+def test_pulse_completes_after_off_time(make_timeline):
+    timeline = make_timeline()
+    future = timeline.pulse(channel_mask(0), on_time=0.01, off_time=0.05)
+    timeline.cylinder.written.wait(1.0)
+    assert not future.done()
+    assert future.result(1.0)["ok"] is True
+
+def test_failed_write_marks_job_not_ok(make_timeline):
+    timeline = make_timeline(ok=False)
+    result = timeline.pulse(channel_mask(0), on_time=0.0, off_time=0.0).result(1.0)
+    assert result["ok"] is False
+    assert timeline.failed == 2
+
+def test_not_running_resolves_immediately():
+    timeline = CylinderTimeline(FakeCylinder())
+    future = timeline.pulse(channel_mask(0))
+    assert future.done()
+    assert future.result()["ok"] is False
+    assert timeline.cylinder.writes == []
+
+def test_stop_cancels_pending_jobs(make_timeline):
+    timeline = make_timeline()
+    future = timeline.pulse(channel_mask(0), delay=10.0)
+    timeline.stop()
+    assert future.cancelled()
@@ -0,0 +1,96 @@
+import numpy as np
+
+from detection_tracker import (
+    DetectionTracker, confirmed_front_centroids, confirmed_front_targets, greedy_match, iou_matrix,
+)
+
+def snapshot(boxes, cls=None, conf=None, angles=None):
+    boxes = np.array(boxes, np.float32).reshape(-1, 4)
+    n = len(boxes)
+    return {
+        "xyxy": boxes,
+        "cls": np.array(cls if cls is not None else [1] * n, np.int64),
+        "conf": np.array(conf if conf is not None else [0.9] * n, np.float32),
+        "centers": np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1),
+        "angles": np.array(angles if angles is not None else [0.0] * n, np.float32),
+        "ts": 0.0,
+    }
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 10, 10]], np.float32)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], np.float32)
+    np.testing.assert_allclose(iou_matrix(a, b), [[1.0, 1 / 3, 0.0]], atol=1e-6)
+    assert iou_matrix(a, np.zeros((0, 4), np.float32)).shape == (1, 0)
+
+def test_greedy_match_takes_best_pairs_one_to_one():
+    iou = np.array([[0.9, 0.8], [0.85, 0.1]], np.float32)
+    rows, cols = greedy_match(iou, 0.3)
+    assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 0)]
+
+    rows, cols = greedy_match(np.array([[0.5, 0.6], [0.7, 0.2]], np.float32), 0.3)
+    assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 1), (1, 0)]
+
+def test_track_is_confirmed_after_consecutive_hits():
+    tracker = DetectionTracker(confirm_hits=3)
+    box = [[0, 0, 10, 10]]
+    confirmed = [tracker.update(snapshot(box))["confirmed"].tolist() for _ in range(3)]
+    assert confirmed == [[False], [False], [True]]
+    assert tracker.get_tracks()["ids"].tolist() == [1]
+
+def test_single_frame_false_positive_never_confirms_and_expires():
+    tracker = DetectionTracker(confirm_hits=2, max_missed=2)
+    tracker.update(snapshot([[0, 0, 10, 10]]))
+    for _ in range(3):
+        tracks = tracker.update(snapshot([]))
+        assert not tracks["confirmed"].any()
+    assert len(tracker.get_tracks()["ids"]) == 0
+
+def test_box_moves_toward_detection_with_ema():
+    tracker = DetectionTracker(alpha=0.5)
+    tracker.update(snapshot([[0, 0, 10, 10]]))
+    tracks = tracker.update(snapshot([[2, 0, 12, 10]]))
+    np.testing.assert_allclose(tracks["xyxy"][0], [1, 0, 11, 10])
+
+def test_class_vote_resists_single_flip():
+    tracker = DetectionTracker(confirm_hits=1)
+    box = [[0, 0, 10, 10]]
+    for _ in range(3):
+        tracker.update(snapshot(box, cls=[1]))
+    tracks = tracker.update(snapshot(box, cls=[0], conf=[0.5]))
+    assert tracks["cls"].tolist() == [1]
+
+def test_angle_is_smoothed_across_wraparound():
+    tracker = DetectionTracker(alpha=0.5)
+    box = [[0, 0, 10, 10]]
+    tracker.update(snapshot(box, angles=[89.0]))
+    tracks = tracker.update(snapshot(box, angles=[-89.0]))
+    # 180도 주기: 89와 -89의 평균은 0이 아니라 ±90
+    assert abs(abs(float(tracks["angles"][0])) - 90.0) < 1.0
+
+def test_confirmed_front_helpers_filter_class_and_confidence():
+    tracker = DetectionTracker(confirm_hits=1)
+    boxes = [[0, 0, 10, 10], [50, 50, 60, 60], [100, 100, 110, 110]]
+    tracks = tracker.update(snapshot(boxes, cls=[1, 0, 1], conf=[0.9, 0.9, 0.3], angles=[30, 0, 0]), 0.8)
+
+    assert confirmed_front_centroids(tracks) == [(5.0, 5.0)]
+    targets = confirmed_front_targets(tracks)
+    assert len(targets) == 1 and targets[0][:2] == (5.0, 5.0)
+    assert abs(targets[0][2] - 30.0) < 1e-3
+    assert confirmed_front_centroids(None) == []
+
+def test_pick_list_does_not_flicker_around_threshold():
+    tracker = DetectionTracker(confirm_hits=1, alpha=1.0, release_margin=0.1)
+    box = [[0, 0, 10, 10]]
+    picked = [
+        len(confirmed_front_centroids(tracker.update(snapshot(box, conf=[conf]), 0.8)))
+        for conf in (0.79, 0.81, 0.78, 0.82, 0.75, 0.71, 0.69, 0.79, 0.8)
+    ]
+    # 0.8 이상에서 들어오고, 0.7 미만이 되어야 빠짐
+    assert picked == [0, 1, 1, 1, 1, 1, 0, 0, 1]
+
+def test_class_change_drops_track_from_pick_list():
+    tracker = DetectionTracker(confirm_hits=1, alpha=1.0, vote_decay=0.0)
+    box = [[0, 0, 10, 10]]
+    tracker.update(snapshot(box, cls=[1]), 0.8)
+    tracks = tracker.update(snapshot(box, cls=[0]), 0.8)
+    assert confirmed_front_centroids(tracks) == []
@@ -0,0 +1,339 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("pymodbus")
+
+from feeder_controller import (
+    ACTION_NUMBER, CONTROL_MODE, LIGHT1_BRIGHTNESS, LIGHT1_SWITCH, SIGNAL_TYPE, STATUS,
+    STEP_DURATION, SWITCH, FeederController, action_code,
+)
+
+class Result:
+    def __init__(self, registers=None, error=False):
+        self.registers = registers or [0]
+        self.error = error
+
+    def isError(self):
+        return self.error
+
+class FakeClient:
+    """Modbus 요청을 (함수, 주소, 값) 순서대로 기록"""
+
+    def __init__(self):
+        self.log = []
+        self.threads = set()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    async def write_register(self, address, value):
+        self.log.append(("write_register", address, value))
+        self.threads.add(threading.get_ident())
+        return Result()
+
+    async def write_registers(self, address, values):
+        self.log.append(("write_registers", address, list(values)))
+        return Result()
+
+    async def read_holding_registers(self, address, count=1):
+        self.log.append(("read_holding_registers", address, count))
+        return Result([0] * count)
+
+def run(feeder, coro_fn):
+    """연결 없이 피더 코루틴을 현재 스레드 루프에서 실행"""
+    async def main():
+        feeder.io_lock = asyncio.Lock()
+        feeder.online = asyncio.Event()
+        feeder.online.set()
+        return await coro_fn()
+    return asyncio.run(main())
+
+def make_feeder():
+    feeder = FeederController(step_mode=False)
+    feeder.client = FakeClient()
+    return feeder
+
+def test_contiguous_groups_consecutive_addresses():
+    items = [(1, 10), (2, 20), (3, 30), (5, 50), (10, 1), (11, 2)]
+    assert FeederController._contiguous(items) == [
+        (1, [10, 20, 30]), (5, [50]), (10, [1, 2]),
+    ]
+    assert FeederController._contiguous([]) == []
+
+def test_write_batches_contiguous_registers():
+    feeder = make_feeder()
+    run(feeder, lambda: feeder._write({LIGHT1_BRIGHTNESS: 500, LIGHT1_SWITCH: 1}))
+    assert feeder.client.log == [("write_registers", LIGHT1_SWITCH, [1, 500])]
+    assert feeder.stats["transactions"] == 1
+
+def test_shadow_skips_unchanged_but_not_volatile_registers():
+    feeder = make_feeder()
+
+    async def scenario():
+        await feeder._write({LIGHT1_SWITCH: 1, SWITCH: 0})
+        feeder.client.log.clear()
+        await feeder._write({LIGHT1_SWITCH: 1, SWITCH: 0})
+
+    run(feeder, scenario)
+    # 조명 스위치는 섀도와 같아서 생략, SWITCH는 장치가 바꿀 수 있어 항상 씀
+    assert feeder.client.log == [("write_register", SWITCH, 0)]
+    assert feeder.stats["skipped"] == 1
+
+def test_failed_write_clears_shadow():
+    feeder = make_feeder()
+
+    async def failing(address, values):
+        raise OSError("끊김")
+
+    async def scenario():
+        await feeder._write({LIGHT1_SWITCH: 1, LIGHT1_BRIGHTNESS: 500})
+        feeder.client.write_registers = failing
+        with pytest.raises(IOError):
+            await feeder._write({LIGHT1_SWITCH: 0, LIGHT1_BRIGHTNESS: 0})
+
+    feeder.request_timeout = 0.05
+    feeder.reconnect_wait = 0.05
+    run(feeder, scenario)
+    assert LIGHT1_SWITCH not in feeder.shadow
+    assert LIGHT1_BRIGHTNESS not in feeder.shadow
+
+def test_start_writes_action_number_before_switch():
+    feeder = make_feeder()
+    run(feeder, lambda: feeder._start(3))
+    assert feeder.client.log == [
+        ("write_register", ACTION_NUMBER, action_code(3)),
+        ("write_register", SWITCH, 1),
+    ]
+
+class DeviceClient(FakeClient):
+    """레지스터 값을 가진 피더 흉내 (STATUS는 읽을 때마다 status 목록에서 하나씩)"""
+
+    def __init__(self, status=(0,), registers=None):
+        super().__init__()
+        self.registers = {CONTROL_MODE: 1, SIGNAL_TYPE: 0, **(registers or {})}
+        self.status = list(status)
+        self.fail_status = False
+
+    async def write_register(self, address, value):
+        self.registers[address] = value
+        return await super().write_register(address, value)
+
+    async def write_registers(self, address, values):
+        for offset, value in enumerate(values):
+            self.registers[address + offset] = value
+        return await super().write_registers(address, values)
+
+    async def read_holding_registers(self, address, count=1):
+        self.log.append(("read_holding_registers", address, count))
+        if address == STATUS:
+            if self.fail_status:
+                return Result(error=True)
+            value = self.status.pop(0) if len(self.status) > 1 else self.status[0]
+            return Result([value])
+        return Result([self.registers.get(address, 0)])
+
+def make_step_feeder(status=(0,)):
+    feeder = FeederController(step_mode=True, poll_hz=200)
+    feeder.client = DeviceClient(status)
+    return feeder
+
+def test_step_run_stops_on_status_and_timed_run_restores_modes():
+    feeder = make_step_feeder(status=(1, 1, 1, 0))
+
+    async def scenario():
+        measurement = await feeder._run_step(2, 0.3, grace=0.2)
+        in_step = {k: feeder.client.registers[k] for k in (CONTROL_MODE, SIGNAL_TYPE, STEP_DURATION)}
+        await feeder._run_timed(2, 0.0)
+        return measurement, in_step
+
+    measurement, in_step = run(feeder, scenario)
+    assert measurement["source"] == "status"
+    assert measurement["planned"] == 0.3
+    # STATUS가 정지로 바뀐 즉시 종료 (프로그램한 시간까지 기다리지 않음)
+    assert measurement["actual"] < 0.3
+    assert in_step == {CONTROL_MODE: 0, SIGNAL_TYPE: 1, STEP_DURATION: 3}
+    # 시간 제어 동작 전에 단계 모드 이전 값으로 복원
+    assert feeder.client.registers[CONTROL_MODE] == 1
+    assert feeder.client.registers[SIGNAL_TYPE] == 0
+    assert feeder.saved_modes is None
+
+def test_step_run_falls_back_to_planned_time_without_busy_status():
+    feeder = make_step_feeder(status=(0,))
+    measurement = run(feeder, lambda: feeder._run_step(2, 0.1, grace=0.03))
+    assert measurement["source"] == "fallback"
+    assert measurement["actual"] >= 0.1
+    assert feeder.get_step_stats() == {"count": 0, "fallback": 1}
+
+def test_step_error_stops_feeder_and_restores_modes_on_exit():
+    feeder = make_step_feeder(status=(1,))
+    feeder._start_loop()
+
+    async def setup():
+        feeder.io_lock = asyncio.Lock()
+        feeder.online = asyncio.Event()
+        feeder.online.set()
+
+    try:
+        feeder.run_sync(setup())
+        feeder.client.fail_status = True
+        with pytest.raises(IOError, match="요청 오류"):
+            feeder.run_sync(feeder._run_step(2, 0.2), timeout=2.0)
+        # 실패해도 정지 비트는 씀, 모드 레지스터는 단계 모드 값으로 남음
+        assert feeder.client.registers[SWITCH] == 0
+        assert feeder.saved_modes == {CONTROL_MODE: 1, SIGNAL_TYPE: 0}
+        assert feeder.client.registers[CONTROL_MODE] == 0
+
+        feeder.set_step_mode(False)
+        assert feeder.client.registers[CONTROL_MODE] == 1
+        assert feeder.client.registers[SIGNAL_TYPE] == 0
+        assert feeder.saved_modes is None
+    finally:
+        feeder.loop.call_soon_threadsafe(feeder.loop.stop)
+        feeder.thread.join(timeout=2.0)
+
+def test_submit_runs_on_feeder_loop_thread():
+    feeder = make_feeder()
+    assert feeder.run_sync(feeder._write({SWITCH: 0})) is False
+    with pytest.raises(IOError, match="미연결"):
+        asyncio.run(feeder.write({SWITCH: 0}))
+
+    feeder._start_loop()
+
+    async def setup():
+        feeder.io_lock = asyncio.Lock()
+        feeder.online = asyncio.Event()
+        feeder.online.set()
+
+    feeder.run_sync(setup())
+
+    async def caller():
+        # 호출한 루프는 피더 요청 중에도 다른 작업을 계속함
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await feeder.write({SWITCH: 1})
+        task.cancel()
+        return ticks
+
+    try:
+        assert asyncio.run(caller()) > 0
+        assert feeder.client.threads == {feeder.thread.ident}
+    finally:
+        feeder.disconnect()
+    assert feeder.client.closed
+    assert feeder.loop is None
+
+class StallingClient(FakeClient):
+    """처음 stalls번의 요청은 응답하지 않음"""
+
+    def __init__(self, stalls=1):
+        super().__init__()
+        self.stalls = stalls
+
+    async def read_holding_registers(self, address, count=1):
+        self.log.append(("read_holding_registers", address, count))
+        if self.stalls:
+            self.stalls -= 1
+            await asyncio.sleep(10)
+        return Result([7] * count)
+
+def make_stalling_feeder(stalls):
+    feeder = FeederController(step_mode=False, request_timeout=0.05, reconnect_wait=0.5)
+    feeder.client = StallingClient(stalls)
+    return feeder
+
+def test_request_timeout_reconnects_and_retries_once():
+    feeder = make_stalling_feeder(stalls=1)
+
+    async def scenario():
+        async def reconnect():
+            # 감시 루프 대신 끊김을 확인하고 다시 연결
+            while feeder.online.is_set():
+                await asyncio.sleep(0.01)
+            feeder.online.set()
+
+        task = asyncio.create_task(reconnect())
+        registers = await feeder._read(STATUS)
+        await task
+        return registers
+
+    assert run(feeder, scenario) == [7]
+    assert feeder.stats["timeouts"] == 1
+    assert len(feeder.client.log) == 2
+
+def test_request_without_reconnect_fails_after_wait():
+    feeder = make_stalling_feeder(stalls=1)
+    feeder.reconnect_wait = 0.05
+    with pytest.raises(IOError, match="미연결"):
+        run(feeder, lambda: feeder._read(STATUS))
+    # 재연결을 기다리다 실패 → 두 번째 요청은 보내지 않음
+    assert len(feeder.client.log) == 1
+    assert not feeder.online.is_set()
+
+def test_request_without_retry_fails_on_first_timeout():
+    feeder = make_stalling_feeder(stalls=1)
+    with pytest.raises(IOError, match="요청 실패"):
+        run(feeder, lambda: feeder._read(STATUS, retry=False))
+    assert feeder.stats["timeouts"] == 1
+
+async def offline(feeder, scenario):
+    """연결 끊긴 상태로 시작"""
+    feeder.io_lock = asyncio.Lock()
+    feeder.online = asyncio.Event()
+    return await scenario()
+
+def test_health_loop_backs_off_exponentially_until_reconnect(monkeypatch):
+    feeder = FeederController(step_mode=False, reconnect_max=1.5)
+    outcomes = [False, False, False, True]
+    delays = []
+    sleep = asyncio.sleep
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        await sleep(0)
+
+    async def fake_open():
+        ok = outcomes.pop(0)
+        if ok:
+            feeder.online.set()
+            feeder.closing = True
+        return ok
+
+    async def scenario():
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        feeder._open = fake_open
+        await asyncio.wait_for(feeder._health_loop(), 1.0)
+
+    asyncio.run(offline(feeder, scenario))
+    assert delays == [0.5, 1.0, 1.5, 1.5]
+    assert feeder.stats["reconnects"] == 1
+
+def test_health_loop_marks_unresponsive_link_offline():
+    feeder = make_stalling_feeder(stalls=1)
+    feeder.keepalive = 0.01
+
+    async def scenario():
+        feeder.online.set()
+        task = asyncio.create_task(feeder._health_loop())
+
+        async def disconnected():
+            while feeder.online.is_set():
+                await asyncio.sleep(0.01)
+
+        try:
+            await asyncio.wait_for(disconnected(), 1.0)
+        finally:
+            task.cancel()
+
+    asyncio.run(offline(feeder, scenario))
+    # 응답 없는 STATUS 확인 → 끊김으로 표시 (재연결은 다음 반복에서)
+    assert feeder.stats["timeouts"] == 1
@@ -0,0 +1,128 @@
+import json
+
+import numpy as np
+import pytest
+
+from feeder_policy import DEFAULT_RECIPE, FeederPolicy, _candidates
+
+SHAPE = (300, 300)
+
+def snapshot(centers, cls=None, conf=None, size=10):
+    """중심 좌표 목록 → 검출 스냅샷 (정사각형 박스)"""
+    centers = np.array(centers, np.float32).reshape(-1, 2)
+    n = len(centers)
+    half = size / 2
+    return {
+        "xyxy": np.concatenate([centers - half, centers + half], axis=1),
+        "cls": np.array(cls if cls is not None else [1] * n, np.int64),
+        "conf": np.array(conf if conf is not None else [0.9] * n, np.float32),
+        "shape": SHAPE,
+    }
+
+def make_policy(tmp_path, **kwargs):
+    kwargs.setdefault("settle_time", 1.0)
+    return FeederPolicy(log_dir=str(tmp_path), **kwargs)
+
+# 3x3 칸 중심 (100px 간격)
+LEFT = [(50, 50), (50, 150), (50, 250)]
+RIGHT = [(250, 50), (250, 150), (250, 250)]
+TOP = [(50, 50), (150, 50), (250, 50)]
+BOTTOM = [(50, 250), (150, 250), (250, 250)]
+CORNERS = [(50, 50), (250, 50), (50, 250), (250, 250)]
+
+@pytest.mark.parametrize("centers, cls, condition", [
+    (CORNERS + [(150, 150)], [1, 1, 0, 0, 0], "upside_down"),
+    (LEFT, None, "edge_left"),
+    (RIGHT, None, "edge_right"),
+    (TOP, None, "edge_top"),
+    (BOTTOM, None, "edge_bottom"),
+    ([(50, 150), (60, 150), (250, 150), (240, 150)], None, "crowded"),
+    (CORNERS, None, "mixed"),
+])
+def test_each_tray_condition_is_classified(tmp_path, centers, cls, condition):
+    state = make_policy(tmp_path).observe(snapshot(centers, cls))
+    assert state["condition"] == condition
+
+def test_empty_tray(tmp_path):
+    policy = make_policy(tmp_path)
+    assert policy.observe(None)["condition"] == "empty"
+    assert policy.observe(snapshot([]))["condition"] == "empty"
+    # 신뢰도 낮은 검출만 있으면 빈 트레이
+    assert policy.observe(snapshot(CORNERS, conf=[0.5] * 4))["condition"] == "empty"
+
+def test_observe_counts_and_histogram(tmp_path):
+    state = make_policy(tmp_path).observe(snapshot(
+        [(50, 50), (55, 55), (250, 250), (150, 150)], cls=[1, 1, 1, 0],
+    ))
+    assert (state["front"], state["back"], state["pickable_front"]) == (3, 1, 1)
+    assert state["front_ratio"] == 0.75
+    assert state["crowded_ratio"] == 0.5
+    assert state["histogram"] == [[2, 0, 0], [0, 1, 0], [0, 0, 1]]
+
+def test_block_observation_uses_pickable_flags(tmp_path):
+    policy = make_policy(tmp_path)
+    blocks = {
+        "centers": [(50, 150), (60, 150), (250, 150), (240, 150)],
+        "pickable": np.array([False, False, True, False]),
+    }
+    state = policy.observe_blocks(blocks, SHAPE)
+    assert state["condition"] == "crowded"
+    assert (state["front"], state["back"], state["pickable_front"]) == (4, 0, 1)
+    assert policy.observe_blocks({"centers": [], "pickable": np.zeros(0, bool)}, SHAPE)["condition"] == "empty"
+
+def test_untried_recipes_are_tried_in_order(tmp_path):
+    policy = make_policy(tmp_path)
+    state = {"condition": "crowded"}
+    tried = []
+    for _ in _candidates("crowded"):
+        recipe = policy.choose(state)
+        tried.append(recipe)
+        policy.record(state, recipe, {"pickable_front": 1}, 1.0)
+    assert tried == _candidates("crowded")
+
+def test_best_recipe_is_chosen_after_exploration(tmp_path):
+    policy = make_policy(tmp_path, exploration=0.0)
+    state = {"condition": "mixed"}
+    for recipe, picked in zip(_candidates("mixed"), (2, 6, 4)):
+        policy.record(state, recipe, {"pickable_front": picked}, 1.0)
+    assert policy.choose(state) == ((13, 0.5), (14, 1.5))
+
+def test_exploration_bonus_revisits_rarely_tried_recipe(tmp_path):
+    policy = make_policy(tmp_path, exploration=2.0)
+    state = {"condition": "empty"}
+    best, second, third = _candidates("empty")
+    for _ in range(20):
+        policy.record(state, best, {"pickable_front": 4}, 1.0)
+    policy.record(state, second, {"pickable_front": 3}, 1.0)
+    policy.record(state, third, {"pickable_front": 3}, 1.0)
+    # 평균은 조금 낮아도 시도 횟수가 적은 후보를 다시 시도
+    assert policy.choose(state) in (second, third)
+
+def test_reward_is_pickable_fronts_per_second(tmp_path):
+    policy = make_policy(tmp_path, settle_time=1.0)
+    reward = policy.record({"condition": "mixed"}, DEFAULT_RECIPE, {"pickable_front": 6}, 2.0)
+    assert reward == pytest.approx(2.0)
+
+def test_stats_persist_per_name(tmp_path):
+    policy = make_policy(tmp_path)
+    state = {"condition": "upside_down", "front": 1, "back": 4, "pickable_front": 0}
+    recipe = _candidates("upside_down")[0]
+    policy.record(state, recipe, {"pickable_front": 3, "condition": "mixed"}, 0.5)
+    policy.record(state, recipe, {"pickable_front": 0, "condition": "upside_down"}, 0.5)
+
+    reloaded = make_policy(tmp_path)
+    entry = reloaded.get_stats()["upside_down"][FeederPolicy.recipe_key(recipe)]
+    assert entry["n"] == 2
+    assert entry["mean"] == pytest.approx(1.0)
+    # 이미 시도한 후보는 건너뜀
+    assert reloaded.choose(state) == _candidates("upside_down")[1]
+
+    lines = (tmp_path / "feeder_policy.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["after"]["condition"] for line in lines] == ["mixed", "upside_down"]
+
+    # 다른 이름의 정책은 실적을 공유하지 않음
+    assert make_policy(tmp_path, name="block_feeder_policy").get_stats() == {}
+
+def test_corrupt_stats_file_starts_fresh(tmp_path):
+    (tmp_path / "feeder_policy_stats.json").write_text("{", encoding="utf-8")
+    assert make_policy(tmp_path).get_stats() == {}
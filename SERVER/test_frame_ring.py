@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from detections import ROW_WIDTH
+from frame_ring import FrameRing
+
+@pytest.fixture
+def ring():
+    ring = FrameRing.create(48, 64, slots=3, max_jpeg=256, max_rows=8)
+    yield ring
+    ring.close()
+
+def frame(value, h=48, w=64):
+    return np.full((h, w, 3), value, np.uint8)
+
+def rows(n, value=1.0):
+    return np.full((n, ROW_WIDTH), value, np.float32)
+
+def test_empty_ring_has_no_latest(ring):
+    assert ring.latest() is None
+
+def test_latest_returns_last_written_frame(ring):
+    ring.write(frame(1), b"jpg1", rows(2), "lego", ts=1.0)
+    seq = ring.write(frame(2, 40, 50), b"jpeg2", rows(3, 2.0), "block", ts=2.0)
+
+    view = ring.latest()
+    assert view.seq == seq == 2
+    assert view.mode == "block"
+    assert view.ts == 2.0
+    assert view.frame.shape == (40, 50, 3)
+    assert np.all(view.frame == 2)
+    assert view.jpeg.tobytes() == b"jpeg2"
+    assert view.rows.shape == (3, ROW_WIDTH)
+    assert view.valid()
+
+def test_view_becomes_invalid_after_slot_is_overwritten(ring):
+    ring.write(frame(1), b"", None, "lego")
+    view = ring.latest()
+    for value in range(2, 2 + ring.n_slots):
+        ring.write(frame(value), b"", None, "lego")
+    # 한 바퀴 돌아 같은 슬롯을 덮어씀
+    assert not view.valid()
+    assert ring.latest().seq == 1 + ring.n_slots
+
+def test_slot_being_written_is_not_returned(ring):
+    ring.write(frame(1), b"", None, "lego")
+    ring.slots[ring.ctrl["latest_slot"]]["seq"] = 0     # 쓰기 도중 상태
+    assert ring.latest() is None
+
+def test_oversized_inputs_are_clipped(ring):
+    ring.write(frame(5, 100, 100), b"x" * 1000, rows(20), "lego")
+    view = ring.latest()
+    assert view.frame.shape == (48, 64, 3)
+    assert len(view.jpeg) == 0          # 버퍼보다 큰 JPEG은 버림
+    assert len(view.rows) == 8
+
+def test_attach_sees_layout_and_frames(ring):
+    ring.write(frame(7), b"abc", rows(1), "lego")
+    reader = FrameRing.attach(ring.name)
+    try:
+        assert (reader.n_slots, reader.max_height, reader.max_width) == (3, 48, 64)
+        view = reader.latest()
+        assert view.jpeg.tobytes() == b"abc"
+        assert np.all(view.frame == 7)
+        del view
+    finally:
+        reader.close()
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from input_monitor import InputMonitor
+
+class FakeCard:
+    """read_port 값을 테스트에서 바꾸는 입력 포트"""
+
+    def __init__(self, value=0):
+        self.value = value
+        self.reads = 0
+
+    def read_port(self):
+        self.reads += 1
+        return self.value
+
+def make_monitor(value=0):
+    return InputMonitor(FakeCard(value), rate_hz=1000)
+
+def wait_until(predicate, timeout=1.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+def test_does_not_poll_without_sensors_or_waiters():
+    monitor = make_monitor()
+    monitor.start(keep_running=False)
+    time.sleep(0.02)
+    assert not monitor.running
+    assert monitor.controller.reads == 0
+
+def test_keep_running_polls_until_stopped():
+    monitor = make_monitor()
+    monitor.start(keep_running=True)
+    try:
+        assert wait_until(lambda: monitor.samples > 5)
+    finally:
+        monitor.stop()
+    assert not monitor.running
+
+def test_subscriber_starts_polling_and_last_unsubscribe_stops_it():
+    monitor = make_monitor()
+    monitor.start(keep_running=False)
+    edges = []
+    handle = monitor.subscribe(lambda ch, state, ts: edges.append((ch, state)), channel=1)
+    assert monitor.running
+
+    monitor.controller.value = 0b10
+    assert wait_until(lambda: edges == [(1, True)])
+
+    monitor.unsubscribe(handle)
+    assert wait_until(lambda: not monitor.running)
+    assert monitor.read(1) is None      # 멈춘 동안은 오래된 값을 보고하지 않음
+
+def test_subscribe_before_card_connect_does_not_poll():
+    monitor = make_monitor()
+    monitor.subscribe(lambda *args: None)
+    assert not monitor.running
+
+def test_wait_for_sees_state_already_reached_on_lazy_start():
+    monitor = make_monitor(0b100)
+    monitor.start(keep_running=False)
+    assert monitor.wait_for(2, True, timeout=0.2)
+    assert asyncio.run(monitor.wait_for_async(2, True, timeout=0.2))
+    assert wait_until(lambda: not monitor.running)
+
+def test_wait_for_async_wakes_on_edge_and_times_out():
+    monitor = make_monitor()
+    monitor.start(keep_running=False)
+
+    async def scenario():
+        waiter = asyncio.ensure_future(monitor.wait_for_async(3, True, timeout=1.0))
+        await asyncio.sleep(0.02)
+        monitor.controller.value = 0b1000
+        reached = await waiter
+        timed_out = await monitor.wait_for_async(0, True, timeout=0.05)
+        return reached, timed_out
+
+    assert asyncio.run(scenario()) == (True, False)
+    monitor.stop()
@@ -0,0 +1,65 @@
+import json
+
+from job_journal import JobJournal
+
+def make_journal(tmp_path):
+    return JobJournal(str(tmp_path / "journal" / "lego_jobs.jsonl"))
+
+def test_replay_restores_completed_plates_and_tool(tmp_path):
+    journal = make_journal(tmp_path)
+    job_id = journal.start_job("heart", [11, 12, 13])
+    journal.record_tool(job_id, True)
+    journal.record_placement(job_id, 0, 11, True)
+    journal.record_placement(job_id, 1, 12, False)
+    journal.set_status(job_id, "interrupted", "Plate #12 작업 실패")
+
+    job = make_journal(tmp_path).get_job(job_id)
+    assert job["completed"] == [0]
+    assert job["tool_attached"] is True
+    assert job["status"] == "interrupted"
+
+def test_resumable_excludes_finished_jobs(tmp_path):
+    journal = make_journal(tmp_path)
+    done = journal.start_job("star", [1])
+    journal.set_status(done, "completed")
+    dropped = journal.start_job("star", [1])
+    journal.set_status(dropped, "abandoned")
+    open_job = journal.start_job("heart", [1, 2, 3])
+    journal.record_placement(open_job, 2, 3, True)
+
+    resumable = journal.get_resumable()
+    assert [job["job_id"] for job in resumable] == [open_job]
+    assert resumable[0]["remaining"] == 2
+
+def test_torn_last_line_is_ignored(tmp_path):
+    journal = make_journal(tmp_path)
+    job_id = journal.start_job("heart", [1, 2])
+    journal.record_placement(job_id, 0, 1, True)
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"event": "placed", "job_id": "')
+
+    assert journal.get_job(job_id)["completed"] == [0]
+
+def test_compact_keeps_open_jobs_as_snapshots(tmp_path):
+    journal = make_journal(tmp_path)
+    finished = journal.start_job("star", [1])
+    journal.set_status(finished, "completed")
+    job_id = journal.start_job("heart", [1, 2, 3])
+    journal.record_tool(job_id, True)
+    journal.record_placement(job_id, 0, 1, True)
+    journal.record_placement(job_id, 1, 2, True)
+    before = journal.get_job(job_id)
+
+    journal.compact()
+
+    with open(journal.path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["event"] for r in records] == ["snapshot"]
+    assert journal.get_job(finished) is None
+    after = journal.get_job(job_id)
+    for key in ("completed", "tool_attached", "status", "plates"):
+        assert after[key] == before[key]
+
+    # 압축 후에도 이어서 기록/재생
+    journal.record_placement(job_id, 2, 3, True)
+    assert journal.get_job(job_id)["completed"] == [0, 1, 2]
@@ -0,0 +1,123 @@
+import asyncio
+
+from job_scheduler import JobScheduler
+from robot_controller import RobotController
+
+class FakeSocket:
+    """Task 메시지를 기록하고 fail에 있는 Task는 빈 응답"""
+
+    def __init__(self, fail):
+        self.tasks = []
+        self.fail = fail
+
+    def sendall(self, data):
+        self.tasks.append(int(data.decode().split(",")[1]))
+
+    def recv(self, size):
+        return b"" if self.tasks[-1] in self.fail else b"done"
+
+def make_robot(fail=()):
+    """실제 send_task를 쓰되 소켓만 바꾼 로봇 (재시도 시 재연결/대기 없음)"""
+    robot = RobotController(max_retries=1)
+    robot.sock = FakeSocket(set(fail))
+    robot.connected = True
+    robot.tasks = robot.sock.tasks
+    return robot
+
+class FakeEvents:
+    def publish(self, event, data):
+        pass
+
+class FakeSystem:
+    def __init__(self, robot):
+        self.robot = robot
+        self.events = FakeEvents()
+
+def make_scheduler(robot, outcomes=None):
+    """outcomes: shape -> status 또는 예외 (기본 completed)"""
+    outcomes = outcomes or {}
+    ran = []
+
+    async def runner(shape, tool_attached=False, keep_tool=False):
+        ran.append(shape)
+        outcome = outcomes.get(shape, "completed")
+        if isinstance(outcome, Exception):
+            raise outcome
+        return {"status": outcome}
+
+    scheduler = JobScheduler(FakeSystem(robot))
+    scheduler.register("lego", "suction", runner)
+    scheduler.register("block", "gripper", runner)
+    return scheduler, ran
+
+def test_plan_groups_by_tool_starting_with_mounted_tool():
+    robot = make_robot()
+    robot.tool = "gripper"
+    scheduler, _ = make_scheduler(robot)
+    for kind, shape in (("lego", "a"), ("block", "B"), ("lego", "c"), ("block", "D")):
+        scheduler.enqueue(kind, shape)
+
+    assert [job["shape"] for job in scheduler.plan()] == ["B", "D", "a", "c"]
+
+def test_run_changes_tool_once_per_group_and_detaches_at_end():
+    robot = make_robot()
+    scheduler, ran = make_scheduler(robot)
+    for kind, shape in (("lego", "a"), ("block", "B"), ("lego", "c")):
+        scheduler.enqueue(kind, shape)
+
+    report = asyncio.run(scheduler.run())
+
+    assert ran == ["a", "c", "B"]
+    # 석션 장착 → 탈착 → 그리퍼 장착 → 탈착 → 대기 위치
+    assert robot.tasks == [4, 5, 2, 3, 0]
+    assert report["status"] == "completed"
+    assert robot.tool is None
+
+def test_tool_changed_outside_scheduler_is_seen():
+    robot = make_robot()
+    scheduler, _ = make_scheduler(robot, {"a": "interrupted"})
+    scheduler.enqueue("lego", "a")
+    asyncio.run(scheduler.run())
+    assert scheduler.current_tool == "suction"
+
+    # 재개 API가 작업을 마치고 석션을 탈착한 경우
+    robot.detach_suction()
+    robot.tasks.clear()
+    scheduler.enqueue("lego", "b")
+    asyncio.run(scheduler.run())
+    assert robot.tasks[0] == 4
+
+def test_interrupted_job_requeues_remaining_jobs():
+    robot = make_robot()
+    scheduler, _ = make_scheduler(robot, {"a": "interrupted"})
+    scheduler.enqueue("lego", "a")
+    scheduler.enqueue("lego", "b")
+
+    report = asyncio.run(scheduler.run())
+
+    assert report["status"] == "interrupted"
+    assert [job["shape"] for job in scheduler.queue] == ["b"]
+    assert scheduler.running is False
+
+def test_runner_exception_requeues_remaining_jobs():
+    robot = make_robot()
+    scheduler, _ = make_scheduler(robot, {"a": RuntimeError("boom")})
+    scheduler.enqueue("lego", "a")
+    scheduler.enqueue("block", "B")
+
+    report = asyncio.run(scheduler.run())
+
+    assert report["jobs"][0]["status"] == "error"
+    assert [job["shape"] for job in scheduler.queue] == ["B"]
+    assert scheduler.running is False
+
+def test_failed_attach_keeps_whole_queue():
+    robot = make_robot(fail={4})
+    scheduler, ran = make_scheduler(robot)
+    scheduler.enqueue("lego", "a")
+    scheduler.enqueue("lego", "b")
+
+    asyncio.run(scheduler.run())
+
+    assert ran == []
+    assert [job["shape"] for job in scheduler.queue] == ["a", "b"]
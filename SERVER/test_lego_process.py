@@ -0,0 +1,32 @@
+import math
+
+import pytest
+
+from lego_process import camera_angle_to_robot, camera_to_robot
+
+@pytest.mark.parametrize("camera, robot", [
+    (0.0, -90.0),
+    (30.0, 60.0),
+    (-30.0, -60.0),
+    (89.0, 1.0),
+])
+def test_lego_angle_is_reflected_into_robot_frame(camera, robot):
+    assert camera_angle_to_robot(camera) == pytest.approx(robot, abs=0.1)
+
+def test_lego_angle_stays_in_half_period_range():
+    for camera in range(-180, 181, 7):
+        assert -90.0 <= camera_angle_to_robot(float(camera)) < 90.0
+
+def test_angle_matches_converted_points():
+    # 카메라에서 30도 방향으로 떨어진 두 점을 변환해 얻은 방향과 같아야 함
+    x0, y0 = camera_to_robot(500.0, 400.0)
+    x1, y1 = camera_to_robot(500.0 + 100 * 3 ** 0.5 / 2, 400.0 + 100 * 0.5)
+    expected = math.degrees(math.atan2(y1 - y0, x1 - x0))
+    expected = (expected + 90.0) % 180.0 - 90.0
+    assert camera_angle_to_robot(30.0) == pytest.approx(expected, abs=1e-6)
+
+@pytest.mark.parametrize("camera", [0.0, 10.0, -20.0, 44.0])
+def test_block_angle_uses_quarter_turn_symmetry(camera):
+    # 정사각 블럭은 90도 주기: 90 - θ ≡ -θ
+    assert camera_angle_to_robot(camera, period=90.0) == pytest.approx(-camera, abs=0.1)
+    assert -45.0 <= camera_angle_to_robot(camera, period=90.0) < 45.0
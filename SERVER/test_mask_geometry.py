@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from mask_geometry import letterbox_to_image, mask_moments, pick_points
+
+def rotated_rect_mask(h, w, center, length, width, angle):
+    """이미지 좌표계(y 아래 방향)에서 angle도 기울어진 직사각형 마스크
+
+    변 길이를 홀수로 주면 경계가 픽셀 중심에 걸리지 않아 마스크가 대칭이 된다.
+    """
+    ys, xs = np.mgrid[0:h, 0:w]
+    theta = np.radians(angle)
+    dx, dy = xs - center[0], ys - center[1]
+    along = dx * np.cos(theta) + dy * np.sin(theta)
+    across = -dx * np.sin(theta) + dy * np.cos(theta)
+    return ((np.abs(along) <= length / 2) & (np.abs(across) <= width / 2)).astype(np.uint8)
+
+@pytest.mark.parametrize("angle", [0.0, 30.0, -45.0, 60.0, -80.0])
+def test_mask_moments_center_and_axis(angle):
+    mask = rotated_rect_mask(120, 160, (70.0, 55.0), 81, 21, angle)
+    centers, angles, area = mask_moments(mask[None])
+
+    np.testing.assert_allclose(centers[0], [70.0, 55.0], atol=0.5)
+    assert abs(angles[0] - angle) < 1.5
+    assert area[0] == mask.sum()
+
+def test_mask_moments_batch_and_range():
+    masks = np.stack([
+        rotated_rect_mask(64, 64, (20, 20), 31, 9, 90.0),
+        rotated_rect_mask(64, 64, (40, 30), 31, 9, 10.0),
+        np.zeros((64, 64), np.uint8),
+    ])
+    centers, angles, area = mask_moments(masks)
+    assert centers.shape == (3, 2)
+    assert np.all((angles >= -90) & (angles < 90))
+    assert abs(abs(angles[0]) - 90) < 1.5
+    assert area[2] == 0
+
+def test_mask_moments_empty_batch():
+    centers, angles, area = mask_moments(np.zeros((0, 8, 8), np.uint8))
+    assert centers.shape == (0, 2) and len(angles) == 0 and len(area) == 0
+
+def test_letterbox_to_image_removes_padding_and_scale():
+    # 640x480 이미지 → 320x320 레터박스 (gain 0.5, 위아래 40px 패딩)
+    points = np.array([[160.0, 160.0], [0.0, 40.0]])
+    out = letterbox_to_image(points, (320, 320), (480, 640))
+    np.testing.assert_allclose(out, [[320.5, 240.5], [0.5, 0.5]])
+
+def test_pick_points_falls_back_to_box_center_for_empty_mask():
+    masks = np.stack([
+        rotated_rect_mask(32, 32, (10, 12), 13, 5, 0.0),
+        np.zeros((32, 32), np.uint8),
+    ])
+    boxes = np.array([[0, 0, 20, 20], [4, 6, 10, 12]], np.float32)
+    centers, angles = pick_points(masks, (32, 32), boxes)
+
+    np.testing.assert_allclose(centers[0], [10, 12], atol=0.5)
+    np.testing.assert_allclose(centers[1], [7, 9])
+    assert angles[1] == 0.0
+    assert centers.dtype == np.float32
+
+def test_pick_points_without_masks_uses_boxes():
+    boxes = np.array([[0, 0, 10, 20]], np.float32)
+    centers, angles = pick_points(None, (32, 32), boxes)
+    np.testing.assert_allclose(centers, [[5, 10]])
+    assert angles.tolist() == [0.0]
@@ -0,0 +1,26 @@
+import importlib.util
+
+import pytest
+
+pytest.importorskip("ultralytics")
+
+from model_cache import default_format
+
+def test_default_format_is_pt(monkeypatch):
+    monkeypatch.delenv("FLEXIBOT_MODEL_FORMAT", raising=False)
+    assert default_format() == "pt"
+
+def test_onnx_is_opt_in(monkeypatch):
+    monkeypatch.setenv("FLEXIBOT_MODEL_FORMAT", "onnx")
+    expected = "onnx" if importlib.util.find_spec("onnxruntime") else "pt"
+    assert default_format() == expected
+
+def test_torchscript_is_opt_in(monkeypatch):
+    monkeypatch.setenv("FLEXIBOT_MODEL_FORMAT", "torchscript")
+    assert default_format() == "torchscript"
+
+@pytest.mark.parametrize("fmt", ["auto", "tflite"])
+def test_unknown_format_is_rejected(monkeypatch, fmt):
+    monkeypatch.setenv("FLEXIBOT_MODEL_FORMAT", fmt)
+    with pytest.raises(ValueError):
+        default_format()
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+pytest.importorskip("ultralytics")
+
+import model_swap
+from model_swap import ModelSwapper, resolve_model
+
+@pytest.fixture
+def model_dir(tmp_path):
+    directory = tmp_path / "MODEL"
+    directory.mkdir()
+    (directory / "new_model.pt").write_bytes(b"weights")
+    (tmp_path / "outside.pt").write_bytes(b"weights")
+    return directory
+
+def test_resolve_model_accepts_file_name_under_model_dir(model_dir):
+    assert resolve_model("new_model.pt", str(model_dir)) == os.path.realpath(model_dir / "new_model.pt")
+
+@pytest.mark.parametrize("name", [
+    "../outside.pt", "sub/new_model.pt", "..\\outside.pt", "/etc/passwd", "", "..", "new_model.onnx",
+])
+def test_resolve_model_rejects_paths_and_other_files(model_dir, name):
+    with pytest.raises(ValueError):
+        resolve_model(name, str(model_dir))
+
+def test_resolve_model_rejects_symlink_out_of_model_dir(model_dir):
+    link = model_dir / "link.pt"
+    try:
+        os.symlink(model_dir.parent / "outside.pt", link)
+    except OSError:
+        pytest.skip("심볼릭 링크를 만들 수 없음")
+    with pytest.raises(ValueError):
+        resolve_model("link.pt", str(model_dir))
+
+def test_resolve_model_missing_file(model_dir):
+    with pytest.raises(FileNotFoundError):
+        resolve_model("missing.pt", str(model_dir))
+
+class FakeService:
+    def __init__(self):
+        self.swapped = None
+
+    def swap_model(self, model, report, path):
+        self.swapped = (model, dict(report), path)
+
+def test_swap_warms_up_before_swapping(model_dir, monkeypatch):
+    calls = []
+
+    def fake_load(path):
+        calls.append("load")
+        return "model", {"load_seconds": 0.1}
+
+    def fake_warm_up(model, image, report):
+        calls.append("warm_up")
+        report["warmup_seconds"] = 0.2
+        return report
+
+    monkeypatch.setattr(model_swap, "load_model", fake_load)
+    monkeypatch.setattr(model_swap, "warm_up", fake_warm_up)
+    monkeypatch.setattr(model_swap, "reference_image", lambda: None)
+
+    service = FakeService()
+    swapper = ModelSwapper(service, model_dir=str(model_dir))
+    swapper.validate = lambda model: calls.append("validate") or {"ok": True, "reason": None}
+    swapper.last = {"started": 0.0}
+    swapper._run(resolve_model("new_model.pt", str(model_dir)), force=False)
+
+    assert calls == ["load", "warm_up", "validate"]
+    assert swapper.state == "swapped"
+    assert service.swapped[1]["warmup_seconds"] == 0.2
+    assert swapper.last["warmup_seconds"] == 0.2
+
+def test_start_rejects_path_before_loading(model_dir):
+    swapper = ModelSwapper(FakeService(), model_dir=str(model_dir))
+    with pytest.raises(ValueError):
+        swapper.start("../outside.pt")
+    assert swapper.state == "idle"
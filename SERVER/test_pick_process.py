@@ -0,0 +1,99 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import pick_process
+from block_process import BlockProcess
+from feeder_policy import DEFAULT_RECIPE
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+class FakeRobot(Recorder):
+    def robot_init(self):
+        self.calls.append("robot_init")
+
+class FakeFeeder(Recorder):
+    def __init__(self, fail=False):
+        super().__init__()
+        self.fail = fail
+
+    async def run_action(self, action, duration):
+        if self.fail:
+            raise IOError("피더 미연결")
+        self.calls.append((action, duration))
+
+class FakeEvents(Recorder):
+    def publish(self, event, data):
+        self.calls.append((event, data))
+
+class FakeCamera:
+    roi = [0, 0, 300, 300]
+
+    def __init__(self, blocks_after):
+        self.latest_blocks = {
+            "centers": np.array([[20, 150], [30, 160]], np.float32),
+            "pickable": np.array([False, False]),
+        }
+        self.blocks_after = blocks_after
+
+    def set_mode(self, mode):
+        pass
+
+    def get_block_targets(self):
+        # 피더 동작 후 재검출 결과
+        self.latest_blocks = self.blocks_after
+        centers = self.blocks_after["centers"][self.blocks_after["pickable"]]
+        return [(float(x), float(y), 0.0) for x, y in centers]
+
+class FakeSystem:
+    name = "test"
+
+    def __init__(self, feeder):
+        self.robot = FakeRobot()
+        self.feeder = feeder
+        self.events = FakeEvents()
+        self.camera = FakeCamera({
+            "centers": np.array([[50, 50], [250, 250]], np.float32),
+            "pickable": np.array([True, True]),
+        })
+
+@pytest.fixture
+def make_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(pick_process, "cell_dir", lambda name, folder: str(tmp_path / folder))
+
+    def make(fail=False):
+        process = BlockProcess(FakeSystem(FakeFeeder(fail)))
+        process.feeder_policy.settle_time = 0.0
+        return process
+
+    return make
+
+def test_block_refill_uses_feeder_policy(make_process):
+    process = make_process()
+    state = process.observe_tray()
+    assert state["condition"] == "edge_left"
+    recipe = process.feeder_policy.choose(state)
+
+    targets, interrupted = asyncio.run(process.refill())
+
+    assert interrupted is None
+    assert len(targets) == 2
+    assert process.system.feeder.calls == list(recipe)
+    assert recipe != DEFAULT_RECIPE
+    stats = process.feeder_policy.get_stats()["edge_left"]
+    assert stats[process.feeder_policy.recipe_key(recipe)]["n"] == 1
+    event, data = process.system.events.calls[-1]
+    assert event == "job_step" and data["job"] == "block" and data["step"] == "feeder_refill"
+
+def test_block_policy_stats_are_kept_apart_from_lego(make_process):
+    process = make_process()
+    assert process.feeder_policy.stats_path.endswith("block_feeder_policy_stats.json")
+
+def test_refill_feeder_failure_interrupts(make_process):
+    process = make_process(fail=True)
+    targets, interrupted = asyncio.run(process.refill())
+    assert targets == []
+    assert interrupted.startswith("피더 통신 실패")
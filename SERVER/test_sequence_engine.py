@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from sequence_engine import SequenceEngine, compile_sequence
+
+def wait(duration=0.0, **extra):
+    return {"type": "wait", "params": {"duration": duration}, **extra}
+
+def test_default_steps_run_in_series():
+    sequence = compile_sequence("serial", [wait(), wait(), wait()])
+    assert [step.deps for step in sequence.steps] == [[], ["s1"], ["s2"]]
+    assert sequence.levels() == [["s1"], ["s2"], ["s3"]]
+
+def test_parallel_branches_join_before_next_step():
+    sequence = compile_sequence("branches", [
+        wait(),
+        {"type": "parallel", "params": {"branches": [[wait(), wait()], [wait()]]}},
+        wait(),
+    ])
+    deps = {step.id: step.deps for step in sequence.steps}
+    assert deps["s2.b1.1"] == ["s1"]
+    assert deps["s2.b2.1"] == ["s1"]
+    assert deps["s3"] == ["s2.b1.2", "s2.b2.1"]
+    assert sequence.levels() == [["s1"], ["s2.b1.1", "s2.b2.1"], ["s2.b1.2"], ["s3"]]
+
+def test_after_overrides_default_order_and_steps_are_topologically_sorted():
+    sequence = compile_sequence("after", [
+        wait(id="late", after=["early"]),
+        wait(id="early", after=[]),
+        wait(id="free", after=[]),
+    ])
+    order = [step.id for step in sequence.steps]
+    assert order.index("early") < order.index("late")
+    assert sequence.levels() == [["early", "free"], ["late"]]
+
+@pytest.mark.parametrize("steps, message", [
+    ([{"type": "jump", "params": {}}], "알 수 없는 단계 종류"),
+    ([{"type": "robot", "params": {}}], "파라미터 누락"),
+    ([{"type": "cylinder", "params": {"cylinder": 0, "action": "toggle"}}], "잘못된 실린더 동작"),
+    ([{"type": "cylinder", "params": {"cylinder": [0, 16], "action": "on"}}], "잘못된 채널 번호"),
+    ([wait(-1)], "duration"),
+    ([{"type": "parallel", "params": {"branches": [wait()]}}], "branches"),
+    ([wait(id="a"), wait(id="a")], "중복된 id"),
+    ([wait(after=["missing"])], "없는 의존 단계"),
+])
+def test_invalid_steps_are_rejected(steps, message):
+    with pytest.raises(ValueError, match=message):
+        compile_sequence("bad", steps)
+
+def test_invalid_nested_step_reports_its_position():
+    steps = [{"type": "parallel", "params": {"branches": [[wait()], [wait(), {"type": "x"}]]}}]
+    with pytest.raises(ValueError, match=r"Step 1\.b2\.2"):
+        compile_sequence("bad", steps)
+
+def test_dependency_cycle_is_rejected():
+    with pytest.raises(ValueError, match="순환"):
+        compile_sequence("cycle", [
+            wait(id="a", after=["c"]),
+            wait(id="b", after=["a"]),
+            wait(id="c", after=["b"]),
+        ])
+
+class FakeCylinder:
+    connected = False
+
+class FakeSystem:
+    cylinder = FakeCylinder()
+
+def make_engine(tmp_path):
+    return SequenceEngine(FakeSystem(), store_path=str(tmp_path / "sequences.json"))
+
+def test_register_persists_and_reloads(tmp_path):
+    make_engine(tmp_path).register("demo", [wait(), wait(id="x", after=[])])
+    reloaded = make_engine(tmp_path)
+    assert reloaded.get("demo").levels() == [["s1", "x"]]
+
+def test_parallel_waits_overlap(tmp_path):
+    engine = make_engine(tmp_path)
+    sequence = compile_sequence("overlap", [
+        {"type": "parallel", "params": {"branches": [[wait(0.1)], [wait(0.1)]]}},
+    ])
+    report = asyncio.run(engine.run(sequence))
+    assert report["seconds"] < report["serial_seconds"]
+
+def test_stop_on_error_skips_dependents_of_failed_step(tmp_path):
+    engine = make_engine(tmp_path)
+    sequence = compile_sequence("fail", [
+        {"type": "cylinder", "params": {"cylinder": 0, "action": "on"}},
+        wait(),
+    ])
+    report = asyncio.run(engine.run(sequence, stop_on_error=True))
+    first, second = report["results"]
+    assert first["error"] == "실린더 미연결"
+    assert second["skipped"] is True
+
+class FakeInputs:
+    def __init__(self, reached):
+        self.reached = reached
+
+    async def wait_for_async(self, channel, state=True, timeout=2.0):
+        return self.reached
+
+class SensorCylinder:
+    """stroke 결과를 채널별로 정해 두는 실린더"""
+
+    connected = True
+
+    def __init__(self, confirmed, reached=True):
+        self.confirmed = confirmed
+        self.inputs = FakeInputs(reached)
+
+    async def stroke(self, channel, on, timeout=2.0, fallback=1.0):
+        return {"confirmed": self.confirmed.get(channel), "seconds": 0.0}
+
+def run_with_cylinder(tmp_path, cylinder, first_step):
+    system = FakeSystem()
+    system.cylinder = cylinder
+    engine = SequenceEngine(system, store_path=str(tmp_path / "sequences.json"))
+    sequence = compile_sequence("sensor", [first_step, wait()])
+    return asyncio.run(engine.run(sequence, stop_on_error=True))["results"]
+
+def confirm_step(cylinders):
+    return {"type": "cylinder", "params": {"cylinder": cylinders, "action": "on", "confirm": True}}
+
+def test_unconfirmed_stroke_fails_step_and_skips_dependents(tmp_path):
+    cylinder = SensorCylinder({0: True, 1: False})
+    first, second = run_with_cylinder(tmp_path, cylinder, confirm_step([0, 1]))
+    assert "행정 미확인" in first["error"]
+    assert second["skipped"] is True
+
+def test_unmapped_sensor_stroke_counts_as_done(tmp_path):
+    cylinder = SensorCylinder({0: None})
+    first, second = run_with_cylinder(tmp_path, cylinder, confirm_step(0))
+    assert "error" not in first
+    assert "skipped" not in second
+
+def test_input_timeout_fails_step_and_skips_dependents(tmp_path):
+    cylinder = SensorCylinder({}, reached=False)
+    first, second = run_with_cylinder(tmp_path, cylinder, {"type": "input", "params": {"channel": 2}})
+    assert first["error"] == "Input 2 timeout"
+    assert second["skipped"] is True
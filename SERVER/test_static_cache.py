@@ -0,0 +1,118 @@
+import gzip
+import os
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import static_cache
+from static_cache import StaticCache
+
+class FakeRequest:
+    def __init__(self, **headers):
+        self.headers = {name.replace("_", "-"): value for name, value in headers.items()}
+
+SCRIPT = ("function tick() { return 1; }\n" * 40).encode()
+
+@pytest.fixture
+def ui(tmp_path):
+    (tmp_path / "img").mkdir()
+    (tmp_path / "index.html").write_text("<h1>UI</h1>", encoding="utf-8")
+    (tmp_path / "app.js").write_bytes(SCRIPT)
+    (tmp_path / "img" / "1.png").write_bytes(b"\x89PNG" + b"\0" * 1000)
+    return tmp_path
+
+def test_files_are_loaded_with_relative_names(ui):
+    cache = StaticCache(str(ui))
+    assert sorted(cache.files) == ["app.js", "img/1.png", "index.html"]
+    # 이미 압축된 형식과 작은 파일은 압축본을 만들지 않음
+    assert set(cache.get("img/1.png").variants) == {"identity"}
+    assert set(cache.get("index.html").variants) == {"identity"}
+    assert "gzip" in cache.get("app.js").variants
+
+def test_response_sets_etag_and_cache_headers(ui):
+    cache = StaticCache(str(ui), html_max_age=0, asset_max_age=600)
+    html = cache.response("index.html", FakeRequest())
+    asset = cache.response("img/1.png", FakeRequest())
+
+    assert html.status_code == 200
+    assert html.headers["etag"] == cache.get("index.html").etag
+    assert html.headers["cache-control"] == "no-cache"
+    assert html.headers["content-type"] == "text/html; charset=utf-8"
+    assert asset.headers["cache-control"] == "public, max-age=600"
+    assert asset.body == (ui / "img" / "1.png").read_bytes()
+
+@pytest.mark.parametrize("header", [
+    "{etag}", "*", ' W/"other" , {etag} ', '"other", {etag}',
+])
+def test_matching_if_none_match_gives_304(ui, header):
+    cache = StaticCache(str(ui))
+    etag = cache.get("app.js").etag
+    response = cache.response("app.js", FakeRequest(if_none_match=header.format(etag=etag)))
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == etag
+    assert cache.stats["not_modified"] == 1
+
+@pytest.mark.parametrize("header", ['"other"', '"other", "another"', ""])
+def test_other_etags_get_full_body(ui, header):
+    cache = StaticCache(str(ui))
+    response = cache.response("app.js", FakeRequest(if_none_match=header))
+    assert response.status_code == 200
+    assert cache.stats["hits"] == 1
+
+def test_gzip_is_served_when_accepted(ui, monkeypatch):
+    monkeypatch.setattr(static_cache, "brotli", None)
+    cache = StaticCache(str(ui))
+
+    response = cache.response("app.js", FakeRequest(accept_encoding="br, gzip;q=0.8"))
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.body) == SCRIPT
+
+    plain = cache.response("app.js", FakeRequest(accept_encoding="deflate"))
+    assert "content-encoding" not in plain.headers
+    assert plain.body == SCRIPT
+
+def test_brotli_is_preferred_over_gzip(ui):
+    brotli = pytest.importorskip("brotli")
+    cache = StaticCache(str(ui))
+    response = cache.response("app.js", FakeRequest(accept_encoding="gzip, br"))
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(response.body) == SCRIPT
+
+def test_missing_file_is_404(ui):
+    cache = StaticCache(str(ui))
+    response = cache.response("none.js", FakeRequest())
+    assert response.status_code == 404
+    assert cache.stats["misses"] == 1
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_reload_watcher_picks_up_changed_added_and_removed_files(ui):
+    cache = StaticCache(str(ui), reload=True, watch_interval=0.02)
+    old_etag = cache.get("index.html").etag
+    assert cache.asset_max_age == 0
+
+    index = ui / "index.html"
+    index.write_text("<h1>바뀐 UI</h1>", encoding="utf-8")
+    # 파일 시스템 시각 해상도와 무관하게 수정 시각을 바꿈
+    mtime = os.path.getmtime(index) + 5
+    os.utime(index, (mtime, mtime))
+    (ui / "new.css").write_text("body {}", encoding="utf-8")
+    (ui / "img" / "1.png").unlink()
+
+    assert wait_until(lambda: cache.get("index.html").etag != old_etag)
+    assert wait_until(lambda: cache.get("new.css") is not None and cache.get("img/1.png") is None)
+
+    response = cache.response("index.html", FakeRequest(if_none_match=old_etag))
+    assert response.status_code == 200
+    assert response.body == "<h1>바뀐 UI</h1>".encode()
+    assert cache.stats["reloads"] >= 2
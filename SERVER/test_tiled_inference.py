@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from tiled_inference import nms, pairwise_overlap, seam_duplicates, tile_grid, tile_starts
+
+@pytest.mark.parametrize("length, tile, overlap", [
+    (1256, 640, 0.2), (978, 640, 0.2), (2000, 640, 0.25), (641, 640, 0.1),
+])
+def test_tile_starts_cover_axis_with_enough_overlap(length, tile, overlap):
+    starts = tile_starts(length, tile, overlap)
+    assert starts[0] == 0
+    assert starts[-1] == length - tile
+    steps = np.diff(starts)
+    assert np.all(steps > 0)
+    assert np.all(steps <= tile * (1 - overlap))
+
+def test_small_image_is_one_tile():
+    assert tile_starts(500, 640, 0.2).tolist() == [0]
+    assert tile_grid(500, 600, 640, 0.2).tolist() == [[0, 0]]
+
+def test_tile_grid_is_xy_pairs_row_major():
+    grid = tile_grid(978, 1256, 640, 0.2)
+    xs = tile_starts(1256, 640, 0.2)
+    ys = tile_starts(978, 640, 0.2)
+    assert grid.shape == (len(xs) * len(ys), 2)
+    assert grid[:len(xs), 0].tolist() == xs.tolist()
+    assert set(grid[:, 1].tolist()) == set(ys.tolist())
+
+def test_pairwise_overlap_iou_and_ios():
+    boxes = np.array([[0, 0, 10, 10], [0, 0, 5, 5]], np.float32)
+    np.testing.assert_allclose(pairwise_overlap(boxes, "iou")[0, 1], 0.25)
+    np.testing.assert_allclose(pairwise_overlap(boxes, "ios")[0, 1], 1.0)
+
+def test_nms_removes_overlapping_lower_scores():
+    boxes = np.array([[0, 0, 10, 10], [1, 0, 11, 10], [50, 50, 60, 60]], np.float32)
+    scores = np.array([0.8, 0.9, 0.7], np.float32)
+    assert nms(boxes, scores, 0.5).tolist() == [1, 2]
+    assert nms(np.zeros((0, 4), np.float32), np.zeros(0, np.float32)).tolist() == []
+
+def test_nms_keeps_small_box_nested_inside_large_one():
+    # 큰 부품 안쪽에 겹친 작은 부품: IoU가 낮으므로 둘 다 남김
+    boxes = np.array([[0, 0, 100, 100], [40, 40, 60, 60]], np.float32)
+    scores = np.array([0.9, 0.8], np.float32)
+    assert nms(boxes, scores, 0.5).tolist() == [0, 1]
+
+def test_suppressed_box_does_not_suppress_others():
+    # a가 b를 지우고, b와만 겹치는 c는 남아야 함 (연쇄 제거 없음)
+    boxes = np.array([[0, 0, 10, 10], [3, 0, 13, 10], [6, 0, 16, 10]], np.float32)
+    scores = np.array([0.9, 0.8, 0.7], np.float32)
+    assert nms(boxes, scores, 0.5).tolist() == [0, 2]
+
+def test_seam_fragment_from_other_tile_is_merged():
+    whole = [100, 100, 160, 160]
+    fragment = [100, 100, 130, 160]         # 오른쪽 타일 경계에서 잘린 조각
+    boxes = np.array([whole, fragment], np.float32)
+    tiles = np.array([0, 1])
+    cut = np.array([False, True])
+
+    seams = seam_duplicates(boxes, tiles, cut, 0.6)
+    assert seams[0, 1] and seams[1, 0]
+    scores = np.array([0.8, 0.9], np.float32) - cut
+    assert nms(boxes, scores, 0.7, seams).tolist() == [0]
+
+def test_seam_merge_ignores_same_tile_and_uncut_pairs():
+    boxes = np.array([[0, 0, 100, 100], [40, 40, 60, 60]], np.float32)
+    same_tile = seam_duplicates(boxes, np.array([0, 0]), np.array([True, True]), 0.6)
+    not_cut = seam_duplicates(boxes, np.array([0, 1]), np.array([False, False]), 0.6)
+    assert not same_tile.any()
+    assert not not_cut.any()
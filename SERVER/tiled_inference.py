@@ -0,0 +1,225 @@
+"""타일 분할 추론 (고해상도 ROI용)
+
+ROI(1256x978)를 그대로 넣으면 ultralytics가 640으로 축소(letterbox)해 작은/붙어 있는
+부품의 디테일이 사라진다. imgsz를 키우면 CPU에서 느리므로, ROI를 겹치는 타일로 나눠
+한 배치로 추론하고 타일 간 중복 검출은 NMS로 합친다 (겹침 영역의 같은 부품은 IoU,
+타일 경계에서 잘린 조각은 서로 다른 타일 + 경계 접촉 쌍에 한해 ios로 병합).
+
+벤치마크 (일반 / 확대 / 타일 비교):
+    python tiled_inference.py --source frame.png [--tile 640 --overlap 0.2 --imgsz 1280]
+    python tiled_inference.py --source recordings/dump_xxx.frames
+"""
+import argparse
+import time
+
+import numpy as np
+
+from detections import result_arrays, make_snapshot
+
+INFERENCE_MODES = ("plain", "upscaled", "tiled")
+
+def tile_starts(length, tile, overlap):
+    """한 축의 타일 시작 좌표 (양 끝 타일이 이미지 경계에 맞도록 균등 배치)"""
+    if length <= tile:
+        return np.zeros(1, np.int64)
+    stride = tile * (1.0 - overlap)
+    count = int(np.ceil((length - tile) / stride)) + 1
+    return np.round(np.linspace(0, length - tile, count)).astype(np.int64)
+
+def tile_grid(height, width, tile, overlap):
+    """(N,2) 타일 좌상단 (x0, y0)"""
+    ys = tile_starts(height, tile, overlap)
+    xs = tile_starts(width, tile, overlap)
+    return np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+
+def pairwise_overlap(boxes, metric="ios"):
+    """(N,4) 박스 간 겹침 행렬 - iou 또는 ios (교집합 / 작은 박스 면적)
+
+    타일 경계에서 잘린 박스는 온전한 박스와 IoU가 낮으므로 병합에는 ios가 적합하다.
+    """
+    x1 = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+    y1 = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+    x2 = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+    y2 = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    if metric == "iou":
+        denom = area[:, None] + area[None, :] - inter
+    else:
+        denom = np.minimum(area[:, None], area[None, :])
+    return inter / np.maximum(denom, 1e-6)
+
+def nms(boxes, scores, threshold=0.5, duplicates=None):
+    """탐욕적 IoU NMS → 남길 인덱스 (점수 내림차순)
+
+    점수 순으로 남은 박스가 뒤의 박스 중 IoU가 threshold 이상인 것을 제거한다.
+    이미 제거된 박스는 다른 박스를 제거하지 않는다.
+
+    Args:
+        duplicates: (N,N) bool - IoU와 관계없이 중복으로 볼 쌍 (타일 경계 병합용)
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, np.int64)
+    order = np.argsort(-scores, kind="stable")
+    dup = pairwise_overlap(boxes[order], "iou") >= threshold
+    if duplicates is not None:
+        dup |= duplicates[np.ix_(order, order)]
+
+    removed = np.zeros(len(order), bool)
+    for i in range(len(order)):
+        if not removed[i]:
+            removed[i + 1:] |= dup[i, i + 1:]
+    return order[~removed]
+
+def seam_duplicates(boxes, tiles, cut, threshold):
+    """타일 경계에서 잘린 조각과 다른 타일의 박스 쌍 중 ios가 threshold 이상인 쌍 (N,N) bool
+
+    같은 타일 안의 박스나 경계에 닿지 않은 박스끼리는 포함하지 않는다 (안쪽에 작은 박스가
+    겹쳐 있어도 온전한 부품 박스를 지우지 않도록).
+    """
+    pairs = (tiles[:, None] != tiles[None, :]) & (cut[:, None] | cut[None, :])
+    return pairs & (pairwise_overlap(boxes, "ios") >= threshold)
+
+class TiledInference:
+    """겹치는 타일 배치 추론 + 타일 간 NMS 병합
+
+    Args:
+        model: ultralytics YOLO 모델 (카메라 컨트롤러와 공유)
+        tile_size: 타일 한 변 (모델 입력 크기와 같게 두면 축소 없이 추론)
+        overlap: 타일 겹침 비율 (부품 크기보다 겹침이 커야 경계 부품이 한 타일에 온전히 들어감)
+        merge_threshold: 경계에서 잘린 조각 병합 기준 (ios, 다른 타일 쌍에만 적용)
+        iou_threshold: 겹침 영역 중복 제거 기준 (IoU, ultralytics 기본값과 같음)
+    """
+
+    def __init__(self, model, tile_size=640, overlap=0.2, merge_threshold=0.6, edge_margin=2,
+                 iou_threshold=0.7):
+        self.model = model
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.merge_threshold = merge_threshold
+        self.iou_threshold = iou_threshold
+        self.edge_margin = edge_margin
+        self._grid = (None, None)       # (이미지 크기, 타일 좌표) 캐시
+
+    def grid(self, height, width):
+        key, grid = self._grid
+        if key != (height, width, self.tile_size, self.overlap):
+            grid = tile_grid(height, width, self.tile_size, self.overlap)
+            self._grid = ((height, width, self.tile_size, self.overlap), grid)
+        return grid
+
+    def __call__(self, image):
+        """ROI 이미지 → 검출 스냅샷 (ROI 좌표)"""
+        h, w = image.shape[:2]
+        grid = self.grid(h, w)
+        t = self.tile_size
+        tiles = [image[y0:y0 + t, x0:x0 + t] for x0, y0 in grid]
+
+        # 타일 전체를 한 배치로 추론
+        results = self.model(tiles, imgsz=t, verbose=False)
+
+        parts = []
+        for index, ((x0, y0), tile, result) in enumerate(zip(grid, tiles, results)):
+            xyxy, cls, conf, centers, angles = result_arrays(result, tile.shape)
+            if len(cls) == 0:
+                continue
+            # 이미지 안쪽 타일 경계에 닿은 박스 (잘렸을 수 있음)
+            th, tw = tile.shape[:2]
+            m = self.edge_margin
+            cut = (((xyxy[:, 0] <= m) & (x0 > 0)) | ((xyxy[:, 1] <= m) & (y0 > 0))
+                   | ((xyxy[:, 2] >= tw - m) & (x0 + tw < w)) | ((xyxy[:, 3] >= th - m) & (y0 + th < h)))
+
+            offset = np.array([x0, y0], np.float32)
+            parts.append((xyxy + np.tile(offset, 2), cls, conf, centers + offset, angles, cut,
+                          np.full(len(cls), index)))
+
+        if not parts:
+            return make_snapshot(np.zeros((0, 4), np.float32), np.zeros(0, np.int32),
+                                 np.zeros(0, np.float32), np.zeros((0, 2), np.float32),
+                                 np.zeros(0, np.float32), image.shape)
+
+        xyxy, cls, conf, centers, angles, cut, tiles = (np.concatenate(arrays) for arrays in zip(*parts))
+
+        # 잘린 박스보다 온전한 박스가 남도록 정렬 점수만 낮춤 (보고하는 conf는 그대로)
+        seams = seam_duplicates(xyxy, tiles, cut, self.merge_threshold)
+        keep = nms(xyxy, conf - cut.astype(np.float32), self.iou_threshold, seams)
+        return make_snapshot(xyxy[keep], cls[keep], conf[keep], centers[keep], angles[keep], image.shape)
+
+# ===== 벤치마크 =====
+def _load_frames(source, limit):
+    if source.endswith(".frames"):
+        from frame_recorder import FrameReplay
+        frames = [np.ascontiguousarray(frame) for _, mode, frame, _ in FrameReplay(source) if mode == "lego"]
+    else:
+        import cv2
+        frame = cv2.imread(source)
+        if frame is None:
+            raise SystemExit(f"이미지를 읽을 수 없음: {source}")
+        frames = [frame]
+    return frames[:limit]
+
+def _recall(reference, snapshot, conf_threshold, iou_threshold=0.5):
+    """기준(확대 추론) 검출 중 같은 위치에서 찾은 비율"""
+    from detection_tracker import iou_matrix, greedy_match
+    ref = reference["xyxy"][reference["conf"] >= conf_threshold]
+    found = snapshot["xyxy"][snapshot["conf"] >= conf_threshold]
+    if len(ref) == 0:
+        return None
+    matched, _ = greedy_match(iou_matrix(ref, found), iou_threshold)
+    return len(matched) / len(ref)
+
+def main():
+    parser = argparse.ArgumentParser(description="일반/확대/타일 추론 벤치마크")
+    parser.add_argument("--source", required=True, help="이미지 파일 또는 녹화 파일(.frames)")
+    parser.add_argument("--model", default="../MODEL/final_lego_model.pt")
+    parser.add_argument("--tile", type=int, default=640)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--imgsz", type=int, default=1280, help="확대 추론 입력 크기")
+    parser.add_argument("--repeat", type=int, default=5, help="프레임당 반복 횟수")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--conf", type=float, default=0.8)
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+
+    model = YOLO(args.model)
+    frames = _load_frames(args.source, args.limit)
+    tiled = TiledInference(model, args.tile, args.overlap)
+    runners = {
+        "plain": lambda img: make_snapshot(*result_arrays(model(img, verbose=False)[0], img.shape), img.shape),
+        "upscaled": lambda img: make_snapshot(
+            *result_arrays(model(img, imgsz=args.imgsz, verbose=False)[0], img.shape), img.shape),
+        "tiled": tiled
+    }
+
+    h, w = frames[0].shape[:2]
+    print(f"프레임 {len(frames)}장 ({w}x{h}), 타일 {args.tile} x {len(tiled.grid(h, w))}개, 확대 imgsz {args.imgsz}")
+
+    # 워밍업 (첫 호출의 모델 초기화 비용 제외)
+    for run in runners.values():
+        run(frames[0])
+
+    outputs = {}
+    for name, run in runners.items():
+        times, counts, snapshots = [], [], []
+        for frame in frames:
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                snapshot = run(frame)
+                times.append(time.perf_counter() - started)
+            snapshots.append(snapshot)
+            counts.append(int((snapshot["conf"] >= args.conf).sum()))
+        outputs[name] = snapshots
+        times = np.array(times) * 1000
+        print(f"  {name:9s} mean {times.mean():7.1f} ms  p95 {np.percentile(times, 95):7.1f} ms  "
+              f"검출 {np.mean(counts):.1f}개/프레임")
+
+    # 확대 추론을 기준으로 재현율 비교
+    for name in ("plain", "tiled"):
+        recalls = [r for r in (_recall(ref, snap, args.conf)
+                               for ref, snap in zip(outputs["upscaled"], outputs[name])) if r is not None]
+        if recalls:
+            print(f"  {name:9s} 확대 추론 대비 재현율 {np.mean(recalls) * 100:.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""비전 파이프라인 별도 프로세스 실행
+
+캡처/YOLO 추론/JPEG 인코딩을 API 서버와 다른 프로세스에서 실행해 GIL 경합을 없앤다.
+결과는 FrameRing(공유 메모리)으로 주고받고, ROI/모드 변경 같은 제어 값도
+같은 공유 메모리의 제어 블록으로 전달한다 (피클링/큐 없음).
+
+server.py는 모듈 수준에서 IntegratedSystem을 만들므로 multiprocessing spawn으로
+다시 import되지 않도록 이 파일을 독립 스크립트로 실행한다:
+    python vision_process.py --shm <이름> --model <모델 경로>
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from frame_ring import FrameRing, MODES
+from detection_tracker import DetectionTracker, confirmed_front_centroids, confirmed_front_targets
+from detections import (
+    front_centroids, front_targets, block_targets, detection_message,
+    snapshot_to_rows, rows_to_snapshot, blocks_to_rows, rows_to_blocks
+)
+
+DEFAULT_MODEL = '../MODEL/final_lego_model.pt'
+
+class VisionProcessCamera:
+    """CameraController와 같은 인터페이스로 비전 프로세스 결과를 읽는 API 측 프록시"""
+
+    def __init__(self, model_path=DEFAULT_MODEL, roi=(684, 421, 1256, 978), slots=4,
+                 jpeg_quality=80, start_timeout=60.0, serial=None, recording_dir=None):
+        self.model_path = os.path.abspath(os.path.join(os.path.dirname(__file__), model_path))
+        self.jpeg_quality = jpeg_quality
+        self.start_timeout = start_timeout
+        self.serial = serial
+        self.recording_dir = recording_dir
+
+        self.roi = list(roi)
+        self.mode = "lego"
+        self.conf_threshold = 0.8
+        self.block_params = {
+            "min_area": 28000,
+            "max_area": 30000,
+            "max_aspect": 1.15,
+            "min_distance": 100
+        }
+
+        self.lock = threading.Lock()
+        self.ring = FrameRing.create(max_height=roi[3], max_width=roi[2], slots=slots)
+        self._write_control()
+
+        self.process = None
+        self.camera = None          # 연결 시 프로세스 객체 (상태 표시에서 None 여부로 판단)
+        self.running = False
+        self.mode_seq = 0           # 모드 전환 시점의 프레임 번호 (이전 모드 결과 무시)
+        self._cache = (None, None)  # (seq, 변환된 결과)
+
+        # 추적은 API 프로세스에서 (스냅샷 크기가 작아 비용 미미)
+        self.tracker = DetectionTracker()
+        self.latest_tracks = None
+        
+        # 시각화 위치 (비전 프로세스도 같은 환경 변수를 상속해 client면 박스 없이 인코딩)
+        self.overlay = os.environ.get("FLEXIBOT_OVERLAY", "server")
+        self.on_detections = None
+
+    # ===== 제어 =====
+    def _write_control(self):
+        ctrl = self.ring.ctrl
+        with self.lock:
+            ctrl["roi"] = self.roi
+            ctrl["mode"] = MODES.index(self.mode)
+            ctrl["conf_threshold"] = self.conf_threshold
+            for key, value in self.block_params.items():
+                ctrl[key] = value
+            ctrl["version"] = int(ctrl["version"]) + 1
+
+    def connect_camera(self):
+        """비전 프로세스 시작 → 카메라 연결 결과 대기"""
+        script = os.path.abspath(__file__)
+        args = [sys.executable, script, "--shm", self.ring.name, "--model", self.model_path,
+                "--jpeg-quality", str(self.jpeg_quality)]
+        if self.serial is not None:
+            args += ["--serial", str(self.serial)]
+        if self.recording_dir is not None:
+            args += ["--recording-dir", self.recording_dir]
+        self.process = subprocess.Popen(args, cwd=os.path.dirname(script))
+        threading.Thread(target=self._heartbeat, daemon=True).start()
+
+        deadline = time.perf_counter() + self.start_timeout
+        while time.perf_counter() < deadline:
+            state = int(self.ring.ctrl["camera_state"])
+            if state != 0:
+                break
+            if self.process.poll() is not None:
+                print(f"✗ 비전 프로세스 종료됨 (코드 {self.process.returncode})")
+                return False
+            time.sleep(0.05)
+
+        if int(self.ring.ctrl["camera_state"]) != 1:
+            print("✗ 비전 프로세스 카메라 연결 실패")
+            return False
+
+        self.camera = self.process
+        print(f"✓ 비전 프로세스 시작 (PID {self.process.pid}, 공유 메모리 {self.ring.name})")
+        return True
+
+    def _heartbeat(self):
+        """부모 생존 신호 (API 서버가 죽으면 비전 프로세스도 스스로 종료)"""
+        while self.ring.control is not None and (self.process and self.process.poll() is None):
+            self.ring.ctrl["parent_heartbeat"] = time.time()
+            time.sleep(0.5)
+
+    def start_capture(self):
+        if not self.camera:
+            return False
+        self.ring.ctrl["capture"] = 1
+        self.running = True
+        threading.Thread(target=self._track_loop, daemon=True).start()
+        return True
+
+    def _track_loop(self, interval=0.01):
+        """새 프레임이 올라올 때마다 추적기 갱신 및 검출 메시지 전달"""
+        last_seq = 0
+        while self.running:
+            view = self.ring.latest()
+            if view is not None and view.seq != last_seq:
+                last_seq = view.seq
+                mode = view.mode
+                snapshot = self.latest_detections if mode == "lego" else None
+                blocks = self.latest_blocks if mode == "block" else None
+                if snapshot is not None:
+                    self.latest_tracks = self.tracker.update(snapshot, self.conf_threshold)
+                if self.on_detections and (snapshot is not None or blocks is not None):
+                    self.on_detections(detection_message(
+                        mode, snapshot, blocks, self.conf_threshold, view.seq, view.frame.shape
+                    ))
+            time.sleep(interval)
+
+    def set_roi(self, x: int, y: int):
+        """ROI 위치 변경"""
+        self.roi[0] = x
+        self.roi[1] = y
+        self.tracker.reset()
+        self.latest_tracks = None
+        self._write_control()
+        print(f"✓ ROI 변경: ({x}, {y})")
+
+    def set_mode(self, mode: str):
+        """검출 모드 변경 (이전 모드 결과는 폐기)"""
+        if mode not in MODES:
+            raise ValueError(f"Invalid mode: {mode}")
+        if self.mode != mode:
+            self.mode = mode
+            self.mode_seq = int(self.ring.ctrl["latest_seq"])
+            self.tracker.reset()
+            self.latest_tracks = None
+            self._write_control()
+        print(f"✓ 검출 모드: {mode}")
+
+    # ===== 결과 읽기 =====
+    def _latest_result(self, mode):
+        """최신 프레임의 검출 결과 (해당 모드, 모드 전환 이후 프레임만)"""
+        view = self.ring.latest()
+        if view is None or view.mode != mode or view.seq <= self.mode_seq:
+            return None
+
+        seq, result = self._cache
+        if seq == view.seq:
+            return result
+
+        h, w = view.frame.shape[:2]
+        if mode == "lego":
+            result = rows_to_snapshot(view.rows, (h, w), view.ts)
+        else:
+            result = rows_to_blocks(view.rows)
+        if not view.valid():
+            return None
+        self._cache = (view.seq, result)
+        return result
+
+    @property
+    def latest_detections(self):
+        return self._latest_result("lego")
+
+    @property
+    def latest_blocks(self):
+        return self._latest_result("block")
+
+    def get_detection_snapshot(self):
+        return self.latest_detections
+
+    def get_tracks(self):
+        return self.latest_tracks
+
+    def get_front_centroids(self, confirmed_only=False):
+        if confirmed_only:
+            return confirmed_front_centroids(self.latest_tracks)
+        return front_centroids(self.latest_detections, self.conf_threshold)
+
+    def get_front_targets(self, confirmed_only=False):
+        if confirmed_only:
+            return confirmed_front_targets(self.latest_tracks)
+        return front_targets(self.latest_detections, self.conf_threshold)
+
+    def get_block_targets(self, pickable_only=True):
+        return block_targets(self.latest_blocks, pickable_only)
+
+    def get_frame(self, raw=False):
+        """최신 JPEG (비전 프로세스에서 프레임당 한 번 인코딩)
+
+        JPEG는 하나뿐이라 raw는 무시한다. client 모드면 비전 프로세스가 이미 원본을 인코딩한다.
+        """
+        view = self.ring.latest()
+        if view is None or len(view.jpeg) == 0:
+            return None
+        data = view.jpeg.tobytes()
+        return data if view.valid() else None
+
+    def dump_recording(self, seconds=10.0, reason="manual"):
+        """비전 프로세스에 녹화 덤프 요청 (경로는 비전 프로세스 로그에 출력)"""
+        ctrl = self.ring.ctrl
+        ctrl["dump_seconds"] = seconds
+        ctrl["dump_reason"] = reason.encode("ascii", "replace")[:32]
+        ctrl["dump_request"] = int(ctrl["dump_request"]) + 1
+        return "requested"
+
+    def get_stats(self):
+        ctrl = self.ring.ctrl
+        return {
+            "pid": int(ctrl["pid"]),
+            "seq": int(ctrl["latest_seq"]),
+            "fps": round(float(ctrl["fps"]), 1),
+            "heartbeat_age": round(time.time() - float(ctrl["heartbeat"]), 3)
+        }
+
+    def stop(self):
+        """비전 프로세스 종료 및 공유 메모리 해제"""
+        self.running = False
+        if self.process and self.process.poll() is None:
+            self.ring.ctrl["stop"] = 1
+            try:
+                self.process.wait(timeout=5.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.ring.close()
+
+# ===== 비전 프로세스 =====
+def _apply_control(camera, ctrl):
+    with camera.lock:
+        camera.roi = [int(v) for v in ctrl["roi"]]
+    camera.conf_threshold = float(ctrl["conf_threshold"])
+    camera.block_params = {
+        "min_area": float(ctrl["min_area"]),
+        "max_area": float(ctrl["max_area"]),
+        "max_aspect": float(ctrl["max_aspect"]),
+        "min_distance": float(ctrl["min_distance"])
+    }
+    mode = MODES[int(ctrl["mode"])]
+    if camera.mode != mode:
+        camera.set_mode(mode)
+
+def main():
+    parser = argparse.ArgumentParser(description="비전 프로세스")
+    parser.add_argument("--shm", required=True)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--jpeg-quality", type=int, default=80)
+    parser.add_argument("--parent-timeout", type=float, default=5.0)
+    parser.add_argument("--serial", default=None)
+    parser.add_argument("--recording-dir", default=None)
+    args = parser.parse_args()
+
+    import cv2
+    import cpu_tuning
+    from camera_controller import CameraController
+
+    # 비전 프로세스도 같은 환경 변수로 스레드 수 설정 (추론은 캡처 스레드에서 실행)
+    cpu_tuning.configure()
+
+    ring = FrameRing.attach(args.shm)
+    ctrl = ring.ctrl
+    ctrl["pid"] = os.getpid()
+
+    camera = CameraController(args.model, serial=args.serial, roi=[int(v) for v in ctrl["roi"]],
+                              recording_dir=args.recording_dir)
+    _apply_control(camera, ctrl)
+    version = int(ctrl["version"])
+    dump_request = int(ctrl["dump_request"])
+
+    encode_params = [cv2.IMWRITE_JPEG_QUALITY, args.jpeg_quality]
+    fps = {"count": 0, "since": time.perf_counter()}
+
+    def publish(roi_img, annotated, snapshot, blocks):
+        ok, jpeg = cv2.imencode('.jpg', annotated, encode_params)
+        if snapshot is not None:
+            rows, mode = snapshot_to_rows(snapshot), "lego"
+        else:
+            rows, mode = blocks_to_rows(blocks), "block"
+        ring.write(roi_img, jpeg if ok else None, rows, mode,
+                   ts=snapshot["ts"] if snapshot is not None else None)
+
+        fps["count"] += 1
+        elapsed = time.perf_counter() - fps["since"]
+        if elapsed >= 1.0:
+            ctrl["fps"] = fps["count"] / elapsed
+            fps["count"], fps["since"] = 0, time.perf_counter()
+
+    camera.on_frame = publish
+
+    if not camera.connect_camera():
+        ctrl["camera_state"] = -1
+        ring.close()
+        return 1
+    ctrl["camera_state"] = 1
+
+    capturing = False
+    try:
+        while not int(ctrl["stop"]):
+            now = time.time()
+            ctrl["heartbeat"] = now
+            parent = float(ctrl["parent_heartbeat"])
+            if parent and now - parent > args.parent_timeout:
+                print("⚠️ API 서버 응답 없음 - 비전 프로세스 종료")
+                break
+
+            if not capturing and int(ctrl["capture"]):
+                capturing = camera.start_capture()
+
+            if int(ctrl["dump_request"]) != dump_request:
+                dump_request = int(ctrl["dump_request"])
+                reason = bytes(ctrl["dump_reason"]).decode("ascii", "replace") or "remote"
+                camera.dump_recording(float(ctrl["dump_seconds"]), reason)
+
+            if int(ctrl["version"]) != version:
+                version = int(ctrl["version"])
+                _apply_control(camera, ctrl)
+
+            time.sleep(0.01)
+    finally:
+        camera.stop()
+        camera.on_frame = None
+        time.sleep(0.1)
+        ring.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -64,4 +64,10 @@ extern "C" {
         if (g_card < 0) return -1;
         return DI_ReadPort(g_card, 0, value);
     }
+    
+    // 출력 포트 읽기 (출력 검증용)
+    __declspec(dllexport) I16 PCI7230_ReadOutputPort(U32* value) {
+        if (g_card < 0) return -1;
+        return DO_ReadPort(g_card, 0, value);
+    }
 }
\ No newline at end of file